@@ -1,5 +1,25 @@
-from nebulagraph_lite.nebulagraph import NebulaGraphLet as nebulagraph_let
-
-__all__ = ["nebulagraph_let"]
+__all__ = ["nebulagraph_let", "async_nebulagraph_let"]
 
 __version__ = "0.2.5"
+
+# the entry points are imported on first access, so that importing the
+# package, e.g. for the CLI or __version__, doesn't import nebula3
+_LAZY = {
+    "nebulagraph_let": ("nebulagraph_lite.nebulagraph", "NebulaGraphLet"),
+    "async_nebulagraph_let": ("nebulagraph_lite.aio", "AsyncNebulaGraphLet"),
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    module, attribute = _LAZY[name]
+    value = getattr(importlib.import_module(module), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
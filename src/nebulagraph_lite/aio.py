@@ -0,0 +1,174 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import time
+
+from nebulagraph_lite.nebulagraph import NebulaGraphLet
+
+DEFAULT_READY_TIMEOUT = 60.0
+DEFAULT_READY_INTERVAL = 0.5
+DEFAULT_PROBE_TIMEOUT = 1.0
+
+
+async def _probe_port(host: str, port: int, timeout=DEFAULT_PROBE_TIMEOUT) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    with contextlib.suppress(OSError):
+        await writer.wait_closed()
+    return True
+
+
+async def _probe_status(
+    host: str, ws_http_port: int, timeout=DEFAULT_PROBE_TIMEOUT
+) -> bool:
+    """
+    Whether the /status endpoint of a service reports running.
+    """
+
+    async def _get():
+        reader, writer = await asyncio.open_connection(host, ws_http_port)
+        try:
+            writer.write(
+                f"GET /status HTTP/1.0\r\nHost: {host}:{ws_http_port}\r\n\r\n".encode()
+            )
+            await writer.drain()
+            return await reader.read()
+        finally:
+            writer.close()
+            with contextlib.suppress(OSError):
+                await writer.wait_closed()
+
+    try:
+        response = await asyncio.wait_for(_get(), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    head, _, body = response.partition(b"\r\n\r\n")
+    return b" 200 " in head.split(b"\r\n", 1)[0] and b'"running"' in body
+
+
+class AsyncNebulaGraphLet:
+    """
+    NebulaGraphLet for asyncio callers, e.g. a Jupyter kernel or an aiohttp
+    service: every lifecycle call is awaited without blocking the event loop.
+
+    The lifecycle itself is NebulaGraphLet's, run off the loop in its
+    executor, readiness is probed with asyncio sockets, also while start()
+    waits for the services. Cancelling start() cancels the startup at its
+    next step, readiness check or retry backoff and stops what it started,
+    a udocker command already running is let finish. Several instances can
+    start concurrently, e.g. with asyncio.gather(), given distinct host
+    addresses, e.g. 127.0.0.2, and base paths, which name their containers.
+    The keyword arguments are NebulaGraphLet's, or lite is an existing one.
+    """
+
+    def __init__(self, lite: NebulaGraphLet = None, executor=None, **kwargs):
+        self.lite = lite if lite is not None else NebulaGraphLet(**kwargs)
+        # None is the loop's default executor
+        self._executor = executor
+
+    @property
+    def host(self) -> str:
+        return self.lite.host
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def start(self, fresh=False, profile=False, trace=False):
+        """
+        Start all services and load the dataset, as NebulaGraphLet.start().
+        """
+        loop = asyncio.get_running_loop()
+
+        def _probe(port: int, ws_http_port: int) -> bool:
+            # the probes run on the loop, the startup thread only waits
+            probe = asyncio.run_coroutine_threadsafe(
+                self._is_service_ready(port, ws_http_port), loop
+            )
+            try:
+                return probe.result(timeout=2 * DEFAULT_PROBE_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                probe.cancel()
+                return False
+
+        self.lite.readiness_probe = _probe
+        future = asyncio.ensure_future(
+            self._run(self.lite.start, fresh=fresh, profile=profile, trace=trace)
+        )
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # the thread can't be interrupted, make it give up and wait for it
+            self.lite.cancel()
+            with contextlib.suppress(Exception):
+                await future
+            await self.stop()
+            raise
+        finally:
+            self.lite.readiness_probe = None
+
+    async def stop(self, grace=None):
+        await self._run(self.lite.stop, grace=grace)
+
+    async def shutdown(self, grace=None):
+        await self._run(self.lite.shutdown, grace=grace)
+
+    async def execute(self, statement: str, space=None):
+        return await self._run(self.lite.execute, statement, space=space)
+
+    async def execute_json(self, statement: str, space=None) -> dict:
+        return await self._run(self.lite.execute_json, statement, space=space)
+
+    async def load_ngql(self, *args, **kwargs):
+        return await self._run(self.lite.load_ngql, *args, **kwargs)
+
+    async def _is_service_ready(self, port: int, ws_http_port: int) -> bool:
+        return all(
+            await asyncio.gather(
+                _probe_port(self.host, port),
+                _probe_status(self.host, ws_http_port),
+            )
+        )
+
+    async def is_ready(self) -> bool:
+        """
+        Whether every service listens on its RPC port and reports running on
+        its /status endpoint.
+        """
+        return all(
+            await asyncio.gather(
+                *(
+                    self._is_service_ready(port, ws_http_port)
+                    for port, ws_http_port in self.lite._service_endpoints().values()
+                )
+            )
+        )
+
+    async def wait_ready(
+        self, timeout=DEFAULT_READY_TIMEOUT, interval=DEFAULT_READY_INTERVAL
+    ):
+        """
+        Wait until is_ready(), raise after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while not await self.is_ready():
+            if time.monotonic() >= deadline:
+                raise Exception(
+                    f"nebulagraph_lite services not ready in {timeout} seconds"
+                )
+            await asyncio.sleep(interval)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
@@ -0,0 +1,66 @@
+import itertools
+import threading
+
+ROUND_ROBIN = "round-robin"
+LEAST_LOAD = "least-load"
+BALANCE_POLICIES = (ROUND_ROBIN, LEAST_LOAD)
+
+
+class BalancedConnectionPool:
+    """
+    One nebula3 ConnectionPool per graphd frontend, every new session goes
+    to the next frontend round-robin, or to the one with the fewest
+    connections in use.
+
+    It mirrors the parts of ConnectionPool's interface that sessions are
+    taken through, so the loaders can use either.
+    """
+
+    def __init__(self, policy: str = ROUND_ROBIN):
+        if policy not in BALANCE_POLICIES:
+            raise ValueError(
+                f"unknown balance policy `{policy}`, expected one of {BALANCE_POLICIES}"
+            )
+        self.policy = policy
+        self._pools = []
+        self._order = None
+        self._lock = threading.Lock()
+
+    def init(self, addresses, configs=None):
+        """
+        Connect to every frontend, configs applies to each of them.
+        """
+        from nebula3.gclient.net import ConnectionPool
+
+        try:
+            for address in addresses:
+                connection_pool = ConnectionPool()
+                self._pools.append(connection_pool)
+                connection_pool.init([address], configs)
+        except Exception:
+            self.close()
+            raise
+        self._order = itertools.cycle(range(len(self._pools)))
+        return True
+
+    def _pick(self):
+        with self._lock:
+            start = next(self._order)
+        if self.policy == ROUND_ROBIN:
+            return self._pools[start]
+        # least load, ties go round-robin
+        rotated = self._pools[start:] + self._pools[:start]
+        return min(rotated, key=lambda pool: pool.in_used_connects())
+
+    def get_session(self, user_name, password, retry_connect=True):
+        return self._pick().get_session(user_name, password, retry_connect)
+
+    def connects(self) -> int:
+        return sum(pool.connects() for pool in self._pools)
+
+    def in_used_connects(self) -> int:
+        return sum(pool.in_used_connects() for pool in self._pools)
+
+    def close(self):
+        for connection_pool in self._pools:
+            connection_pool.close()
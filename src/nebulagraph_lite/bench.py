@@ -0,0 +1,300 @@
+import contextlib
+import json
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from nebulagraph_lite.utils import fancy_print, percentile
+
+DEFAULT_BENCH_CONCURRENCY = (1, 4, 16)
+DEFAULT_BENCH_ITERATIONS = 200
+DEFAULT_BENCH_WARMUP = 10
+# a p95 latency this much higher, or a throughput this much lower, than the
+# baseline's is a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.1
+
+# GO, MATCH, FETCH and LOOKUP over the basketballplayer dataset of start()
+DEFAULT_WORKLOAD = {
+    "name": "basketballplayer",
+    "space": "basketballplayer",
+    "queries": [
+        {
+            "name": "go-1-step",
+            "statement": 'GO FROM "player100" OVER follow YIELD dst(edge) AS id',
+        },
+        {
+            "name": "go-2-steps",
+            "statement": 'GO 2 STEPS FROM "player100" OVER follow '
+            "YIELD dst(edge) AS id",
+        },
+        {
+            "name": "match-neighbors",
+            "statement": 'MATCH (v:player{name:"Tim Duncan"})-[:follow]->(v2:player) '
+            "RETURN v2.player.name AS name",
+        },
+        {
+            "name": "match-serve",
+            "statement": "MATCH (v:player)-[e:serve]->(t:team) "
+            'WHERE id(v) == "player101" RETURN t.team.name AS team, '
+            "e.start_year AS start_year",
+        },
+        {
+            "name": "fetch-vertex",
+            "statement": 'FETCH PROP ON player "player100" YIELD properties(vertex)',
+        },
+        {
+            "name": "fetch-edge",
+            "statement": 'FETCH PROP ON serve "player100" -> "team204" '
+            "YIELD properties(edge)",
+        },
+        {
+            "name": "lookup-name",
+            "statement": 'LOOKUP ON player WHERE player.name == "Tony Parker" '
+            "YIELD id(vertex) AS id",
+        },
+    ],
+}
+
+
+def load_workload(path: str) -> dict:
+    """
+    Read a workload file, a JSON object like DEFAULT_WORKLOAD: the space to
+    USE, and queries of a name and a statement, each may set its own
+    iterations and warmup.
+    """
+    with open(path, "r") as f:
+        workload = json.load(f)
+    if not isinstance(workload, dict) or not workload.get("queries"):
+        raise Exception(
+            f"workload file {path} must hold a JSON object with queries"
+        )
+    for i, query in enumerate(workload["queries"]):
+        if not isinstance(query, dict) or not query.get("statement"):
+            raise Exception(f"query {i} of workload file {path} has no statement")
+        query.setdefault("name", f"query-{i}")
+    workload.setdefault("name", path)
+    return workload
+
+
+def latency_summary(latencies: list) -> dict:
+    """
+    p50/p95/p99/max and mean of latencies in seconds, reported in ms.
+    """
+    if not latencies:
+        return {
+            "mean_ms": 0.0,
+            "p50_ms": 0.0,
+            "p95_ms": 0.0,
+            "p99_ms": 0.0,
+            "max_ms": 0.0,
+        }
+    return {
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+class Benchmark:
+    """
+    Run the queries of a workload at several client concurrency levels,
+    one session per client, recording the latency of every query as the
+    client sees it and the throughput of each level.
+
+    Every query runs its iterations split over the clients of a level,
+    after warmup iterations that aren't recorded.
+    """
+
+    def __init__(
+        self,
+        connection_pool,
+        workload: dict = None,
+        user: str = "root",
+        password: str = "nebula",
+        concurrency=DEFAULT_BENCH_CONCURRENCY,
+        iterations: int = DEFAULT_BENCH_ITERATIONS,
+        warmup: int = DEFAULT_BENCH_WARMUP,
+    ):
+        self._pool = connection_pool
+        self.workload = workload if workload is not None else DEFAULT_WORKLOAD
+        self._user = user
+        self._password = password
+        self.concurrency = [max(1, level) for level in concurrency]
+        self.iterations = max(1, iterations)
+        self.warmup = max(0, warmup)
+
+    @staticmethod
+    def _run_client(session, statement: str, count: int, latencies: list, lock):
+        own, failed, error = [], 0, None
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                result = session.execute(statement)
+            except Exception as e:
+                # e.g. a dropped connection, a failed query like the others
+                failed += 1
+                error = str(e) or type(e).__name__
+                continue
+            elapsed = time.perf_counter() - started
+            if result.is_succeeded():
+                own.append(elapsed)
+            else:
+                failed += 1
+                error = result.error_msg()
+        with lock:
+            latencies.extend(own)
+        return failed, error
+
+    def _run_query(self, sessions, query: dict) -> dict:
+        statement = query["statement"]
+        level = len(sessions)
+        iterations = max(1, query.get("iterations", self.iterations))
+        warmup = max(0, query.get("warmup", self.warmup))
+        for i in range(warmup):
+            # not recorded, failed or not
+            with contextlib.suppress(Exception):
+                sessions[i % level].execute(statement)
+        counts = [
+            iterations // level + (1 if i < iterations % level else 0)
+            for i in range(level)
+        ]
+        latencies, lock = [], threading.Lock()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=level) as executor:
+            outcomes = list(
+                executor.map(
+                    lambda session, count: self._run_client(
+                        session, statement, count, latencies, lock
+                    ),
+                    sessions,
+                    counts,
+                )
+            )
+        seconds = time.perf_counter() - started
+        failed = sum(f for f, _ in outcomes)
+        result = {
+            "query": query["name"],
+            "concurrency": level,
+            "queries": iterations,
+            "failed": failed,
+            "seconds": seconds,
+            "qps": len(latencies) / seconds if seconds > 0 else 0.0,
+        }
+        result.update(latency_summary(latencies))
+        if failed:
+            result["error"] = next(e for _, e in outcomes if e is not None)
+        return result
+
+    def run(self) -> dict:
+        """
+        Run the workload at every concurrency level, returns a report of a
+        result per query and level.
+        """
+        space = self.workload.get("space")
+        report = {
+            "workload": self.workload.get("name"),
+            "space": space,
+            "started_at": time.time(),
+            "concurrency": list(self.concurrency),
+            "iterations": self.iterations,
+            "results": [],
+        }
+        for level in self.concurrency:
+            sessions = []
+            try:
+                for _ in range(level):
+                    sessions.append(
+                        self._pool.get_session(self._user, self._password)
+                    )
+                    if space is not None:
+                        result = sessions[-1].execute(f"USE `{space}`")
+                        if not result.is_succeeded():
+                            raise Exception(
+                                f"Failed to use space {space}: {result.error_msg()}"
+                            )
+                for query in self.workload["queries"]:
+                    report["results"].append(self._run_query(sessions, query))
+            finally:
+                for session in sessions:
+                    session.release()
+        report["seconds"] = time.time() - report["started_at"]
+        return report
+
+
+def compare(report: dict, baseline: dict, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    The regressions of report against a baseline report, per query and
+    concurrency level present in both: p95 latency up or throughput down
+    by more than threshold.
+    """
+    previous = {(r["query"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        base = previous.get((r["query"], r["concurrency"]))
+        if base is None:
+            continue
+        if base["p95_ms"] > 0 and r["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(
+                {
+                    "query": r["query"],
+                    "concurrency": r["concurrency"],
+                    "metric": "p95_ms",
+                    "baseline": base["p95_ms"],
+                    "current": r["p95_ms"],
+                }
+            )
+        if base["qps"] > 0 and r["qps"] < base["qps"] * (1 - threshold):
+            regressions.append(
+                {
+                    "query": r["query"],
+                    "concurrency": r["concurrency"],
+                    "metric": "qps",
+                    "baseline": base["qps"],
+                    "current": r["qps"],
+                }
+            )
+    return regressions
+
+
+def print_report(report: dict, baseline: dict = None):
+    """
+    Print the results as a table, with the change of p95 and throughput
+    against a baseline report when given.
+    """
+    previous = {}
+    if baseline is not None:
+        previous = {(r["query"], r["concurrency"]): r for r in baseline["results"]}
+    width = max([len("query")] + [len(r["query"]) for r in report["results"]])
+    header = (
+        f"{'query':<{width}}  {'clients':>7}  {'p50(ms)':>8}  {'p95(ms)':>8}  "
+        f"{'p99(ms)':>8}  {'max(ms)':>8}  {'qps':>9}  {'failed':>6}"
+    )
+    if previous:
+        header += f"  {'p95 vs base':>11}  {'qps vs base':>11}"
+    lines = [header]
+    for r in report["results"]:
+        line = (
+            f"{r['query']:<{width}}  {r['concurrency']:>7}  {r['p50_ms']:>8.2f}  "
+            f"{r['p95_ms']:>8.2f}  {r['p99_ms']:>8.2f}  {r['max_ms']:>8.2f}  "
+            f"{r['qps']:>9.1f}  {r['failed']:>6}"
+        )
+        base = previous.get((r["query"], r["concurrency"]))
+        if base is not None:
+            line += "".join(
+                (
+                    f"  {(r[key] / base[key] - 1) * 100:>+10.1f}%"
+                    if base[key] > 0
+                    else f"  {'-':>11}"
+                )
+                for key in ("p95_ms", "qps")
+            )
+        lines.append(line)
+    fancy_print(
+        f"Info: benchmark of workload {report['workload']}, "
+        f"{report['iterations']} iterations per query",
+        color="light_green",
+    )
+    fancy_print("\n".join(lines), color="light_blue")
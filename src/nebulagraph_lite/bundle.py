@@ -0,0 +1,166 @@
+import hashlib
+import os
+import subprocess
+import tarfile
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+from nebulagraph_lite.cache import ContainerCache
+from nebulagraph_lite.utils import fancy_print
+
+# the docker-save tars of the ModelScope bundle and the images they hold
+BUNDLE_IMAGES = {
+    "nebulagraph_lite_meta.tar": "vesoft/nebula-metad:v3",
+    "nebulagraph_lite_graph.tar": "vesoft/nebula-graphd:v3",
+    "nebulagraph_lite_storage.tar": "vesoft/nebula-storaged:v3",
+    "nebulagraph_lite_console.tar": "vesoft/nebula-console:v3",
+}
+CHUNK_SIZE = 1 << 20
+ERROR_TAIL_BYTES = 2000
+# keep extracted members inside the target where tarfile can
+_EXTRACT_ARGS = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+
+
+class BundleLoader:
+    """
+    Load the image tars of the ModelScope bundle into udocker, streaming
+    the gzipped bundle once: every image tar is piped into its own
+    `udocker load` as it's read, so the loads run in parallel and neither
+    the bundle nor the tars are extracted to disk first.
+
+    An image is skipped, without being read, when the bundle member it was
+    loaded from last time is unchanged, by name, size and mtime, and the
+    image in the local repository still has the digest it was loaded with.
+    state is a BootstrapState remembering those members and digests.
+    """
+
+    def __init__(self, udocker, state, extract_path: str, debug=False):
+        self.udocker = udocker
+        self.state = state
+        # where the members that aren't images go, as `tar -xzf` did
+        self.extract_path = extract_path
+        self._debug = debug
+
+    @staticmethod
+    def _member_key(member) -> dict:
+        return {"name": member.name, "size": member.size, "mtime": member.mtime}
+
+    def _image_digest(self, image: str):
+        """
+        The digest of an image in the local repository, None without it.
+        """
+        result = self.udocker.run(["inspect", image])
+        if result.returncode != 0:
+            return None
+        return ContainerCache.image_digest(result.stdout)
+
+    def _is_loaded(self, image: str, key: dict) -> bool:
+        recorded = self.state.get(f"image {image}", key)
+        if not isinstance(recorded, dict) or not recorded.get("image_digest"):
+            return False
+        return self._image_digest(image) == recorded["image_digest"]
+
+    def _start_load(self, image: str, source):
+        """
+        Pipe source into a `udocker load`, returning the process, its output
+        file and the sha256 digest of what was piped.
+        """
+        output = tempfile.TemporaryFile()
+        process = subprocess.Popen(
+            self.udocker.argv(["load"]),
+            stdin=subprocess.PIPE,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+        digest = hashlib.sha256()
+        try:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            # udocker gave up early, its output says why
+            pass
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        return process, output, f"sha256:{digest.hexdigest()}"
+
+    def load(self, bundle_path: str) -> dict:
+        """
+        Load the images of the bundle not loaded yet, returns what happened
+        to every image: loaded or skipped.
+
+        Raises naming every image that failed to load.
+        """
+        present = set(self.udocker.images())
+        results = {}
+        loads = []
+        try:
+            with tarfile.open(bundle_path, "r|*") as bundle:
+                for member in bundle:
+                    image = BUNDLE_IMAGES.get(os.path.basename(member.name))
+                    if image is None:
+                        if member.isfile() or member.isdir():
+                            bundle.extract(
+                                member, self.extract_path, **_EXTRACT_ARGS
+                            )
+                        continue
+                    key = self._member_key(member)
+                    if image in present and self._is_loaded(image, key):
+                        results[image] = "skipped"
+                        continue
+                    if self._debug:
+                        fancy_print(
+                            f"Info: [DEBUG] loading {image} from the bundle"
+                        )
+                    loads.append(
+                        (image, key)
+                        + self._start_load(image, bundle.extractfile(member))
+                    )
+        finally:
+            for _, _, process, _, _ in loads:
+                process.wait()
+
+        # the digests the images were loaded with, one inspect each
+        loaded = [
+            image for image, _, process, _, _ in loads if process.returncode == 0
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, len(loaded))) as executor:
+            image_digests = dict(
+                zip(loaded, executor.map(self._image_digest, loaded))
+            )
+
+        failures = {}
+        for image, key, process, output, digest in loads:
+            output.seek(0)
+            message = output.read().decode(errors="replace")[-ERROR_TAIL_BYTES:]
+            output.close()
+            if process.returncode != 0:
+                failures[image] = message.strip() or f"code {process.returncode}"
+                self.state.invalidate(f"image {image}")
+                continue
+            self.state.put(
+                f"image {image}",
+                {"tar_sha256": digest, "image_digest": image_digests[image]},
+                key,
+            )
+            results[image] = "loaded"
+        missing = set(BUNDLE_IMAGES.values()) - set(results) - set(failures)
+        for image in sorted(missing):
+            failures[image] = f"not found in {bundle_path}"
+        if failures:
+            raise Exception(
+                "failed to load "
+                + ", ".join(sorted(failures))
+                + " from the ModelScope bundle:\n"
+                + "\n".join(
+                    f"{image}: {error}" for image, error in failures.items()
+                )
+            )
+        return results
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import platform
+import sys
+import threading
+
+
+class ContainerCache:
+    """
+    Remember the fingerprint of every prepared (created and set up) udocker
+    container, so a restart can reuse it instead of running the expensive
+    create and F1 setup again.
+
+    A fingerprint covers everything a prepared container depends on: the
+    image digest, the execmode, the udocker version and the host libc.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(image_digest: str, execmode: str, udocker_version: str) -> dict:
+        libc, libc_version = platform.libc_ver()
+        return {
+            "image_digest": image_digest,
+            "execmode": execmode,
+            "udocker_version": udocker_version,
+            "libc": f"{libc}-{libc_version}" if libc else "unknown",
+        }
+
+    @staticmethod
+    def image_digest(image_json: bytes):
+        """
+        The digest of an image from its `udocker inspect` output: the image
+        id when it has one, else the sha256 of its canonical config, so that
+        the output's formatting doesn't matter. None when it can't be parsed.
+        """
+        try:
+            config = json.loads(image_json)
+        except ValueError:
+            return None
+        if not isinstance(config, dict):
+            return None
+        image_id = config.get("id") or config.get("Id")
+        if isinstance(image_id, str) and image_id:
+            return image_id if ":" in image_id else f"sha256:{image_id}"
+        canonical = json.dumps(config, sort_keys=True, separators=(",", ":"))
+        return "sha256:" + hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, container: str):
+        with self._lock:
+            return self._load().get(container)
+
+    def _save(self, records: dict):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(records, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def put(self, container: str, fingerprint: dict):
+        with self._lock:
+            records = self._load()
+            records[container] = fingerprint
+            self._save(records)
+
+    def invalidate(self, container: str):
+        with self._lock:
+            records = self._load()
+            if records.pop(container, None) is not None:
+                self._save(records)
+
+
+class BootstrapState:
+    """
+    Remember the environment detection results and the one-time bootstrap
+    steps done, e.g. locating and installing udocker, so that they run
+    again only when something changed.
+
+    The state is kept for one host, Python executable and package version,
+    a change of any of them starts it over. Every entry records what it
+    depends on, get() returns it only while that still holds.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = None
+
+    @staticmethod
+    def key() -> dict:
+        from nebulagraph_lite import __version__
+
+        return {
+            "host": platform.node(),
+            "python": sys.executable,
+            "version": __version__,
+        }
+
+    def _load(self) -> dict:
+        if self._records is None:
+            try:
+                with open(self.path, "r") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+            self._records = (
+                state.get("records", {}) if state.get("key") == self.key() else {}
+            )
+        return self._records
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"key": self.key(), "records": self._records},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
+
+    def get(self, name: str, depends_on=None):
+        """
+        The value recorded for name, None if there is none or it was recorded
+        for other depends_on.
+        """
+        with self._lock:
+            record = self._load().get(name)
+        if record is None or record.get("depends_on") != depends_on:
+            return None
+        return record["value"]
+
+    def put(self, name: str, value, depends_on=None):
+        with self._lock:
+            self._load()[name] = {"value": value, "depends_on": depends_on}
+            self._save()
+
+    def invalidate(self, name: str):
+        with self._lock:
+            if self._load().pop(name, None) is not None:
+                self._save()
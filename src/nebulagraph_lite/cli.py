@@ -1,7 +1,38 @@
 from argparse import ArgumentParser
 
-from nebulagraph_lite.nebulagraph import NebulaGraphLet as nebulagraph_let
 from nebulagraph_lite import __version__
+from nebulagraph_lite.bench import (
+    DEFAULT_BENCH_CONCURRENCY,
+    DEFAULT_BENCH_ITERATIONS,
+    DEFAULT_BENCH_WARMUP,
+    DEFAULT_REGRESSION_THRESHOLD,
+)
+from nebulagraph_lite.importer import (
+    DEFAULT_IMPORT_BATCH_SIZE,
+    DEFAULT_IMPORT_CONCURRENCY,
+    DEFAULT_IMPORT_RETRIES,
+)
+from nebulagraph_lite.loader import DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY
+from nebulagraph_lite.logs import DEFAULT_LOG_LINES
+from nebulagraph_lite.metrics import DEFAULT_SCRAPE_INTERVAL
+from nebulagraph_lite.tuning import TUNING_PROFILES
+
+
+def _split_name_path(value: str):
+    name, sep, path = value.partition("=")
+    if not sep or not name or not path:
+        raise SystemExit(f"expected NAME=PATH, got `{value}`")
+    return name, path
+
+
+def _split_levels(value: str):
+    try:
+        levels = tuple(int(level) for level in value.split(",") if level.strip())
+    except ValueError:
+        raise SystemExit(f"expected comma separated integers, got `{value}`")
+    if not levels or min(levels) < 1:
+        raise SystemExit(f"expected positive concurrency levels, got `{value}`")
+    return levels
 
 
 def main():
@@ -56,18 +87,352 @@ def main():
         dest="clean_up",
         help="Run cleanup of the NebulaGraph data first before starting",
     )
+    start_parser.add_argument(
+        "-t",
+        "--startup-timeout",
+        type=int,
+        default=None,
+        dest="startup_timeout",
+        help="Total seconds to wait for all services to become ready, by default it's 600",
+    )
+    start_parser.add_argument(
+        "--dataset-source",
+        type=str,
+        default=None,
+        dest="dataset_source",
+        help="Where to get basketballplayer.ngql first: a URL, file:// URL, file or directory",
+    )
+    start_parser.add_argument(
+        "--profile",
+        action="store_true",
+        dest="profile",
+        help="Print the wall-clock time of every startup phase",
+    )
+    start_parser.add_argument(
+        "--trace",
+        action="store_true",
+        dest="trace",
+        help="Write the startup phases as a Chrome trace to <base_path>/startup_trace.json",
+    )
+    start_parser.add_argument(
+        "--graphd",
+        type=int,
+        default=None,
+        dest="graphd",
+        help="Number of graphd frontends, on consecutive ports from --port, by default it's 1",
+    )
+    start_parser.add_argument(
+        "--storaged",
+        type=int,
+        default=None,
+        dest="storaged",
+        help="Number of storaged instances, on ports 9779, 9789, ..., by default it's 1",
+    )
+    start_parser.add_argument(
+        "--partition-num",
+        type=int,
+        default=None,
+        dest="partition_num",
+        help="Partitions of the dataset space, by default 1 with a single storaged, "
+        "otherwise the dataset's own",
+    )
+    # not --profile, that one already means printing the startup phases
+    start_parser.add_argument(
+        "--tuning-profile",
+        choices=TUNING_PROFILES,
+        default=None,
+        dest="tuning_profile",
+        help="Derive threads, block cache, write buffers and memory limits from "
+        "the host's cgroup memory and CPUs, by default the services' own",
+    )
+    start_parser.add_argument(
+        "--tuning-file",
+        type=str,
+        default=None,
+        dest="tuning_file",
+        help="JSON file of flags per service overriding the profile, by default "
+        "<base_path>/tuning.json when it exists",
+    )
+
+    load_parser = subparsers.add_parser(
+        "load", help="Load a plain or gzipped .ngql file into NebulaGraph"
+    )
+    load_parser.add_argument("path", type=str, help="Path of the .ngql(.gz) file")
+    load_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        dest="batch_size",
+        help=f"Max rows per merged INSERT statement, by default it's {DEFAULT_BATCH_SIZE}",
+    )
+    load_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        dest="concurrency",
+        help=f"Sessions loading batches in parallel, by default it's {DEFAULT_CONCURRENCY}",
+    )
+    load_parser.add_argument(
+        "--partition-num",
+        type=int,
+        default=None,
+        dest="partition_num",
+        help="Rewrite partition_num of CREATE SPACE statements to this value",
+    )
 
-    subparsers.add_parser("stop")
-    subparsers.add_parser("shutdown")
+    import_parser = subparsers.add_parser(
+        "import-csv", help="Import vertex and edge CSV files into a space"
+    )
+    import_parser.add_argument(
+        "-s", "--space", type=str, required=True, dest="space", help="Graph space"
+    )
+    import_parser.add_argument(
+        "--vertex",
+        action="append",
+        default=[],
+        dest="vertices",
+        metavar="TAG=PATH",
+        help="Vertex CSV file of a tag, the first column is the VID, repeatable",
+    )
+    import_parser.add_argument(
+        "--edge",
+        action="append",
+        default=[],
+        dest="edges",
+        metavar="EDGE_TYPE=PATH",
+        help="Edge CSV file of an edge type, the first two columns are src and dst, repeatable",
+    )
+    import_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_IMPORT_BATCH_SIZE,
+        dest="batch_size",
+        help=f"Rows per INSERT statement, by default it's {DEFAULT_IMPORT_BATCH_SIZE}",
+    )
+    import_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_IMPORT_CONCURRENCY,
+        dest="concurrency",
+        help=f"Sessions inserting in parallel, by default it's {DEFAULT_IMPORT_CONCURRENCY}",
+    )
+    import_parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_IMPORT_RETRIES,
+        dest="retries",
+        help=f"Retries of a failed batch, by default it's {DEFAULT_IMPORT_RETRIES}",
+    )
+    import_parser.add_argument(
+        "--vid-type",
+        choices=["string", "int"],
+        default="string",
+        dest="vid_type",
+        help="VID type of the space, by default it's string",
+    )
+    import_parser.add_argument(
+        "--delimiter", type=str, default=",", dest="delimiter", help="CSV delimiter"
+    )
+
+    stats_parser = subparsers.add_parser(
+        "stats", help="Show the services' /stats, scraped from their ws ports"
+    )
+    stats_parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        dest="watch",
+        help="Keep scraping and printing every --interval seconds",
+    )
+    stats_parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=DEFAULT_SCRAPE_INTERVAL,
+        dest="interval",
+        help=f"Seconds between scrapes, by default it's {DEFAULT_SCRAPE_INTERVAL:g}",
+    )
+    stats_parser.add_argument(
+        "-f",
+        "--filter",
+        action="append",
+        default=[],
+        dest="filters",
+        help="Only show metrics whose name contains this, repeatable",
+    )
+    stats_parser.add_argument(
+        "--serve-port",
+        type=int,
+        default=None,
+        dest="serve_port",
+        help="Also serve the metrics in Prometheus text format on this local port",
+    )
+    stats_parser.add_argument(
+        "--graphd",
+        type=int,
+        default=None,
+        dest="graphd",
+        help="graphd instances, by default as many as start() left running",
+    )
+    stats_parser.add_argument(
+        "--storaged",
+        type=int,
+        default=None,
+        dest="storaged",
+        help="storaged instances, by default as many as start() left running",
+    )
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark the running instance with a query workload"
+    )
+    bench_parser.add_argument(
+        "-w",
+        "--workload",
+        type=str,
+        default=None,
+        dest="workload",
+        help="JSON workload file of a space and named queries, by default GO, "
+        "MATCH, FETCH and LOOKUP over basketballplayer",
+    )
+    bench_parser.add_argument(
+        "--concurrency",
+        type=str,
+        default=",".join(str(level) for level in DEFAULT_BENCH_CONCURRENCY),
+        dest="concurrency",
+        help="Comma separated client concurrency levels, by default it's "
+        + ",".join(str(level) for level in DEFAULT_BENCH_CONCURRENCY),
+    )
+    bench_parser.add_argument(
+        "-n",
+        "--iterations",
+        type=int,
+        default=DEFAULT_BENCH_ITERATIONS,
+        dest="iterations",
+        help=f"Runs of every query per level, by default it's {DEFAULT_BENCH_ITERATIONS}",
+    )
+    bench_parser.add_argument(
+        "--warmup",
+        type=int,
+        default=DEFAULT_BENCH_WARMUP,
+        dest="warmup",
+        help=f"Unrecorded runs of every query per level, by default it's {DEFAULT_BENCH_WARMUP}",
+    )
+    bench_parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        default=None,
+        dest="output",
+        help="Where to write the JSON report, by default <base_path>/bench/bench-<time>.json",
+    )
+    bench_parser.add_argument(
+        "--baseline",
+        type=str,
+        default=None,
+        dest="baseline",
+        help="JSON report of an earlier run to compare with, exits 1 on regressions",
+    )
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        dest="threshold",
+        help="Relative p95 increase or throughput drop counted as a regression, "
+        f"by default it's {DEFAULT_REGRESSION_THRESHOLD:g}",
+    )
+    bench_parser.add_argument(
+        "--graphd",
+        type=int,
+        default=None,
+        dest="graphd",
+        help="graphd instances, by default as many as start() left running",
+    )
+
+    logs_parser = subparsers.add_parser("logs", help="Show the service logs")
+    logs_parser.add_argument(
+        "-f",
+        "--follow",
+        action="store_true",
+        dest="follow",
+        help="Keep printing new lines until interrupted",
+    )
+    logs_parser.add_argument(
+        "-s",
+        "--service",
+        choices=["metad", "graphd", "storaged"],
+        default=None,
+        dest="service",
+        help="Only the logs of this service's instances, by default all",
+    )
+    logs_parser.add_argument(
+        "-n",
+        "--lines",
+        type=int,
+        default=DEFAULT_LOG_LINES,
+        dest="lines",
+        help=f"Lines to show per instance first, by default it's {DEFAULT_LOG_LINES}",
+    )
+    logs_parser.add_argument(
+        "--graphd",
+        type=int,
+        default=None,
+        dest="graphd",
+        help="graphd instances, by default as many as start() left running",
+    )
+    logs_parser.add_argument(
+        "--storaged",
+        type=int,
+        default=None,
+        dest="storaged",
+        help="storaged instances, by default as many as start() left running",
+    )
+
+    stop_parser = subparsers.add_parser("stop")
+    shutdown_parser = subparsers.add_parser("shutdown")
+    for stop_or_shutdown_parser in (stop_parser, shutdown_parser):
+        stop_or_shutdown_parser.add_argument(
+            "--grace",
+            type=float,
+            default=None,
+            dest="grace",
+            help="Seconds every service has to exit before it is killed, by "
+            "default 10 for graphd and metad, 30 for storaged",
+        )
+    subparsers.add_parser(
+        "status", help="Report the health of the services started last"
+    )
     subparsers.add_parser("version")
     subparsers.add_parser("cleanup")
     subparsers.add_parser("start_metad")
-    subparsers.add_parser("start_graphd")
-    subparsers.add_parser("start_storaged")
+    start_graphd_parser = subparsers.add_parser("start_graphd")
+    start_graphd_parser.add_argument(
+        "--graphd",
+        type=int,
+        default=None,
+        dest="graphd",
+        help="Number of graphd frontends, by default it's 1",
+    )
+    start_storaged_parser = subparsers.add_parser("start_storaged")
+    start_storaged_parser.add_argument(
+        "--storaged",
+        type=int,
+        default=None,
+        dest="storaged",
+        help="Number of storaged instances, by default it's 1",
+    )
     # subparsers.add_parser("ps")
 
     args = parser.parse_args()
 
+    if args.command == "version":
+        print(__version__)
+        return
+    if args.command is None:
+        parser.print_help()
+        return
+    # only the commands that need it pay for importing it
+    from nebulagraph_lite.nebulagraph import NebulaGraphLet as nebulagraph_let
+
     debug = args.debug
     in_container = args.in_container
     host = args.host
@@ -76,6 +441,8 @@ def main():
 
     if args.command == "start":
         start_clean_up = args.clean_up
+        profile = args.profile
+        trace = args.trace
         args = {
             "debug": debug,
             "in_container": in_container,
@@ -83,6 +450,13 @@ def main():
             "port": port,
             "base_path": base_path,
             "clean_up": start_clean_up,
+            "startup_timeout": args.startup_timeout,
+            "dataset_source": args.dataset_source,
+            "graphd": args.graphd,
+            "storaged": args.storaged,
+            "partition_num": args.partition_num,
+            "tuning_profile": args.tuning_profile,
+            "tuning_file": args.tuning_file,
         }
         # pop None values
         args = {k: v for k, v in args.items() if v is not None}
@@ -90,8 +464,9 @@ def main():
         n = nebulagraph_let(
             **args,
         )
-        n.start(fresh=bool(start_clean_up))
+        n.start(fresh=bool(start_clean_up), profile=profile, trace=trace)
     elif args.command == "stop":
+        grace = args.grace
         args = {
             "debug": debug,
             "in_container": in_container,
@@ -104,7 +479,92 @@ def main():
         n = nebulagraph_let(
             **args,
         )
-        n.stop()
+        n.stop(grace=grace)
+    elif args.command == "load":
+        n = nebulagraph_let(
+            debug=debug,
+            in_container=in_container,
+            host=host,
+            port=port,
+            base_path=base_path,
+        )
+        n.load_ngql(
+            args.path,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            partition_num=args.partition_num,
+        )
+    elif args.command == "import-csv":
+        n = nebulagraph_let(
+            debug=debug,
+            in_container=in_container,
+            host=host,
+            port=port,
+            base_path=base_path,
+        )
+        n.import_csv(
+            args.space,
+            vertices=[_split_name_path(v) for v in args.vertices],
+            edges=[_split_name_path(e) for e in args.edges],
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            retries=args.retries,
+            vid_type=args.vid_type,
+            delimiter=args.delimiter,
+        )
+    elif args.command == "bench":
+        n = nebulagraph_let(
+            debug=debug,
+            in_container=in_container,
+            host=host,
+            port=port,
+            base_path=base_path,
+        ).attach(graphd=args.graphd)
+        report = n.bench(
+            workload=args.workload,
+            concurrency=_split_levels(args.concurrency),
+            iterations=args.iterations,
+            warmup=args.warmup,
+            output=args.output,
+            baseline=args.baseline,
+            threshold=args.threshold,
+        )
+        if report.get("regressions"):
+            raise SystemExit(1)
+    elif args.command == "logs":
+        n = nebulagraph_let(
+            debug=debug,
+            in_container=in_container,
+            host=host,
+            port=port,
+            base_path=base_path,
+        ).attach(graphd=args.graphd, storaged=args.storaged)
+        n.print_logs(service=args.service, lines=args.lines, follow=args.follow)
+    elif args.command == "stats":
+        n = nebulagraph_let(
+            debug=debug,
+            in_container=in_container,
+            host=host,
+            port=port,
+            base_path=base_path,
+        ).attach(graphd=args.graphd, storaged=args.storaged)
+        n.print_stats(
+            watch=args.watch,
+            interval=args.interval,
+            filters=args.filters,
+            serve_port=args.serve_port,
+        )
+    elif args.command == "status":
+        n = nebulagraph_let(
+            debug=debug,
+            in_container=in_container,
+            host=host,
+            port=port,
+            base_path=base_path,
+        )
+        status = n.print_status()
+        if status["state"] != "up":
+            raise SystemExit(1)
     elif args.command == "shutdown":
         n = nebulagraph_let(
             debug=debug,
@@ -113,7 +573,7 @@ def main():
             port=port,
             base_path=base_path,
         )
-        n.shutdown()
+        n.shutdown(grace=args.grace)
     elif args.command == "cleanup":
         n = nebulagraph_let(
             debug=debug,
@@ -139,6 +599,7 @@ def main():
             host=host,
             port=port,
             base_path=base_path,
+            graphd=args.graphd,
         )
         n.start_graphd()
     elif args.command == "start_storaged":
@@ -148,10 +609,9 @@ def main():
             host=host,
             port=port,
             base_path=base_path,
+            storaged=args.storaged,
         )
         n.start_storaged()
-    elif args.command == "version":
-        print(__version__)
     #    elif args.command == "ps":
     #        n = nebulagraph_let(
     #            debug=debug,
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from urllib.parse import urlparse
+
+from nebulagraph_lite.utils import fancy_dict_print
+
+DEFAULT_FETCH_TIMEOUT = 10
+CHUNK_SIZE = 1 << 20
+
+
+def sha256_of(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """
+    A content-addressed cache of dataset files under one directory.
+
+    Contents live in sha256/<hexdigest>, index.json maps every dataset name
+    and list of sources to the digest fetched from them, and <name> itself
+    is a copy of the content, for the paths callers already know. A dataset
+    is only fetched again when its content is missing or does not verify,
+    or when it's asked for from other sources.
+
+    Sources are tried in order and can be http(s) URLs, file:// URLs, local
+    files or local directories containing a file of the dataset's name.
+    """
+
+    def __init__(self, directory: str, timeout: float = DEFAULT_FETCH_TIMEOUT):
+        self.directory = directory
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    @property
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "sha256", digest)
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: dict):
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def _verified(self, path: str, digest: str) -> bool:
+        return bool(digest) and os.path.isfile(path) and sha256_of(path) == digest
+
+    def _materialize(self, digest: str, name: str) -> str:
+        """
+        Make <name> a copy of the cached content, return its path.
+        """
+        path = os.path.join(self.directory, name)
+        if self._verified(path, digest):
+            return path
+        tmp_path = f"{path}.tmp"
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            os.link(self._blob_path(digest), tmp_path)
+        except OSError:
+            shutil.copyfile(self._blob_path(digest), tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    def _store(self, tmp_path: str, digest: str):
+        os.makedirs(os.path.dirname(self._blob_path(digest)), exist_ok=True)
+        os.replace(tmp_path, self._blob_path(digest))
+
+    def _open_source(self, source: str, name: str):
+        parsed = urlparse(source)
+        if parsed.scheme in ("http", "https"):
+            import urllib.request
+
+            # a per request timeout, never the global socket one
+            return urllib.request.urlopen(source, timeout=self.timeout)
+        if parsed.scheme == "file":
+            from urllib.request import url2pathname
+
+            path = url2pathname(parsed.path)
+        else:
+            path = os.path.expanduser(source)
+        if os.path.isdir(path):
+            path = os.path.join(path, name)
+        return open(path, "rb")
+
+    def _fetch_from(self, source: str, name: str):
+        """
+        Copy a source into a temporary file, return its path and digest.
+        """
+        tmp_path = os.path.join(self.directory, f".{name}.download")
+        digest = hashlib.sha256()
+        with self._open_source(source, name) as response, open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+        return tmp_path, digest.hexdigest()
+
+    @staticmethod
+    def _records(index: dict, name: str) -> dict:
+        # {sources: record}, index.json of older versions had one record per name
+        records = index.get(name)
+        if not isinstance(records, dict) or "sha256" in records:
+            return {}
+        return records
+
+    def fetch(self, name: str, sources, sha256: str = None) -> str:
+        """
+        Return the path of a verified copy of dataset name, fetching it from
+        the first working source only when needed.
+
+        sha256 pins the expected content, any other is rejected. Without it
+        the content last fetched from the same sources is reused while it
+        verifies, and once it doesn't whatever the sources serve now is
+        accepted and recorded.
+        """
+        sources = list(sources)
+        sources_key = " ".join(sources)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            index = self._load_index()
+            records = self._records(index, name)
+            recorded = records.get(sources_key, {}).get("sha256")
+
+            cached = sha256 or recorded
+            if cached and self._verified(self._blob_path(cached), cached):
+                return self._materialize(cached, name)
+
+            # adopt a copy left by an older version or a previous download
+            legacy_path = os.path.join(self.directory, name)
+            if (sha256 or not records) and os.path.isfile(legacy_path):
+                digest = sha256_of(legacy_path)
+                if sha256 is None or digest == sha256:
+                    tmp_path = f"{legacy_path}.adopt"
+                    shutil.copyfile(legacy_path, tmp_path)
+                    self._store(tmp_path, digest)
+                    records[sources_key] = {"sha256": digest, "source": legacy_path}
+                    index[name] = records
+                    self._save_index(index)
+                    return legacy_path
+
+            errors = {}
+            for source in sources:
+                try:
+                    tmp_path, digest = self._fetch_from(source, name)
+                except Exception as e:
+                    errors[source] = str(e)
+                    continue
+                if sha256 and digest != sha256:
+                    os.remove(tmp_path)
+                    errors[source] = f"sha256 {digest} does not match {sha256}"
+                    continue
+                self._store(tmp_path, digest)
+                records[sources_key] = {"sha256": digest, "source": source}
+                index[name] = records
+                self._save_index(index)
+                return self._materialize(digest, name)
+
+            fancy_dict_print(
+                {
+                    "message": f"Failed to fetch dataset {name}, please check your network connection or pass a local source",
+                    "errors": errors,
+                }
+            )
+            raise Exception(f"Failed to fetch dataset {name} from {sources}")
@@ -0,0 +1,320 @@
+import csv
+import queue
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from nebulagraph_lite.utils import fancy_print, percentile
+
+DEFAULT_IMPORT_BATCH_SIZE = 256
+DEFAULT_IMPORT_CONCURRENCY = 4
+DEFAULT_IMPORT_RETRIES = 3
+
+RAW_TYPES = {"int", "int64", "int32", "int16", "int8", "float", "double", "bool"}
+TIME_TYPES = {"date", "time", "datetime", "timestamp"}
+
+
+def quote_string(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def value_formatter(prop_type: str):
+    """
+    Return the function turning a CSV cell into an nGQL literal of prop_type,
+    empty cells become NULL.
+    """
+    prop_type = (prop_type or "string").lower()
+    if prop_type in RAW_TYPES:
+        if prop_type == "bool":
+            return lambda v: (v.strip().lower() if v.strip() else "NULL")
+        return lambda v: (v.strip() if v.strip() else "NULL")
+    if prop_type in TIME_TYPES:
+
+        def _format_time(v):
+            if not v.strip():
+                return "NULL"
+            if prop_type == "timestamp" and v.strip().isdigit():
+                return v.strip()
+            return f"{prop_type}({quote_string(v)})"
+
+        return _format_time
+    return lambda v: quote_string(v)
+
+
+def parse_header(header):
+    """
+    Split a header of `name` or `name:type` cells into names and types,
+    untyped columns are strings.
+    """
+    names, types = [], []
+    for cell in header:
+        name, _, prop_type = cell.strip().partition(":")
+        names.append(name)
+        types.append(prop_type or "string")
+    return names, types
+
+
+def read_chunks(path: str, chunk_size: int, delimiter: str = ","):
+    """
+    Yield the header and then the rows of a CSV file, chunk_size rows at a time.
+
+    Raises ValueError naming the file and line of a row with more or fewer
+    cells than the header.
+    """
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        reader = csv.reader(file, delimiter=delimiter)
+        header = next(reader)
+        yield header
+        chunk = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != len(header):
+                raise ValueError(
+                    f"{path}:{reader.line_num}: {len(row)} cells, the header "
+                    f"has {len(header)}"
+                )
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class ImportStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.rows = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed_rows = 0
+        self.errors = []
+        self.latencies = []
+
+    def record(self, rows: int, latency: float, retries: int):
+        with self._lock:
+            self.rows += rows
+            self.batches += 1
+            self.retries += retries
+            self.latencies.append(latency)
+
+    def record_failure(self, rows: int, error: Exception, retries: int):
+        with self._lock:
+            self.failed_rows += rows
+            self.retries += retries
+            self.errors.append(str(error))
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            seconds = time.monotonic() - self.started
+            return {
+                "rows": self.rows,
+                "batches": self.batches,
+                "retries": self.retries,
+                "failed_rows": self.failed_rows,
+                "seconds": seconds,
+                "rows_per_second": self.rows / seconds if seconds > 0 else 0.0,
+                "p99_batch_latency_ms": percentile(self.latencies, 99) * 1000,
+            }
+
+
+class CsvImporter:
+    """
+    Import vertex and edge CSV files into a graph space with batched INSERT
+    statements, executed by a bounded pool of sessions.
+
+    The header row names the columns, optionally typed as `name:type`, e.g.
+    `id,name:string,age:int`. Reading blocks while max_in_flight batches are
+    pending, failed batches are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        connection_pool,
+        space: str,
+        user: str = "root",
+        password: str = "nebula",
+        batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+        concurrency: int = DEFAULT_IMPORT_CONCURRENCY,
+        max_in_flight: int = None,
+        retries: int = DEFAULT_IMPORT_RETRIES,
+        retry_delay: float = 0.5,
+        vid_type: str = "string",
+        report_interval: float = 1.0,
+        progress=True,
+    ):
+        self._pool = connection_pool
+        self.space = space
+        self._user = user
+        self._password = password
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_in_flight = max_in_flight or 2 * self.concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._format_vid = value_formatter("int" if vid_type == "int" else "string")
+        self.report_interval = report_interval
+        self.progress = progress
+
+    def _execute(self, session, statement: str):
+        result = session.execute(statement)
+        if not result.is_succeeded():
+            raise Exception(result.error_msg())
+
+    def _run_batch(self, sessions, statement: str, rows: int, stats: ImportStats):
+        session = sessions.get()
+        try:
+            delay = self.retry_delay
+            for attempt in range(self.retries + 1):
+                started = time.monotonic()
+                try:
+                    self._execute(session, statement)
+                    stats.record(rows, time.monotonic() - started, attempt)
+                    return
+                except Exception as e:
+                    if attempt == self.retries:
+                        stats.record_failure(rows, e, attempt)
+                        return
+                    time.sleep(delay)
+                    delay *= 2
+        finally:
+            sessions.put(session)
+
+    def _report(self, label: str, stats: ImportStats, final=False):
+        if not self.progress:
+            return
+        s = stats.as_dict()
+        fancy_print(
+            f"Info: {label}: {s['rows']} rows, {s['rows_per_second']:.0f} rows/sec, "
+            f"p99 batch {s['p99_batch_latency_ms']:.1f}ms"
+            + (f", {s['failed_rows']} rows failed" if s["failed_rows"] else "")
+            + (" (done)" if final else ""),
+            color="light_green" if final else "light_blue",
+        )
+
+    def _import(self, label: str, statements) -> dict:
+        stats = ImportStats()
+        sessions = queue.Queue()
+        opened = []
+        try:
+            for _ in range(self.concurrency):
+                session = self._pool.get_session(self._user, self._password)
+                opened.append(session)
+                self._execute(session, f"USE `{self.space}`")
+                sessions.put(session)
+
+            in_flight = threading.BoundedSemaphore(self.max_in_flight)
+            last_report = time.monotonic()
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for statement, rows in statements:
+                    # backpressure, stop reading while too many batches pending
+                    in_flight.acquire()
+                    future = executor.submit(
+                        self._run_batch, sessions, statement, rows, stats
+                    )
+                    future.add_done_callback(lambda _: in_flight.release())
+                    if time.monotonic() - last_report >= self.report_interval:
+                        self._report(label, stats)
+                        last_report = time.monotonic()
+        finally:
+            for session in opened:
+                session.release()
+
+        self._report(label, stats, final=True)
+        result = stats.as_dict()
+        if stats.errors:
+            result["errors"] = stats.errors[:10]
+        return result
+
+    def _statements(self, path, delimiter, key_columns, build):
+        chunks = read_chunks(path, self.batch_size, delimiter)
+        names, types = parse_header(next(chunks))
+        prop_indexes = [i for i in range(len(names)) if i not in key_columns]
+        prop_names = ", ".join(f"`{names[i]}`" for i in prop_indexes)
+        formatters = [value_formatter(types[i]) for i in prop_indexes]
+        for chunk in chunks:
+            # columnar formatting, one formatter call per column per chunk
+            columns = list(zip(*chunk))
+            props = [
+                list(map(formatter, columns[i]))
+                for formatter, i in zip(formatters, prop_indexes)
+            ]
+            props_rows = zip(*props) if props else ([] for _ in chunk)
+            yield build(prop_names, columns, props_rows), len(chunk)
+
+    @staticmethod
+    def _column_index(names, field, default):
+        if field is None:
+            return default
+        if field not in names:
+            raise ValueError(f"column `{field}` not found in header {names}")
+        return names.index(field)
+
+    def import_vertices(
+        self, path: str, tag: str, vid_field: str = None, delimiter: str = ","
+    ) -> dict:
+        """
+        Import a vertex CSV file, vid_field names the VID column, by default
+        it's the first one.
+        """
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            names, _ = parse_header(next(csv.reader(file, delimiter=delimiter)))
+        vid_index = self._column_index(names, vid_field, 0)
+
+        def build(prop_names, columns, props_rows):
+            vids = map(self._format_vid, columns[vid_index])
+            values = ", ".join(
+                f"{vid}:({', '.join(props)})"
+                for vid, props in zip(vids, props_rows)
+            )
+            return f"INSERT VERTEX `{tag}`({prop_names}) VALUES {values};"
+
+        return self._import(
+            f"vertices {tag}",
+            self._statements(path, delimiter, {vid_index}, build),
+        )
+
+    def import_edges(
+        self,
+        path: str,
+        edge_type: str,
+        src_field: str = None,
+        dst_field: str = None,
+        rank_field: str = None,
+        delimiter: str = ",",
+    ) -> dict:
+        """
+        Import an edge CSV file, src_field and dst_field name the source and
+        destination VID columns, by default they are the first two, and
+        rank_field optionally names the rank column.
+        """
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            names, _ = parse_header(next(csv.reader(file, delimiter=delimiter)))
+        src_index = self._column_index(names, src_field, 0)
+        dst_index = self._column_index(names, dst_field, 1)
+        rank_index = self._column_index(names, rank_field, None)
+        key_columns = {src_index, dst_index}
+        if rank_index is not None:
+            key_columns.add(rank_index)
+
+        def build(prop_names, columns, props_rows):
+            srcs = map(self._format_vid, columns[src_index])
+            dsts = map(self._format_vid, columns[dst_index])
+            if rank_index is None:
+                ranks = ("" for _ in columns[src_index])
+            else:
+                ranks = (f"@{rank.strip()}" for rank in columns[rank_index])
+            values = ", ".join(
+                f"{src}->{dst}{rank}:({', '.join(props)})"
+                for src, dst, rank, props in zip(srcs, dsts, ranks, props_rows)
+            )
+            return f"INSERT EDGE `{edge_type}`({prop_names}) VALUES {values};"
+
+        return self._import(
+            f"edges {edge_type}",
+            self._statements(path, delimiter, key_columns, build),
+        )
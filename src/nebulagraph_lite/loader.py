@@ -0,0 +1,355 @@
+import contextlib
+import gzip
+import queue
+import re
+import time
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from nebulagraph_lite.utils import fancy_print
+
+DEFAULT_BATCH_SIZE = 128
+DEFAULT_CONCURRENCY = 4
+
+INSERT_PATTERN = re.compile(
+    r"^\s*INSERT\s+(?P<kind>VERTEX|EDGE)\s+(?P<schema>.*?)\s+VALUES\s+(?P<values>.*?)\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+USE_PATTERN = re.compile(
+    r"^\s*USE\s+`?(?P<space>[^`;\s]+)`?\s*;?\s*$", re.IGNORECASE
+)
+
+
+CREATE_SPACE_PATTERN = re.compile(r"^\s*CREATE\s+SPACE\b", re.IGNORECASE)
+PARTITION_NUM_PATTERN = re.compile(r"partition_num\s*=\s*\d+", re.IGNORECASE)
+QUOTES = ("'", '"', "`")
+OPEN_BRACKETS = "([{"
+CLOSE_BRACKETS = ")]}"
+COMMENT_PREFIXES = ("#", "--", "//")
+
+
+@contextlib.contextmanager
+def open_ngql(path: str):
+    """
+    Open a plain or gzip compressed .ngql file for streaming, as text lines.
+    """
+    with open(path, "rb") as probe:
+        gzipped = probe.read(2) == b"\x1f\x8b"
+    if gzipped:
+        file = gzip.open(path, "rt", encoding="utf-8")
+    else:
+        file = open(path, "r", encoding="utf-8")
+    with file:
+        yield file
+
+
+def _statement_item(statement: str, partition_num):
+    if partition_num is not None and CREATE_SPACE_PATTERN.match(statement):
+        statement = PARTITION_NUM_PATTERN.sub(
+            f"partition_num={partition_num}", statement
+        )
+    return "statement", statement
+
+
+def _bracket_depth(text: str) -> int:
+    return sum(text.count(c) for c in OPEN_BRACKETS) - sum(
+        text.count(c) for c in CLOSE_BRACKETS
+    )
+
+
+def parse_ngql(lines, partition_num=None):
+    """
+    Turn the lines of an .ngql file into ("statement", text) and
+    ("sleep", seconds) items, lazily, so files of any size stream through in
+    constant memory.
+
+    A statement ends at a `;` outside of quotes. It may span several lines,
+    but a line without `;` ends its statement too, as one statement per line
+    always did, unless it leaves a quote or bracket open, ends with a comma
+    or the next line is indented. `:sleep N` directives and comment lines
+    are only recognized between statements. partition_num, when given,
+    rewrites the partition_num of CREATE SPACE statements.
+    """
+    buffer = []
+    quote, escaped, depth = None, False, 0
+    # the buffered statement is complete, unless the next line continues it
+    open_ended = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if open_ended:
+            open_ended = False
+            if not line.strip() or not line[:1].isspace():
+                statement = "".join(buffer).strip()
+                buffer, depth = [], 0
+                yield _statement_item(statement, partition_num)
+        if not buffer:
+            stripped = line.strip()
+            if not stripped or stripped.startswith(COMMENT_PREFIXES):
+                continue
+            if stripped.startswith(":"):
+                if stripped.startswith(":sleep"):
+                    yield "sleep", int(stripped.split()[1])
+                continue
+        if quote is None and not any(q in line for q in QUOTES):
+            # fast path, every `;` ends a statement
+            *statements, rest = line.split(";")
+            for part in statements:
+                statement = ("".join(buffer) + part).strip()
+                buffer = []
+                if statement:
+                    yield _statement_item(statement + ";", partition_num)
+            depth = _bracket_depth(rest) + (0 if statements else depth)
+        else:
+            start = 0
+            for i, char in enumerate(line):
+                if escaped:
+                    escaped = False
+                elif quote is not None:
+                    if char == "\\":
+                        escaped = True
+                    elif char == quote:
+                        quote = None
+                elif char in QUOTES:
+                    quote = char
+                elif char in OPEN_BRACKETS:
+                    depth += 1
+                elif char in CLOSE_BRACKETS:
+                    depth -= 1
+                elif char == ";":
+                    statement = ("".join(buffer) + line[start : i + 1]).strip()
+                    buffer, depth = [], 0
+                    start = i + 1
+                    if statement != ";":
+                        yield _statement_item(statement, partition_num)
+            rest = line[start:]
+        if buffer or rest.strip():
+            buffer.append(rest + "\n")
+            open_ended = (
+                quote is None and depth <= 0 and not rest.rstrip().endswith(",")
+            )
+    statement = "".join(buffer).strip()
+    if statement:
+        yield _statement_item(statement, partition_num)
+
+
+def count_rows(values: str) -> int:
+    """
+    Count the rows of an INSERT's VALUES clause, that is the commas outside
+    of quotes and parentheses, plus one.
+    """
+    rows, depth, quote, escaped = 1, 0, None, False
+    for char in values:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            rows += 1
+    return rows
+
+
+class InsertBatch:
+    """
+    Consecutive INSERT statements for the same tag or edge type, merged into
+    one multi-row statement.
+    """
+
+    def __init__(self, kind: str, schema: str):
+        self.kind = kind
+        self.schema = schema
+        self.values = []
+        self.rows = 0
+
+    @property
+    def key(self):
+        return self.kind, self.schema
+
+    def add(self, values: str, rows: int):
+        self.values.append(values)
+        self.rows += rows
+
+    @property
+    def statement(self) -> str:
+        return f"INSERT {self.kind} {self.schema} VALUES {', '.join(self.values)};"
+
+
+def batch_statements(items, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Merge consecutive INSERT VERTEX/EDGE statements of the same schema from
+    parse_ngql() items into InsertBatch items of up to batch_size rows,
+    other statements and sleeps are passed through as they are.
+    """
+    batch = None
+    for kind, item in items:
+        match = INSERT_PATTERN.match(item) if kind == "statement" else None
+        if match is None:
+            if batch is not None:
+                yield "batch", batch
+                batch = None
+            yield kind, item
+            continue
+        key = (
+            match.group("kind").upper(),
+            " ".join(match.group("schema").split()),
+        )
+        values = match.group("values")
+        rows = count_rows(values)
+        if batch is not None and (
+            batch.key != key or batch.rows + rows > batch_size
+        ):
+            yield "batch", batch
+            batch = None
+        if batch is None:
+            batch = InsertBatch(*key)
+        batch.add(values, rows)
+    if batch is not None:
+        yield "batch", batch
+
+
+class NgqlLoader:
+    """
+    Execute nGQL statements with INSERTs merged into multi-row batches that
+    are spread over several sessions.
+
+    Any other statement, such as USE or CREATE, and any :sleep, acts as a
+    barrier: all in-flight batches finish before it runs, so the schema a
+    batch depends on always exists.
+    """
+
+    def __init__(
+        self,
+        connection_pool,
+        user: str = "root",
+        password: str = "nebula",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        profiler=None,
+        debug=False,
+    ):
+        self._pool = connection_pool
+        self._user = user
+        self._password = password
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self._profiler = profiler
+        self._debug = debug
+
+    def _phase(self, name: str):
+        if self._profiler is None:
+            return contextlib.nullcontext({})
+        return self._profiler.phase(name, category="load")
+
+    @staticmethod
+    def _execute(session, statement: str):
+        result = session.execute(statement)
+        if not result.is_succeeded():
+            raise Exception(
+                f"Failed to execute `{statement[:200]}`: {result.error_msg()}"
+            )
+        return result
+
+    def _run_batch(self, sessions, batch: InsertBatch, space):
+        # every worker session tracks its own space, [session, current_space]
+        slot = sessions.get()
+        try:
+            if space is not None and slot[1] != space:
+                self._execute(slot[0], f"USE `{space}`")
+                slot[1] = space
+            self._execute(slot[0], batch.statement)
+        finally:
+            sessions.put(slot)
+        return batch.rows
+
+    def load(self, items) -> dict:
+        """
+        Load parse_ngql() items, returns the load statistics.
+
+        The profiler, if any, gets a single "load" phase with the counts,
+        not one per batch, so it stays small however large the file is.
+        """
+        stats = {"statements": 0, "batches": 0, "rows": 0, "sleep_seconds": 0.0}
+        with self._phase("load") as counters:
+            try:
+                self._load(items, stats)
+            finally:
+                counters.update(stats)
+        return stats
+
+    def _load(self, items, stats: dict):
+        started = time.monotonic()
+        main_session = self._pool.get_session(self._user, self._password)
+        workers = [
+            self._pool.get_session(self._user, self._password)
+            for _ in range(self.concurrency)
+        ]
+        sessions = queue.Queue()
+        for session in workers:
+            sessions.put([session, None])
+        space = None
+        pending = set()
+
+        def _drain(block_until=0):
+            nonlocal pending
+            while len(pending) > block_until:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats["rows"] += future.result()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                try:
+                    for kind, item in batch_statements(items, self.batch_size):
+                        if kind == "batch":
+                            # keep a bounded number of batches in flight
+                            _drain(block_until=2 * self.concurrency - 1)
+                            pending.add(
+                                executor.submit(
+                                    self._run_batch,
+                                    sessions,
+                                    item,
+                                    space,
+                                )
+                            )
+                            stats["batches"] += 1
+                            continue
+                        _drain()
+                        if kind == "sleep":
+                            time.sleep(item)
+                            stats["sleep_seconds"] += item
+                            continue
+                        self._execute(main_session, item)
+                        stats["statements"] += 1
+                        match = USE_PATTERN.match(item)
+                        if match:
+                            space = match.group("space")
+                    _drain()
+                except BaseException:
+                    for future in pending:
+                        future.cancel()
+                    raise
+        finally:
+            for session in [main_session] + workers:
+                session.release()
+
+        stats["seconds"] = time.monotonic() - started
+        # :sleep directives are not load time
+        busy_seconds = stats["seconds"] - stats["sleep_seconds"]
+        stats["rows_per_second"] = (
+            stats["rows"] / busy_seconds if busy_seconds > 0 else 0.0
+        )
+        if self._debug:
+            fancy_print(
+                f"Info: [DEBUG] loaded {stats['rows']} rows in {stats['batches']} "
+                f"batches and {stats['statements']} other statements, "
+                f"{stats['rows_per_second']:.0f} rows/sec",
+                color="blue",
+            )
@@ -0,0 +1,154 @@
+import os
+import re
+import threading
+
+from collections import deque
+
+DEFAULT_LOG_LINES = 20
+DEFAULT_FOLLOW_INTERVAL = 0.5
+# bytes read from a file per poll, the rest is read by the next ones
+MAX_READ = 1 << 20
+# bytes from the start of a file remembered to notice it was rewritten
+HEAD_SIZE = 64
+
+# glog writes every line to the .INFO file and repeats the severe ones in
+# .WARNING, .ERROR and .FATAL, only the former is followed
+_GLOG_DUPLICATE = re.compile(r"\.(WARNING|ERROR|FATAL)(\.|$)")
+
+# lines that mean the service will not come up
+FATAL_PATTERNS = [
+    # glog FATAL lines, e.g. F20240101 12:00:00.000000 or F0101 12:00:00.000000
+    re.compile(r"^F\d{4}(\d{4})? \d{2}:\d{2}:\d{2}"),
+    re.compile(r"\*\*\* (Aborted at|SIG[A-Z]+)"),
+    re.compile(r"Address already in use"),
+    re.compile(r"error while loading shared libraries"),
+    re.compile(r"No space left on device"),
+]
+
+
+def _followed(entry) -> bool:
+    # the glog symlinks point at files that are followed already
+    return (
+        entry.is_file(follow_symlinks=False)
+        and not entry.name.startswith(".")
+        and not _GLOG_DUPLICATE.search(entry.name)
+    )
+
+
+class LogFollower:
+    """
+    Follow the log files of the services incrementally, from the offsets
+    reached by the last poll.
+
+    directories maps a service name to its log directory. Files are tracked
+    by inode, so a glog rotation, which starts a new file, is read from its
+    beginning, a truncated file is read again from its start. With from_end,
+    the files present now are followed from their current end.
+    """
+
+    def __init__(self, directories: dict, from_end=False, patterns=None):
+        self.directories = dict(directories)
+        self.patterns = patterns if patterns is not None else FATAL_PATTERNS
+        # (dev, inode) -> [offset, partial last line, first bytes]
+        self._offsets = {}
+        self._fatal = {name: [] for name in self.directories}
+        self._lock = threading.Lock()
+        if from_end:
+            for name in self.directories:
+                for entry in self._files(name):
+                    st = entry.stat()
+                    self._offsets[(st.st_dev, st.st_ino)] = [
+                        st.st_size,
+                        b"",
+                        self._head(entry.path, st.st_size),
+                    ]
+
+    def _files(self, name: str) -> list:
+        try:
+            entries = [
+                e for e in os.scandir(self.directories[name]) if _followed(e)
+            ]
+            return sorted(entries, key=lambda e: (e.stat().st_mtime, e.name))
+        except OSError:
+            # a file removed while listing, it's picked up by the next poll
+            return []
+
+    @staticmethod
+    def _head(path: str, size: int) -> bytes:
+        try:
+            with open(path, "rb") as f:
+                return f.read(min(size, HEAD_SIZE))
+        except OSError:
+            return b""
+
+    def _read(self, entry) -> list:
+        try:
+            st = entry.stat()
+            key = (st.st_dev, st.st_ino)
+            state = self._offsets.setdefault(key, [0, b"", b""])
+            if st.st_size == state[0]:
+                return []
+            with open(entry.path, "rb") as f:
+                if st.st_size < state[0] or f.read(len(state[2])) != state[2]:
+                    # truncated or rewritten in place
+                    state[0], state[1], state[2] = 0, b"", b""
+                f.seek(state[0])
+                data = f.read(MAX_READ)
+        except OSError:
+            return []
+        if len(state[2]) < HEAD_SIZE and state[0] < HEAD_SIZE:
+            state[2] = (state[2] + data)[:HEAD_SIZE]
+        state[0] += len(data)
+        data = state[1] + data
+        lines = data.split(b"\n")
+        state[1] = lines.pop()
+        return [line.decode(errors="replace").rstrip("\r") for line in lines]
+
+    def poll(self) -> list:
+        """
+        The lines written since the last poll, as (service, line) pairs.
+        """
+        new_lines = []
+        with self._lock:
+            live = set()
+            for name in self.directories:
+                for entry in self._files(name):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    live.add((st.st_dev, st.st_ino))
+                    for line in self._read(entry):
+                        new_lines.append((name, line))
+                        if any(p.search(line) for p in self.patterns):
+                            self._fatal[name].append(line)
+            # forget the files removed since
+            for key in set(self._offsets) - live:
+                del self._offsets[key]
+        return new_lines
+
+    def check(self, name: str = None) -> list:
+        """
+        Poll, then return the fatal lines seen so far of a service, or of all.
+        """
+        self.poll()
+        with self._lock:
+            if name is not None:
+                return list(self._fatal.get(name, []))
+            return [line for lines in self._fatal.values() for line in lines]
+
+    def tail(self, lines: int = DEFAULT_LOG_LINES) -> dict:
+        """
+        The last lines of every service's files, oldest file first.
+        """
+        tails = {}
+        for name in self.directories:
+            last = deque(maxlen=lines)
+            for entry in self._files(name):
+                try:
+                    with open(entry.path, "r", errors="replace") as f:
+                        last.extend(line.rstrip("\n") for line in deque(f, lines))
+                except OSError:
+                    continue
+            tails[name] = list(last)
+        return tails
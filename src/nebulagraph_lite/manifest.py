@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+
+MANIFEST_FILE = "run.json"
+# process start times are compared to this precision, /proc has clock ticks
+START_TIME_TOLERANCE = 0.05
+
+# health of a service, see RunManifest.service_health
+UP = "up"
+NOT_LISTENING = "not listening"
+DOWN = "down"
+PORT_TAKEN = "port taken by another process"
+
+
+def process_started_at(pid):
+    """
+    The start time of a process, in seconds since the epoch, or None when it
+    does not exist.
+    """
+    import psutil
+
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+
+def is_same_process(pid, started_at) -> bool:
+    """
+    Whether pid is still the process that started at started_at, and not
+    another one that reused its pid.
+    """
+    if not pid or started_at is None:
+        return False
+    current = process_started_at(pid)
+    return current is not None and abs(current - started_at) <= START_TIME_TOLERANCE
+
+
+class RunManifest:
+    """
+    The run state start() leaves at {base_path}/run.json: the PIDs and start
+    times of every service process, its ports, container and execmode, and
+    the startup timings.
+
+    status(), stop() and shutdown() read it instead of listing containers,
+    processes or sockets, and validate every record against the live
+    process, as its PID may have been reused since.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, manifest: dict):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def live_pids(record: dict) -> list:
+        """
+        The processes of a service record that are still the recorded ones.
+        """
+        return [
+            pid
+            for pid, started_at in (
+                (record.get("pid"), record.get("pid_started_at")),
+                (record.get("service_pid"), record.get("service_pid_started_at")),
+            )
+            if is_same_process(pid, started_at)
+        ]
+
+    @classmethod
+    def service_health(cls, record: dict) -> dict:
+        """
+        The health of one service record: up, not listening, down, or its
+        port taken by another process.
+        """
+        from nebulagraph_lite.ports import is_port_listening
+
+        alive = cls.live_pids(record)
+        listening = is_port_listening(record["port"], record["host"], timeout=0.2)
+        if alive:
+            health = UP if listening else NOT_LISTENING
+        else:
+            health = PORT_TAKEN if listening else DOWN
+        return {
+            "health": health,
+            "pids": alive,
+            "port": record["port"],
+            "ws_http_port": record.get("ws_http_port"),
+            "container": record.get("container"),
+        }
@@ -0,0 +1,211 @@
+import json
+import math
+import re
+import threading
+import time
+
+from collections import deque
+
+from nebulagraph_lite.utils import http_get
+
+DEFAULT_SCRAPE_INTERVAL = 5.0
+# an hour of samples at the default interval
+DEFAULT_RING_SIZE = 720
+DEFAULT_SCRAPE_TIMEOUT = 1.0
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_INVALID_METRIC_CHARS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def parse_stats(text: str) -> dict:
+    """
+    Parse the `name=value` lines of a service's /stats endpoint, e.g.
+    `num_queries.rate.60=12`, values that are not numbers are skipped.
+    """
+    stats = {}
+    for line in text.splitlines():
+        name, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        try:
+            stats[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return stats
+
+
+def scrape(host: str, ws_http_port: int, timeout=DEFAULT_SCRAPE_TIMEOUT) -> dict:
+    """
+    One sample of a service, its /stats and whether /status reports running,
+    up is 0 when the service did not answer.
+    """
+    base_url = f"http://{host}:{ws_http_port}"
+    try:
+        status = json.loads(http_get(f"{base_url}/status", timeout).decode())
+        stats = parse_stats(http_get(f"{base_url}/stats", timeout).decode())
+    except (OSError, ValueError):
+        return {"up": 0.0}
+    running = isinstance(status, dict) and status.get("status") == "running"
+    stats["up"] = 1.0 if running else 0.0
+    return stats
+
+
+def prometheus_name(name: str) -> str:
+    return "nebula_" + _INVALID_METRIC_CHARS.sub("_", name)
+
+
+def prometheus_value(value) -> str:
+    """
+    A sample value in full, integral ones without a fraction, as a counter
+    must not lose digits between scrapes.
+    """
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class MetricsCollector:
+    """
+    Scrape the /stats and /status endpoints of the services on an interval
+    into a ring buffer of the last ring_size samples.
+
+    targets maps a service name to its (host, ws_http_port). Every sample is
+    (timestamp, {service: {metric: value}}), the latest one can be served
+    in Prometheus text format with serve().
+    """
+
+    def __init__(
+        self,
+        targets: dict,
+        interval: float = DEFAULT_SCRAPE_INTERVAL,
+        ring_size: int = DEFAULT_RING_SIZE,
+        timeout: float = DEFAULT_SCRAPE_TIMEOUT,
+    ):
+        self.targets = dict(targets)
+        self.interval = interval
+        self.timeout = timeout
+        self.samples = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def scrape(self):
+        """
+        Take one sample of every service now and keep it.
+        """
+        sample = (
+            time.time(),
+            {
+                service: scrape(host, port, self.timeout)
+                for service, (host, port) in self.targets.items()
+            },
+        )
+        with self._lock:
+            self.samples.append(sample)
+        return sample
+
+    def latest(self):
+        with self._lock:
+            return self.samples[-1] if self.samples else None
+
+    @property
+    def ring_size(self) -> int:
+        return self.samples.maxlen
+
+    @property
+    def server_address(self):
+        """
+        The (host, port) serve() listens on, None when not serving.
+        """
+        return self._server.server_address if self._server is not None else None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="nebulagraph-metrics", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.scrape()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + self.timeout * 2)
+            self._thread = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def prometheus_text(self) -> str:
+        """
+        The latest sample in Prometheus text exposition format, one metric
+        family per stat with the service as a label.
+        """
+        sample = self.latest()
+        if sample is None:
+            return ""
+        timestamp, values = sample
+        families = {}
+        for service, stats in values.items():
+            for metric, value in stats.items():
+                families.setdefault(prometheus_name(metric), []).append(
+                    (service, value)
+                )
+        lines = []
+        for name in sorted(families):
+            lines.append(f"# TYPE {name} gauge")
+            for service, value in families[name]:
+                lines.append(
+                    f'{name}{{service="{service}"}} {prometheus_value(value)} {int(timestamp * 1000)}'
+                )
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """
+        Serve the latest sample at http://host:port/metrics, in a thread.
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        collector = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = collector.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(
+            target=self._server.serve_forever,
+            name="nebulagraph-metrics-exporter",
+            daemon=True,
+        ).start()
+        return self._server.server_address
@@ -1,30 +1,103 @@
 import os
+import contextlib
+import functools
+import hashlib
+import importlib.util
 import json
+import shlex
 import shutil
-import socket
 import subprocess
+import sys
+import threading
 import time
 
-from urllib.request import urlretrieve
-
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from nebulagraph_lite.balancer import ROUND_ROBIN, BalancedConnectionPool
+from nebulagraph_lite.bundle import BundleLoader
+from nebulagraph_lite.cache import BootstrapState, ContainerCache
+from nebulagraph_lite.dataset import DatasetCache
+from nebulagraph_lite.importer import (
+    DEFAULT_IMPORT_BATCH_SIZE,
+    DEFAULT_IMPORT_CONCURRENCY,
+    DEFAULT_IMPORT_RETRIES,
+    CsvImporter,
+)
+from nebulagraph_lite.bench import (
+    DEFAULT_BENCH_CONCURRENCY,
+    DEFAULT_BENCH_ITERATIONS,
+    DEFAULT_BENCH_WARMUP,
+    DEFAULT_REGRESSION_THRESHOLD,
+    Benchmark,
+    compare,
+    load_workload,
+    print_report,
+)
+from nebulagraph_lite.manifest import (
+    DOWN,
+    MANIFEST_FILE,
+    UP,
+    RunManifest,
+    process_started_at,
+)
+from nebulagraph_lite.logs import (
+    DEFAULT_FOLLOW_INTERVAL,
+    DEFAULT_LOG_LINES,
+    LogFollower,
+)
+from nebulagraph_lite.metrics import (
+    DEFAULT_RING_SIZE,
+    DEFAULT_SCRAPE_INTERVAL,
+    MetricsCollector,
+)
+from nebulagraph_lite.loader import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    NgqlLoader,
+    open_ngql,
+    parse_ngql,
+)
+from nebulagraph_lite.ports import (
+    get_pid_by_port,
+    is_port_listening,
+    wait_for_ports,
+)
+from nebulagraph_lite.profiler import PhaseProfiler
+from nebulagraph_lite.supervisor import LOG_TAIL_LINES, Supervisor
+from nebulagraph_lite.tuning import (
+    DEFAULT_TUNING_FILE,
+    TUNING_PROFILES,
+    format_flags,
+    load_overrides,
+    service_flags,
+)
+from nebulagraph_lite.udocker_backend import udocker_backend
 from nebulagraph_lite.utils import (
     retry,
     fancy_print,
     fancy_dict_print,
     BANNER_ASCII,
-    get_pid_by_port,
-    kill_process_by_pid,
-    process_listening_on_port,
+    terminate_processes,
+    KILL_WAIT,
+    is_service_running,
+    wait_until,
 )
 
-from nebula3.gclient.net import ConnectionPool
-from nebula3.Config import Config
-
 LOCALHOST_V4 = "127.0.0.1"
 DEFAULT_GRAPHD_PORT = 9669
+GRAPHD_WS_HTTP_PORT = 19669
+METAD_PORT = 9559
+METAD_WS_HTTP_PORT = 19559
+STORAGED_PORT = 9779
+STORAGED_WS_HTTP_PORT = 19779
+# storaged i listens on STORAGED_PORT + i * STORAGED_PORT_STEP, the step
+# leaves room for the admin (port - 1) and raft (port + 1) ports
+STORAGED_PORT_STEP = 10
 BASE_PATH = os.path.expanduser("~/.nebulagraph/lite")
 COLAB_BASE_PATH = "/content/.nebulagraph/lite"
 MODELSCOPE_BASE_PATH = "/mnt/workspace/.nebulagraph/lite"
+# their containers keep the plain nebula-{service} names
+STOCK_BASE_PATHS = (BASE_PATH, COLAB_BASE_PATH, MODELSCOPE_BASE_PATH)
 
 # Data set
 BASKETBALLPLAYER_DATASET_URL = "https://raw.githubusercontent.com/vesoft-inc/nebula-console/master/data/basketballplayer.ngql"
@@ -46,6 +119,140 @@ UDOCKER_TARBALL_FILENAME = f"udocker-englib-{UDOCKER_VERSION}.tar.gz"
 MODELSCOPE_UDOCKER_TARBALL_FILE_PATH = f"releases/3.6.0/{UDOCKER_VERSION}.tar.gz"
 MODELSCOPE_UDOCKER_VERSION = "master"
 
+# Startup deadlines in seconds, the total one bounds all phases of start()
+DEFAULT_STARTUP_TIMEOUT = 600
+METAD_READY_TIMEOUT = 60
+GRAPHD_READY_TIMEOUT = 90
+STORAGED_READY_TIMEOUT = 60
+STORAGED_ONLINE_TIMEOUT = 60
+# Seconds a service that logged a fatal line has to exit, see _check_services
+FATAL_EXIT_TIMEOUT = 1
+
+# Seconds a service has to exit after SIGTERM before it is killed, storaged
+# may need to flush its memtables
+DEFAULT_STOP_GRACE = {"graphd": 10, "storaged": 30, "metad": 10}
+SERVICE_STOP_ORDER = ("graphd", "storaged", "metad")
+
+# Threads used to pull, create and setup the service containers concurrently
+STARTUP_WORKERS = 8
+
+# graphd i listens on port + i and GRAPHD_WS_HTTP_PORT + i
+DEFAULT_GRAPHD = 1
+
+# The shared connection pool, per graphd, idle time and health check interval in seconds
+DEFAULT_POOL_SIZE = 16
+DEFAULT_POOL_IDLE_TIME = 600
+DEFAULT_POOL_HEALTH_CHECK_INTERVAL = 30
+DEFAULT_USER = "root"
+DEFAULT_PASSWORD = "nebula"
+# nebula3 ErrorCode values after which a session is not reused: E_DISCONNECTED,
+# E_FAIL_TO_CONNECT, E_RPC_FAILURE, E_SESSION_INVALID, E_SESSION_TIMEOUT and
+# E_SESSION_NOT_FOUND
+SESSION_ERROR_CODES = frozenset({-1, -2, -3, -1002, -1003, -2069})
+
+
+class _StartupScheduler:
+    """
+    Run the startup steps on a thread pool, every step starts as soon as the
+    steps it depends on are done, and a failed step fails all steps after it.
+
+    Steps must be added after their dependencies, so that even with a single
+    worker no step waits on one that has not been picked up yet.
+    """
+
+    def __init__(
+        self, max_workers: int = STARTUP_WORKERS, debug=False, cancelled=None
+    ):
+        self._max_workers = max_workers
+        self._debug = debug
+        # once set, the steps not started yet are skipped
+        self._cancelled = cancelled
+        self._steps = {}
+        self.futures = {}
+
+    def add(self, name: str, func, *args, deps=(), **kwargs):
+        for dep in deps:
+            if dep not in self._steps:
+                raise ValueError(f"step `{name}` depends on unknown step `{dep}`")
+        self._steps[name] = (functools.partial(func, *args, **kwargs), tuple(deps))
+
+    def _run_step(self, name: str, func, deps):
+        for dep in deps:
+            try:
+                self.futures[dep].result()
+            except Exception:
+                raise _SkippedStep(f"`{name}` skipped, `{dep}` failed")
+        if self._cancelled is not None and self._cancelled.is_set():
+            raise StartupCancelled(f"`{name}` skipped, startup cancelled")
+        started = time.monotonic()
+        result = func()
+        if self._debug:
+            fancy_print(
+                f"Info: [DEBUG] step `{name}` done in "
+                f"{time.monotonic() - started:.1f}s",
+                color="blue",
+            )
+        return result
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for name, (func, deps) in self._steps.items():
+                self.futures[name] = executor.submit(
+                    self._run_step, name, func, deps
+                )
+            wait(self.futures.values())
+
+        failures = {
+            name: future.exception()
+            for name, future in self.futures.items()
+            if future.exception() is not None
+            and not isinstance(future.exception(), _SkippedStep)
+        }
+        if failures and self._cancelled is not None and self._cancelled.is_set():
+            # the steps cancel() cut short fail with their own errors
+            name, error = next(iter(failures.items()))
+            raise StartupCancelled(
+                f"nebulagraph_lite startup cancelled, at `{name}`"
+            ) from error
+        if failures:
+            fancy_dict_print(
+                {
+                    "message": "nebulagraph_lite startup failed",
+                    "failed steps": {
+                        name: str(error) for name, error in failures.items()
+                    },
+                }
+            )
+            name, error = next(iter(failures.items()))
+            raise Exception(f"startup step `{name}` failed: {error}") from error
+
+
+class _PooledSession:
+    """
+    A session of the shared pool that remembers whether its last result was
+    a session or connection error, when it must not be reused.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self.broken = False
+
+    def execute(self, stmt, *args, **kwargs):
+        result = self._session.execute(stmt, *args, **kwargs)
+        self.broken = result.error_code() in SESSION_ERROR_CODES
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class _SkippedStep(Exception):
+    pass
+
+
+class StartupCancelled(Exception):
+    pass
+
 
 class NebulaGraphLet:
     def __init__(
@@ -57,20 +264,92 @@ class NebulaGraphLet:
         clean_up=False,
         in_container=False,
         modelscope=False,
+        startup_timeout=DEFAULT_STARTUP_TIMEOUT,
+        dataset_source=None,
+        pool_size=DEFAULT_POOL_SIZE,
+        pool_idle_time=DEFAULT_POOL_IDLE_TIME,
+        pool_health_check_interval=DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+        storaged=1,
+        partition_num=None,
+        graphd=DEFAULT_GRAPHD,
+        balance=ROUND_ROBIN,
+        tuning_profile=None,
+        tuning_file=None,
+        restart_on_crash=False,
+        stop_grace=None,
     ):
         self._debug = debug if debug is not None else False
 
+        self.startup_timeout = (
+            startup_timeout
+            if startup_timeout is not None
+            else DEFAULT_STARTUP_TIMEOUT
+        )
+        # only set while start() is running
+        self._startup_deadline = None
+        # follows the service logs for fatal lines, only while start() runs
+        self._startup_logs = None
+        # set by cancel(), start() gives up at its next step or wait
+        self._cancelled = threading.Event()
+        # a function of (port, ws_http_port) telling whether a service is
+        # ready, in place of the blocking probes, see AsyncNebulaGraphLet
+        self.readiness_probe = None
+        self.profiler = PhaseProfiler()
+        # owns the service processes, a crash during start() aborts it, after
+        # it restart_on_crash restarts crashed services with a backoff
+        self.restart_on_crash = bool(restart_on_crash)
+        self.supervisor = Supervisor(debug=self._debug)
+        # seconds, or a dict of seconds per service, see DEFAULT_STOP_GRACE
+        self.stop_grace = (
+            stop_grace if stop_grace is not None else dict(DEFAULT_STOP_GRACE)
+        )
+
         self.host = host if host is not None else LOCALHOST_V4
         self.port = port if port is not None else DEFAULT_GRAPHD_PORT
 
+        self.graphd = max(1, graphd if graphd is not None else DEFAULT_GRAPHD)
+        # how sessions are spread over the graphd frontends
+        self.balance = balance if balance is not None else ROUND_ROBIN
+        self.storaged = max(1, storaged if storaged is not None else 1)
+
+        # launch flags derived from the host's memory and CPUs, None keeps
+        # the services' own defaults, the tuning file overrides either
+        if tuning_profile is not None and tuning_profile not in TUNING_PROFILES:
+            raise Exception(
+                f"Unknown tuning profile {tuning_profile}, expected one of {TUNING_PROFILES}"
+            )
+        self.tuning_profile = tuning_profile
+        self.tuning_file = tuning_file
+        self._tuning_overrides = None
+        # None keeps the dataset's own partition_num, unless a single storaged
+        # serves it, then 1 partition is enough
+        self.partition_num = partition_num
+
+        # created on first use by connection_pool, closed by stop()/shutdown()
+        self.pool_size = pool_size if pool_size is not None else DEFAULT_POOL_SIZE
+        self.pool_idle_time = (
+            pool_idle_time if pool_idle_time is not None else DEFAULT_POOL_IDLE_TIME
+        )
+        self.pool_health_check_interval = (
+            pool_health_check_interval
+            if pool_health_check_interval is not None
+            else DEFAULT_POOL_HEALTH_CHECK_INTERVAL
+        )
+        self._connection_pool = None
+        self._idle_sessions = []
+        # started by metrics()
+        self._metrics = None
+        self._pool_lock = threading.Lock()
+
+        # IPython can only be running here if it was imported already
         self.on_ipython = False
-        try:
-            from IPython import get_ipython
+        if "IPython" in sys.modules:
+            try:
+                from IPython import get_ipython
 
-            ipython = get_ipython()
-            self.on_ipython = bool(ipython)
-        except:
-            pass
+                self.on_ipython = bool(get_ipython())
+            except Exception:
+                pass
 
         self.base_path = base_path if base_path is not None else BASE_PATH
         self.on_colab = self._is_running_on_colab()
@@ -86,35 +365,44 @@ class NebulaGraphLet:
             if not os.path.exists("/mnt/workspace/"):
                 self.base_path = BASE_PATH
 
+        # instances with base paths of their own get containers of their
+        # own, so that they can run side by side on distinct hosts
+        self._container_namespace = None
+        if os.path.abspath(self.base_path) not in STOCK_BASE_PATHS:
+            self._container_namespace = hashlib.sha1(
+                os.path.abspath(self.base_path).encode()
+            ).hexdigest()[:8]
+
         if clean_up:
             self.clean_up()
 
-        if self.on_ipython:
-            _path = get_ipython().getoutput("which udocker")
-            assert (
-                _path
-            ), "udocker's path cannot be determined, please specify its base path manually"
-            self._python_bin_path = os.path.dirname(_path[0])
-        else:
-            self._python_bin_path = os.path.dirname(os.sys.executable)
-            result = subprocess.run(
-                f"{self._python_bin_path}/udocker --allow-root --help",
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-            if result.returncode != 0:
-                _path = subprocess.getoutput("which udocker")
-                if _path:
-                    self._python_bin_path = os.path.dirname(_path)
-                else:
-                    raise Exception(
-                        "udocker not found. Please install or link it manually to your PATH."
-                    )
-
         self.in_container = in_container if in_container is not None else False
 
-        self.create_nebulagraph_lite_folders()
+        # udocker is located, the Colab user set up and the folders created
+        # on first need, so that stop() or status() don't pay for them
+        self._udocker_backend = None
+        self._colab_ready = False
+        self._folders_ready = False
+        self._setup_lock = threading.Lock()
+
+        self._container_cache = ContainerCache(
+            os.path.join(self.base_path, "cache", "containers.json")
+        )
+        self._container_fingerprints = {}
+        self._warm_containers = set()
+        self._udocker_version = None
+        # what start() left running, read by status(), stop() and shutdown()
+        self._manifest = RunManifest(os.path.join(self.base_path, MANIFEST_FILE))
+        self._container_ids = {}
+        self._execmodes = {}
+        # where udocker is and whether it's installed, across instances
+        self._bootstrap = BootstrapState(
+            os.path.join(self.base_path, "cache", "bootstrap.json")
+        )
+
+        # tried before the default URLs, a URL, file:// URL, file or directory
+        self.dataset_source = dataset_source
+        self._dataset_cache = DatasetCache(os.path.join(self.base_path, "data_set"))
 
         # self._container_image_prefix = (
         #     ""
@@ -124,19 +412,93 @@ class NebulaGraphLet:
         # There is no reliable docker registry mirror in China, so we use ModelScope's model registry instead
         self._container_image_prefix = ""
 
-        # Try download docker image from ModelScope
+        # downloaded from ModelScope by the first start()
         self.modelscope_file = None
-        if self.on_modelscope:
-            self.modelscope_file = self._try_download_modelscope()
 
     def _is_on_modelscope(self):
+        if not self.on_ipython:
+            return False
         try:
-            from modelscope.hub.file_download import model_file_download
-        except Exception:
+            return importlib.util.find_spec("modelscope") is not None
+        except (ImportError, ValueError):
             return False
+
+    def _udocker_path(self) -> str:
+        """
+        The directory of the udocker executable, as found last time while it
+        is still there.
+        """
+        cached = self._bootstrap.get("udocker_path")
+        if cached and os.access(os.path.join(cached, "udocker"), os.X_OK):
+            return cached
+        path = self._find_udocker_path()
+        self._bootstrap.put("udocker_path", path)
+        return path
+
+    def _find_udocker_path(self) -> str:
         if self.on_ipython:
-            return True
-        return False
+            _path = shutil.which("udocker")
+            assert (
+                _path
+            ), "udocker's path cannot be determined, please specify its base path manually"
+            return os.path.dirname(_path)
+        python_bin_path = os.path.dirname(sys.executable)
+        if os.access(os.path.join(python_bin_path, "udocker"), os.X_OK):
+            return python_bin_path
+        _path = shutil.which("udocker")
+        if _path:
+            return os.path.dirname(_path)
+        raise Exception(
+            "udocker not found. Please install or link it manually to your PATH."
+        )
+
+    @property
+    def _udocker(self):
+        # on colab udocker runs as another user via IPython, see _run_udocker_on_colab
+        if self.on_colab:
+            return None
+        with self._setup_lock:
+            if self._udocker_backend is None:
+                self._udocker_backend = udocker_backend(
+                    os.path.join(self._udocker_path(), "udocker"),
+                    allow_root=self.in_container
+                    or self.on_ipython
+                    or self.on_modelscope,
+                )
+            return self._udocker_backend
+
+    def _prepare(self):
+        """
+        Set up what running the services needs, once: udocker and its user
+        on Colab, and the data and log folders.
+        """
+        self._prepare_colab()
+        with self._setup_lock:
+            if not self._folders_ready:
+                self.create_nebulagraph_lite_folders()
+                self._folders_ready = True
+
+    def _prepare_colab(self):
+        if not self.on_colab:
+            return
+        with self._setup_lock:
+            if self._colab_ready:
+                return
+            if (
+                self._bootstrap.get("colab_bootstrap")
+                and shutil.which("udocker")
+                and os.path.isdir(os.path.expanduser("~user"))
+            ):
+                self._colab_ready = True
+                return
+            from IPython import get_ipython
+
+            # Thanks to https://github.com/drengskapur/docker-in-colab by drengskapur
+            get_ipython().system("pip install udocker > /dev/null")
+            get_ipython().system("udocker --allow-root install > /dev/null")
+            get_ipython().system("useradd -m user > /dev/null")
+            self._bootstrap.put("colab_bootstrap", True)
+            self._colab_ready = True
 
     def _try_download_modelscope(self):
         try:
@@ -194,15 +556,13 @@ class NebulaGraphLet:
             return False
 
     def _is_running_on_colab(self):
+        if not self.on_ipython:
+            return False
         try:
             from IPython import get_ipython
 
             if "google.colab" in str(get_ipython()):
                 fancy_print("Info: Detected that we are running on Google Colab!")
-                # Thanks to https://github.com/drengskapur/docker-in-colab by drengskapur
-                get_ipython().system("pip install udocker > /dev/null")
-                get_ipython().system("udocker --allow-root install > /dev/null")
-                get_ipython().system("useradd -m user > /dev/null")
                 return True
         except Exception as e:
             if self._debug:
@@ -234,13 +594,22 @@ class NebulaGraphLet:
             os.makedirs(os.path.join(self.base_path, "data_set"), exist_ok=True)
             os.makedirs(os.path.join(self.base_path, "data/meta0"), exist_ok=True)
             os.makedirs(os.path.join(self.base_path, "logs/meta0"), exist_ok=True)
-            os.makedirs(
-                os.path.join(self.base_path, "data/storage0"), exist_ok=True
-            )
-            os.makedirs(
-                os.path.join(self.base_path, "logs/storage0"), exist_ok=True
-            )
-            os.makedirs(os.path.join(self.base_path, "logs/graph"), exist_ok=True)
+            for index in range(self.storaged):
+                os.makedirs(
+                    os.path.join(self.base_path, f"data/storage{index}"),
+                    exist_ok=True,
+                )
+                os.makedirs(
+                    os.path.join(self.base_path, f"logs/storage{index}"),
+                    exist_ok=True,
+                )
+            for index in range(self.graphd):
+                os.makedirs(
+                    os.path.join(
+                        self.base_path, f"logs/{self._graphd_log_dir(index)}"
+                    ),
+                    exist_ok=True,
+                )
 
             if self.on_colab:
                 from IPython import get_ipython
@@ -263,30 +632,39 @@ class NebulaGraphLet:
     def _run_udocker_on_colab(self, command: str):
         from IPython import get_ipython
 
+        self._prepare_colab()
         result = get_ipython().system(f'su - user -c "udocker {command}"')
         return result
 
-    @retry((Exception,), tries=3, delay=5, backoff=3)
-    def _run_udocker(self, command: str, env: str = None):
+    def _udocker_output(self, command: str):
+        """
+        Run a read-only udocker command once, without retries, and return its
+        stdout, or None if it failed.
+        """
+        result = self._udocker.run(shlex.split(command))
+        if result.returncode != 0:
+            return None
+        return result.stdout
+
+    # cancel() ends the backoff of a start(), not of a later stop()
+    @retry(
+        (Exception,),
+        tries=3,
+        delay=5,
+        backoff=3,
+        cancelled=lambda self, *args, **kwargs: (
+            self._cancelled if self._startup_deadline is not None else None
+        ),
+    )
+    def _run_udocker(self, command: str, env: dict = None):
         if self.on_colab:
             return self._run_udocker_on_colab(command)
-        udocker_command_prefix = os.path.join(self._python_bin_path, "udocker")
-        if env:
-            udocker_command_prefix = f"{env} {udocker_command_prefix}"
-        if self.in_container or self.on_ipython or self.on_modelscope:
-            udocker_command_prefix = udocker_command_prefix + " --allow-root"
-        udocker_command = f"{udocker_command_prefix} {command}"
-        result = subprocess.run(
-            udocker_command,
-            shell=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+        result = self._udocker.run(shlex.split(command), env=env)
         output, error = result.stdout, result.stderr
         if result.returncode != 0:
             fancy_dict_print(
                 {
-                    "udocker command": f"udocker {udocker_command}",
+                    "udocker command": shlex.join(result.args),
                     "error": error.decode(),
                 },
             )
@@ -300,141 +678,744 @@ class NebulaGraphLet:
             )
         return result
 
-    def _run_udocker_ps_filter(self, filter: str):
-        self._run_udocker(f"ps | grep {filter}")
+    def _container_name(self, service: str) -> str:
+        if self._container_namespace is None:
+            return f"nebula-{service}"
+        return f"nebula-{self._container_namespace}-{service}"
 
-    def _run_udocker_background_on_colab(self, command: str):
-        from IPython import get_ipython
+    def _udocker_containers(self, *services) -> list:
+        """
+        The containers of this instance for services.
+        """
+        names = {self._container_name(service) for service in services}
+        return [
+            container
+            for container in self._udocker.containers()
+            if names.intersection(container["names"])
+        ]
+
+    @staticmethod
+    def _colab_user_argv(command: str) -> list:
+        """
+        Run command as user, it is parsed once, by the shell of su, so its
+        quoted arguments, e.g. JSON flags, arrive intact.
+        """
+        return ["su", "-", "user", "-c", command]
 
-        if not self._debug:
-            redirect_clause = "> /dev/null 2>&1"
-        else:
-            redirect_clause = ""
-        get_ipython().system(
-            f'nohup su - user -c "udocker {command}" {redirect_clause} &'
+    @classmethod
+    def _colab_udocker_argv(cls, command: str) -> list:
+        return cls._colab_user_argv(f"udocker {command}")
+
+    def _run_udocker_background_on_colab(self, command: str):
+        self._prepare_colab()
+        output = None if self._debug else subprocess.DEVNULL
+        # neither a shell nor IPython expands the command on its way to su
+        subprocess.Popen(
+            self._colab_udocker_argv(command),
+            stdin=subprocess.DEVNULL,
+            stdout=output,
+            stderr=output,
+            start_new_session=True,
         )
 
-    def _run_udocker_background(self, command: str):
+    def _run_udocker_background(
+        self, command: str, service: str = None, log_dir: str = None
+    ):
+        """
+        Run a udocker command in the background, a service is handed to the
+        supervisor, which watches it and keeps its output in log_dir.
+        """
         if self.on_colab:
             self._run_udocker_background_on_colab(command)
             return
 
-        udocker_command_prefix = os.path.join(self._python_bin_path, "udocker")
-        if self.in_container or self.on_ipython:
-            udocker_command_prefix = udocker_command_prefix + " --allow-root"
-        udocker_command = f"{udocker_command_prefix} {command} &"
+        argv = self._udocker.argv(shlex.split(command))
+        if service is not None:
+            self.supervisor.start(service, argv, log_dir=log_dir)
+            return
         subprocess.Popen(
-            udocker_command,
-            shell=True,
+            argv,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
+            start_new_session=True,
         )
 
+    def _udocker_dir(self) -> str:
+        # udocker runs as user on colab
+        home = "~user" if self.on_colab else "~"
+        return os.environ.get("UDOCKER_DIR") or os.path.expanduser(
+            f"{home}/.udocker"
+        )
+
+    def _udocker_install_fingerprint(self):
+        """
+        What an installed udocker depends on, its executable and directory,
+        or None when it's not installed.
+        """
+        udocker_dir = self._udocker_dir()
+        executable = os.path.join(self._udocker_path(), "udocker")
+        try:
+            if not os.path.isdir(os.path.join(udocker_dir, "bin")):
+                return None
+            mtime = os.stat(executable).st_mtime
+        except OSError:
+            return None
+        return {
+            "executable": executable,
+            "mtime": mtime,
+            "udocker_dir": udocker_dir,
+            "modelscope": self.on_modelscope,
+        }
+
     def udocker_init(self):
-        if self.on_modelscope:
-            self._run_udocker(
-                "install",
-                env=f"UDOCKER_TARBALL={self.base_path}/{UDOCKER_TARBALL_FILENAME}",
-            )
-        else:
-            self._run_udocker("install")
+        # udocker install is a no-op on an installed udocker, but a slow one
+        fingerprint = self._udocker_install_fingerprint()
+        if fingerprint is not None and self._bootstrap.get(
+            "udocker_install", fingerprint
+        ):
+            return
+        with self.profiler.phase("udocker install"):
+            if self.on_modelscope:
+                self._run_udocker(
+                    "install",
+                    env={
+                        "UDOCKER_TARBALL": f"{self.base_path}/{UDOCKER_TARBALL_FILENAME}"
+                    },
+                )
+            else:
+                self._run_udocker("install")
+        fingerprint = self._udocker_install_fingerprint()
+        if fingerprint is not None:
+            self._bootstrap.put("udocker_install", True, fingerprint)
 
     def udocker_pull(self, image: str):
-        self._run_udocker(f"pull {image}")
+        with self.profiler.phase(f"pull {image}"):
+            self._run_udocker(f"pull {image}")
 
-    def udocker_pull_backgroud(self, image: str):
-        self._run_udocker_background(f"pull {image}")
-
-    def _try_shoot_service(self, service: str):
+    def _try_shoot_service(self, service: str, keep_container=False):
         try:
-            self._run_udocker(
-                f"ps | grep {service} | awk '{{print $1}}' | xargs -I {{}} udocker --allow-root rm -f {{}}"
-            )
-            # TODO: use psutil to kill the process
-            os.system(f"killall nebula-{service} > /dev/null 2>&1")
+            self._stop_service(service)
+            if not keep_container and self.on_colab:
+                self._run_udocker(
+                    f"ps | grep {self._container_name(service)} | awk '{{print $1}}' | xargs -I {{}} udocker --allow-root rm -f {{}}"
+                )
+            elif not keep_container:
+                container_ids = [c["id"] for c in self._udocker_containers(service)]
+                if container_ids:
+                    self._run_udocker(f"rm -f {' '.join(container_ids)}")
         except Exception as e:
             if self._debug:
                 fancy_print(f"Info: [DEBUG] failed to shoot {service}: {str(e)}")
 
-    def _try_shoot_all_services(self):
-        self._try_shoot_service("graphd")
-        time.sleep(5)
-        self._try_shoot_service("storaged")
-        time.sleep(5)
-        self._try_shoot_service("metad")
+    def _stop_grace(self, service: str, grace=None) -> float:
+        grace = grace if grace is not None else self.stop_grace
+        if isinstance(grace, dict):
+            return grace.get(service, DEFAULT_STOP_GRACE[service])
+        return grace
+
+    def _service_ports(self, service: str) -> list:
+        if service == "metad":
+            return [METAD_PORT]
+        if service == "graphd":
+            return [self._graphd_port(i) for i in range(self.graphd)]
+        return [self._storaged_port(i) for i in range(self.storaged)]
+
+    @staticmethod
+    def _with_children(pids) -> set:
+        import psutil
+
+        found = set()
+        for pid in pids:
+            found.add(pid)
+            try:
+                found.update(
+                    child.pid
+                    for child in psutil.Process(pid).children(recursive=True)
+                )
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return found
+
+    @staticmethod
+    def _processes(pids) -> list:
+        import psutil
+
+        processes = []
+        for pid in set(pids) - {os.getpid()}:
+            try:
+                processes.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                continue
+        return processes
+
+    def _supervised_pids(self, service: str) -> list:
+        return [
+            supervised.pid
+            for name, supervised in self.supervisor.services.items()
+            if name.rstrip("0123456789") == service and supervised.pid
+        ]
+
+    def _service_processes(self, service: str) -> list:
+        """
+        The processes of all instances of service: the supervised ones with
+        their children, the ones listening on its ports and the nebula-{service}
+        binaries, as killall would find them, all bound to host.
+        """
+        import psutil
+
+        pids = self._with_children(self._supervised_pids(service))
+        for port in self._service_ports(service):
+            pid = get_pid_by_port(port, host=self.host)
+            if pid is not None:
+                pids.add(pid)
+        # the binaries of instances bound to other addresses are not ours
+        local_ip = f"--local_ip={self.host}"
+        for process in psutil.process_iter(["name", "cmdline"]):
+            cmdline = process.info["cmdline"]
+            if process.info["name"] == f"nebula-{service}" and (
+                cmdline is None or local_ip in cmdline
+            ):
+                pids.add(process.pid)
+        return self._processes(pids)
+
+    def _recorded_processes(self, service: str, records: dict) -> list:
+        """
+        The processes of service the manifest recorded and that are still the
+        recorded ones, with their children and the supervised ones.
+        """
+        pids = list(self._supervised_pids(service))
+        for record in records.values():
+            if record["service"] == service:
+                pids += RunManifest.live_pids(record)
+        return self._processes(self._with_children(pids))
+
+    def _stop_service(self, service: str, grace=None, records=None):
+        """
+        SIGTERM all instances of service and wait for them to exit, SIGKILL
+        the ones still running after its grace period.
+
+        With the manifest's records, only the recorded processes are looked
+        up, the full process and socket scan runs only if a port of service
+        still listens after them.
+        """
+        ports = set(self._service_ports(service))
+        if records:
+            processes = self._recorded_processes(service, records)
+            ports.update(
+                r["port"] for r in records.values() if r["service"] == service
+            )
+        else:
+            processes = self._service_processes(service)
+        for name in self.supervisor.services:
+            if name.rstrip("0123456789") == service:
+                # stopped on purpose, not a crash
+                self.supervisor.release(name)
+        grace = self._stop_grace(service, grace)
+        with self.profiler.phase(f"stop {service}", category="stop"):
+            killed, denied = terminate_processes(processes, grace)
+            if records and any(
+                is_port_listening(port, self.host, timeout=0.2) for port in ports
+            ):
+                # not started by the recorded start(), look it up
+                more_killed, more_denied = terminate_processes(
+                    self._service_processes(service), grace
+                )
+                killed += more_killed
+                denied += [p for p in more_denied if p not in denied]
+            if denied:
+                denied = self._terminate_as_owner(denied, grace)
+        if killed:
+            fancy_print(
+                f"Warning: {service} did not exit in {grace:g} seconds, killed "
+                f"pid {', '.join(str(p.pid) for p in killed)}",
+                color="yellow",
+            )
+        if denied:
+            fancy_print(
+                f"Warning: not permitted to stop {service}, pid "
+                f"{', '.join(str(p.pid) for p in denied)} still running",
+                color="yellow",
+            )
+        elif not killed and self._debug:
+            fancy_print(f"Info: [DEBUG] {service} stopped")
+
+    def _terminate_as_owner(self, processes, grace: float) -> list:
+        """
+        SIGTERM, and SIGKILL after grace, the processes this one may not
+        signal with kill run as the user udocker runs them as, on Colab.
+        Returns the ones still running.
+        """
+        import psutil
+
+        if not self.on_colab:
+            return processes
+        pids = " ".join(str(process.pid) for process in processes)
+        for signal_name, timeout in (("TERM", grace), ("KILL", KILL_WAIT)):
+            subprocess.run(
+                self._colab_user_argv(f"kill -{signal_name} {pids}"),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            _, processes = psutil.wait_procs(processes, timeout=timeout)
+            if not processes:
+                break
+            pids = " ".join(str(process.pid) for process in processes)
+        return processes
+
+    def _stop_all_services(self, grace=None, records=None):
+        # graphd first, so no new queries come in, metad last, the others
+        # report to it until they exit
+        for service in SERVICE_STOP_ORDER:
+            self._stop_service(service, grace, records)
+
+    def _get_udocker_version(self) -> str:
+        if self._udocker_version is None:
+            fingerprint = self._udocker_install_fingerprint()
+            version = (
+                self._bootstrap.get("udocker_version", fingerprint)
+                if fingerprint is not None
+                else None
+            )
+            if version is None:
+                output = self._udocker_output("version") or b""
+                first_line = output.decode().split("\n")[0]
+                version = first_line.replace("version:", "").strip()
+                if version and fingerprint is not None:
+                    self._bootstrap.put("udocker_version", version, fingerprint)
+            self._udocker_version = version
+        return self._udocker_version
+
+    def _container_fingerprint(self, service: str, execmode: str):
+        """
+        Fingerprint what the prepared nebula-{service} container depends on,
+        or None when it cannot be determined.
+        """
+        if self.on_colab:
+            # udocker runs via IPython as another user, its output is not captured
+            return None
+        image_json = self._udocker_output(
+            f"inspect {self._container_image_prefix}vesoft/nebula-{service}:v3"
+        )
+        image_digest = (
+            ContainerCache.image_digest(image_json) if image_json else None
+        )
+        udocker_version = self._get_udocker_version()
+        if not image_digest or not udocker_version:
+            return None
+        return ContainerCache.fingerprint(image_digest, execmode, udocker_version)
+
+    def _container_exists(self, container: str) -> bool:
+        container_root = self._udocker_output(f"inspect -p {container}")
+        if not container_root or not os.path.isdir(container_root.decode().strip()):
+            return False
+        # {udocker_dir}/containers/{id}/ROOT
+        self._container_ids[container] = os.path.basename(
+            os.path.dirname(container_root.decode().strip())
+        )
+        return True
+
+    def _create_container(self, service: str, shoot=False, execmode="F1"):
+        """
+        Create the container of service, unless the one prepared by a
+        previous start still matches its fingerprint, then creation and the
+        {execmode} setup are both skipped.
+
+        execmode None means no setup will follow. The services are run without
+        --rm, so the prepared container outlives them.
+        """
+        container = self._container_name(service)
+        self._warm_containers.discard(service)
+        self._execmodes[service] = execmode or "P1"
+        with self.profiler.phase(f"fingerprint {service}"):
+            fingerprint = self._container_fingerprint(service, execmode or "P1")
+            cached = self._container_cache.get(container)
+            exists = cached is not None and self._container_exists(container)
+        warm = fingerprint is not None and cached == fingerprint and exists
 
-    def start_metad(self, shoot=False):
         if shoot:
-            self._try_shoot_service("metad")
+            self._try_shoot_service(service, keep_container=warm)
+        if warm:
+            self._warm_containers.add(service)
+            if self._debug:
+                fancy_print(
+                    f"Info: [DEBUG] reusing prepared {container} container, "
+                    "skipping create and setup"
+                )
+            return
+        if exists:
+            # the image, udocker or libc changed since it was prepared
+            self._container_cache.invalidate(container)
+            self._udocker_output(f"rm -f {container}")
 
-        udocker_create_command = f"ps | grep metad || udocker --debug --allow-root create --name=nebula-metad {self._container_image_prefix}vesoft/nebula-metad:v3"
+        udocker_create_command = f"--debug create --name={container} {self._container_image_prefix}vesoft/nebula-{service}:v3"
+        if self.on_colab:
+            udocker_create_command = f"ps | grep {container} || udocker --debug --allow-root create --name={container} {self._container_image_prefix}vesoft/nebula-{service}:v3"
         if self._debug:
             fancy_print(
-                "Info: [DEBUG] creating metad container... with command:"
+                f"Info: [DEBUG] creating {service} container... with command:"
                 f"\nudocker {udocker_create_command}"
             )
-        self._run_udocker(udocker_create_command)
+        with self.profiler.phase(f"create {service}"):
+            if self.on_colab or not self._udocker_containers(service):
+                result = self._run_udocker(udocker_create_command)
+                # udocker prints the new container's id last
+                output = getattr(result, "stdout", None)
+                if output and output.strip():
+                    self._container_ids[container] = (
+                        output.decode().strip().splitlines()[-1].strip()
+                    )
+        self._container_fingerprints[service] = fingerprint
+        if execmode is None:
+            self._record_container(service)
 
+    def _setup_container(self, service: str):
+        if service in self._warm_containers:
+            return
         # fakechroot is used, see #18
         # TODO: leverage F2 in MUSL/Alpine Linux
-        time.sleep(3)
-        udocker_setup_command = "--debug setup --execmode=F1 nebula-metad"
-        self._run_udocker(udocker_setup_command)
+        udocker_setup_command = (
+            f"--debug setup --execmode=F1 {self._container_name(service)}"
+        )
+        with self.profiler.phase(f"setup {service}"):
+            self._run_udocker(udocker_setup_command)
+        self._record_container(service)
 
+    def _record_container(self, service: str):
+        fingerprint = self._container_fingerprints.pop(service, None)
+        if fingerprint is not None:
+            self._container_cache.put(self._container_name(service), fingerprint)
+
+    def start_metad(self, shoot=False):
+        self._prepare()
+        self._create_container("metad", shoot=shoot)
+        self._setup_container("metad")
+        self._run_metad()
+
+    def _tuning_flags(self, service: str, instances: int = 1) -> str:
+        """
+        The tuning flags of one instance of service, with a leading space, or
+        an empty string when there are none.
+        """
+        if self._tuning_overrides is None:
+            path = self.tuning_file or os.path.join(
+                self.base_path, DEFAULT_TUNING_FILE
+            )
+            self._tuning_overrides = (
+                load_overrides(path)
+                if self.tuning_file or os.path.isfile(path)
+                else {}
+            )
+        flags = service_flags(
+            self.tuning_profile,
+            service,
+            instances=instances,
+            overrides=self._tuning_overrides,
+        )
+        if not flags:
+            return ""
+        if self._debug:
+            fancy_dict_print(
+                {f"{service} tuning, profile {self.tuning_profile}": flags},
+                color="blue",
+            )
+        return " " + format_flags(flags)
+
+    def _run_metad(self):
         udocker_command = (
-            f"run --rm --user=root -v "
+            f"run --user=root -v "
             f"{self.base_path}/data/meta0:/data/meta -v "
-            f"{self.base_path}/logs/meta0:/logs nebula-metad "
-            f"--meta_server_addrs={self.host}:9559 --local_ip={self.host} "
-            f"--ws_ip={self.host} --port=9559 --ws_http_port=19559 "
+            f"{self.base_path}/logs/meta0:/logs {self._container_name('metad')} "
+            f"--meta_server_addrs={self.host}:{METAD_PORT} --local_ip={self.host} "
+            f"--ws_ip={self.host} --port={METAD_PORT} "
+            f"--ws_http_port={METAD_WS_HTTP_PORT} "
             f"--data_path=/data/meta --log_dir=/logs --v=0 --minloglevel=0"
-        )
+        ) + self._tuning_flags("metad")
         if self._debug:
             fancy_print(
                 "Info: [DEBUG] starting metad... with command:"
                 f"\nudocker {udocker_command}"
             )
-        self._run_udocker_background(udocker_command)
-        time.sleep(10)
-        if not self.on_colab:
-            process_listening_on_port(9559)
+        with self.profiler.phase("run metad"):
+            self._run_udocker_background(
+                udocker_command,
+                service="metad",
+                log_dir=f"{self.base_path}/logs/meta0",
+            )
+        self._wait_for_service(
+            "metad", METAD_PORT, METAD_WS_HTTP_PORT, METAD_READY_TIMEOUT
+        )
 
     def start_graphd(self):
-        self._try_shoot_service("graphd")
+        self._prepare()
+        self._create_container(
+            "graphd", shoot=True, execmode="F1" if self.on_modelscope else None
+        )
+        if self.on_modelscope:
+            self._setup_container("graphd")
+        for index in range(self.graphd):
+            self._run_graphd(index)
 
-        udocker_create_command = f"ps | grep graphd || udocker --debug --allow-root create --name=nebula-graphd {self._container_image_prefix}vesoft/nebula-graphd:v3"
-        if self._debug:
-            fancy_print(
-                "Info: [DEBUG] creating graphd container... with command:"
-                f"\nudocker {udocker_create_command}"
-            )
-        self._run_udocker(udocker_create_command)
+    def _graphd_port(self, index: int) -> int:
+        return self.port + index
 
-        # fakechroot is used, see #18
-        # TODO: leverage F2 in MUSL/Alpine Linux
-        time.sleep(3)
+    @staticmethod
+    def _graphd_ws_http_port(index: int) -> int:
+        return GRAPHD_WS_HTTP_PORT + index
 
-        if self.on_modelscope:
-            udocker_setup_command = "--debug setup --execmode=F1 nebula-graphd"
-            self._run_udocker(udocker_setup_command)
+    @staticmethod
+    def _graphd_name(index: int) -> str:
+        return f"graphd{index}" if index else "graphd"
+
+    @staticmethod
+    def _graphd_log_dir(index: int) -> str:
+        return f"graph{index}" if index else "graph"
 
+    def _graphd_addresses(self):
+        return [(self.host, self._graphd_port(i)) for i in range(self.graphd)]
+
+    def _run_graphd(self, index: int = 0):
+        # all instances run in the same graphd container
+        port = self._graphd_port(index)
+        ws_http_port = self._graphd_ws_http_port(index)
+        name = self._graphd_name(index)
         udocker_command = (
-            f"run --rm --user=root -v "
-            f"{self.base_path}/logs/graph:/logs nebula-graphd "
-            f"--meta_server_addrs={self.host}:9559 --local_ip={self.host} "
-            f"--ws_ip={self.host} --port={self.port} --ws_http_port=19669 "
+            f"run --user=root -v "
+            f"{self.base_path}/logs/{self._graphd_log_dir(index)}:/logs "
+            f"{self._container_name('graphd')} "
+            f"--meta_server_addrs={self.host}:{METAD_PORT} --local_ip={self.host} "
+            f"--ws_ip={self.host} --port={port} "
+            f"--ws_http_port={ws_http_port} "
             f"--log_dir=/logs --v=0 --minloglevel=0"
-        )
+        ) + self._tuning_flags("graphd", self.graphd)
         if self._debug:
             fancy_print(
-                "Info: [DEBUG] starting graphd... with command:"
+                f"Info: [DEBUG] starting {name}... with command:"
                 f"\nudocker {udocker_command}"
             )
-        self._run_udocker_background(udocker_command)
-        time.sleep(15)
-        if not self.on_colab:
-            # self._run_udocker_ps_filter("graphd")
-            process_listening_on_port(self.port)
+        with self.profiler.phase(f"run {name}"):
+            self._run_udocker_background(
+                udocker_command,
+                service=name,
+                log_dir=f"{self.base_path}/logs/{self._graphd_log_dir(index)}",
+            )
+        self._wait_for_service(name, port, ws_http_port, GRAPHD_READY_TIMEOUT)
+
+    def _pool_config(self, pool_size: int):
+        from nebula3.Config import Config
+
+        config = Config()
+        config.max_connection_pool_size = pool_size
+        # nebula3 takes the idle time in ms and the check interval in seconds
+        config.idle_time = int(self.pool_idle_time * 1000)
+        config.interval_check = self.pool_health_check_interval
+        return config
+
+    @property
+    def connection_pool(self) -> BalancedConnectionPool:
+        """
+        The connection pool to the graphd frontends shared by all queries of
+        this instance, created on first use, pool_size applies per frontend.
+        """
+        with self._pool_lock:
+            if self._connection_pool is None:
+                connection_pool = BalancedConnectionPool(self.balance)
+                connection_pool.init(
+                    self._graphd_addresses(), self._pool_config(self.pool_size)
+                )
+                self._connection_pool = connection_pool
+            return self._connection_pool
+
+    def close_pool(self):
+        """
+        Release the idle sessions and close the shared connection pool.
+        """
+        with self._pool_lock:
+            idle_sessions, self._idle_sessions = self._idle_sessions, []
+            connection_pool, self._connection_pool = self._connection_pool, None
+        for _, session in idle_sessions:
+            try:
+                session.release()
+            except Exception:
+                pass
+        if connection_pool is not None:
+            connection_pool.close()
+
+    @contextlib.contextmanager
+    def session(self, user=DEFAULT_USER, password=DEFAULT_PASSWORD, space=None):
+        """
+        An authenticated session from the shared pool, kept for reuse after
+        the with block unless it raised or its last result was a session or
+        connection error.
+
+        Reused sessions keep the space of their last USE, pass space to
+        switch to a known one.
+        """
+        credentials = (user, password)
+        session = None
+        with self._pool_lock:
+            for i, (idle_credentials, _) in enumerate(self._idle_sessions):
+                if idle_credentials == credentials:
+                    session = self._idle_sessions.pop(i)[1]
+                    break
+        connection_pool = self.connection_pool
+        if session is None:
+            session = connection_pool.get_session(user, password)
+        pooled = _PooledSession(session)
+        try:
+            if space is not None:
+                result = pooled.execute(f"USE `{space}`")
+                if not result.is_succeeded():
+                    raise Exception(result.error_msg())
+            yield pooled
+        except BaseException:
+            session.release()
+            raise
+        with self._pool_lock:
+            if self._connection_pool is connection_pool and not pooled.broken:
+                self._idle_sessions.append((credentials, session))
+                return
+        session.release()
+
+    def execute(self, statement: str, space=None):
+        """
+        Execute a statement on a shared session, returns the ResultSet and
+        raises when the statement failed.
+        """
+        with self.session(space=space) as session:
+            result = session.execute(statement)
+            # raising in the block releases the session, it isn't reused
+            if not result.is_succeeded():
+                raise Exception(
+                    f"Failed to execute `{statement[:200]}`: {result.error_msg()}"
+                )
+        return result
+
+    def execute_json(self, statement: str, space=None) -> dict:
+        """
+        Execute a statement on a shared session, returns the decoded JSON
+        result.
+        """
+        with self.session(space=space) as session:
+            result_byte = session.execute_json(statement)
+        return json.loads(result_byte.decode("utf-8"))
+
+    @contextlib.contextmanager
+    def _load_pool(self, connections: int):
+        """
+        The shared pool when it has room for connections more sessions,
+        otherwise a pool of that size closed after the load.
+        """
+        with self._pool_lock:
+            idle = len(self._idle_sessions)
+        if connections + idle <= self.pool_size * self.graphd:
+            yield self.connection_pool
+            return
+        connection_pool = BalancedConnectionPool(self.balance)
+        try:
+            connection_pool.init(
+                self._graphd_addresses(),
+                self._pool_config(-(-connections // self.graphd)),
+            )
+            yield connection_pool
+        finally:
+            connection_pool.close()
+
+    def measure_throughput(
+        self, statement: str, concurrency=(1, 2, 4, 8), queries=1000, space=None
+    ) -> list:
+        """
+        Run statement queries times at each concurrency level, one session
+        per concurrent client spread over the graphd frontends, to see how
+        throughput scales. A one-query Benchmark, returns and prints its
+        results, the queries/sec and latencies of every level.
+        """
+        workload = {
+            "name": f"throughput with {self.graphd} graphd, {self.balance}",
+            "space": space,
+            "queries": [{"name": statement[:60], "statement": statement}],
+        }
+        with self._load_pool(max(concurrency)) as connection_pool:
+            report = Benchmark(
+                connection_pool,
+                workload,
+                user=DEFAULT_USER,
+                password=DEFAULT_PASSWORD,
+                concurrency=concurrency,
+                iterations=queries,
+                warmup=0,
+            ).run()
+        print_report(report)
+        return report["results"]
+
+    def bench(
+        self,
+        workload=None,
+        concurrency=DEFAULT_BENCH_CONCURRENCY,
+        iterations=DEFAULT_BENCH_ITERATIONS,
+        warmup=DEFAULT_BENCH_WARMUP,
+        output=None,
+        baseline=None,
+        threshold=DEFAULT_REGRESSION_THRESHOLD,
+    ) -> dict:
+        """
+        Benchmark the running instance with a workload file, see
+        load_workload(), by default GO, MATCH, FETCH and LOOKUP queries over
+        basketballplayer.
+
+        The report is printed and written as JSON to output, by default
+        <base_path>/bench/bench-<time>.json. With a baseline report path, the
+        regressions against it are added to the report under "regressions".
+        """
+        workload = (
+            load_workload(workload) if isinstance(workload, str) else workload
+        )
+        with self._load_pool(max(concurrency)) as connection_pool:
+            report = Benchmark(
+                connection_pool,
+                workload,
+                user=DEFAULT_USER,
+                password=DEFAULT_PASSWORD,
+                concurrency=concurrency,
+                iterations=iterations,
+                warmup=warmup,
+            ).run()
+        report["graphd"] = self.graphd
+        report["storaged"] = self.storaged
+        report["balance"] = self.balance
+        base_report = None
+        if baseline is not None:
+            with open(baseline, "r") as f:
+                base_report = json.load(f)
+            report["baseline"] = baseline
+            report["regressions"] = compare(report, base_report, threshold)
+        print_report(report, base_report)
+
+        if output is None:
+            output = os.path.join(
+                self.base_path,
+                "bench",
+                time.strftime("bench-%Y%m%d-%H%M%S.json", time.localtime()),
+            )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        fancy_print(f"Info: benchmark report written to {output}", color="green")
+
+        failed = sum(r["failed"] for r in report["results"])
+        if failed:
+            fancy_print(
+                f"Warning: {failed} queries failed, first error: "
+                + next(r["error"] for r in report["results"] if r["failed"]),
+                color="yellow",
+            )
+        for r in report.get("regressions", []):
+            fancy_print(
+                f"Warning: regression of {r['query']} at {r['concurrency']} "
+                f"clients, {r['metric']} {r['baseline']:.2f} -> {r['current']:.2f}",
+                color="yellow",
+            )
+        return report
 
     def activate_storaged(self):
         # udocker_create_command = f"ps | grep nebula-console || udocker --debug --allow-root create --name=nebula-console {self._container_image_prefix}vesoft/nebula-console:v3"
@@ -461,29 +1442,43 @@ class NebulaGraphLet:
         # self._run_udocker_background(udocker_command)
 
         # leveraging nebula-python to activate storaged instead of nebula-console
-        config = Config()
-        config.max_connection_pool_size = 2
-        connection_pool = ConnectionPool()
-        # Wait for graphd to be ready
-        for _ in range(50):
+        # Wait for graphd to accept connections
+        timeout = self._phase_timeout(GRAPHD_READY_TIMEOUT)
+
+        def _pool_ready():
+            self._check_services()
             try:
-                connection_pool.init([("127.0.0.1", 9669)], config)
-                break
+                self.connection_pool
             except Exception:
-                time.sleep(1)
-        else:
-            if self._debug:
-                log_content = subprocess.getoutput(
-                    f"tail -n 100 {self.base_path}/logs/*/*"
+                return False
+            return True
+
+        with self.profiler.phase("graphd accepting sessions"):
+            ready = wait_until(_pool_ready, timeout, interval=1)
+        if not ready:
+            self._print_service_logs()
+            raise Exception(f"graphd did not become ready in {timeout:.0f} seconds")
+        with self.session() as session:
+            hosts = ", ".join(
+                f'"{self.host}":{self._storaged_port(index)}'
+                for index in range(self.storaged)
+            )
+            with self.profiler.phase("ADD HOSTS"):
+                session.execute(f"ADD HOSTS {hosts}")
+            # storaged turns ONLINE on its first heartbeat after being added
+            timeout = self._phase_timeout(STORAGED_ONLINE_TIMEOUT)
+            with self.profiler.phase("SHOW HOSTS until ONLINE"):
+                online = wait_until(
+                    lambda: self._check_services()
+                    or self._is_storaged_online(session),
+                    timeout,
+                    interval=1,
                 )
-                fancy_print(
-                    "Info: [DEBUG] Last 100 lines of service logs:"
-                    f"\n{log_content}"
+            if not online:
+                self._print_service_logs()
+                raise Exception(
+                    f"storaged did not become ONLINE in {timeout:.0f} seconds"
                 )
-            raise Exception("graphd did not become ready in 50 seconds")
-        with connection_pool.session_context("root", "nebula") as session:
-            session.execute(f'ADD HOSTS "{self.host}":9779')
-            time.sleep(12)
             result_byte = session.execute_json("SHOW HOSTS")
             result = result_byte.decode("utf-8")
             result_dict = json.loads(result)
@@ -494,7 +1489,9 @@ class NebulaGraphLet:
                 }
             )
 
-    def load_basketballplayer_dataset(self):
+    def load_basketballplayer_dataset(
+        self, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY
+    ):
         # udocker_create_command = f"ps | grep nebula-console || udocker --debug --allow-root create --name=nebula-console {self._container_image_prefix}vesoft/nebula-console:v3"
         # if self._debug:
         #     fancy_print(
@@ -506,33 +1503,8 @@ class NebulaGraphLet:
         # udocker_setup_command = "--debug setup --execmode=F1 nebula-console"
         # self._run_udocker(udocker_setup_command)
 
-        url = BASKETBALLPLAYER_DATASET_URL
-        socket.setdefaulttimeout(5)
-        try:
-            urlretrieve(url, f"{self.base_path}/data_set/basketballplayer.ngql")
-        except Exception as e:
-            fancy_dict_print(
-                {
-                    "message": "Failed to download basketballplayer dataset, please check your network connection",
-                    "error": str(e),
-                    "url": url,
-                }
-            )
-            socket.setdefaulttimeout(10)
-            url = BASKETBALLPLAYER_DATASET_URL_ALT
-            try:
-                urlretrieve(url, f"{self.base_path}/data_set/basketballplayer.ngql")
-            except Exception as e:
-                fancy_dict_print(
-                    {
-                        "message": "Failed to download basketballplayer dataset from alternative URL, please check your network connection",
-                        "error": str(e),
-                        "url": url,
-                    }
-                )
-                raise Exception(
-                    f"Failed to download basketballplayer dataset from {url}"
-                )
+        with self.profiler.phase("download basketballplayer dataset"):
+            dataset_path = self._download_basketballplayer_dataset()
 
         # udocker_command = (
         #     f"run --rm -v {self.base_path}/data_set:/root/data "
@@ -559,116 +1531,451 @@ class NebulaGraphLet:
         #     )
 
         # leveraging nebula-python to load basketballplayer dataset instead of nebula-console
-        config = Config()
-        config.max_connection_pool_size = 2
-        connection_pool = ConnectionPool()
-        connection_pool.init([("127.0.0.1", 9669)], config)
-        with connection_pool.session_context("root", "nebula") as session:
-            with open(
-                f"{self.base_path}/data_set/basketballplayer.ngql", "r"
-            ) as file:
-                ngql_commands = file.read().split("\n")
-                for command in ngql_commands:
-                    if "partition_num=10" in command:
-                        command = command.replace(
-                            "partition_num=10", "partition_num=1"
-                        )
-                    if command.strip() and not command.startswith(":"):
-                        session.execute(command)
-                    elif command.startswith(":sleep"):
-                        time.sleep(int(command.split(" ")[1]))
+        self.load_ngql(
+            dataset_path,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            partition_num=self._dataset_partition_num(),
+        )
 
-    def start_storaged(self, shoot=False):
-        if shoot:
-            self._try_shoot_service("storaged")
+    def load_ngql(
+        self,
+        path: str,
+        batch_size=DEFAULT_BATCH_SIZE,
+        concurrency=DEFAULT_CONCURRENCY,
+        partition_num=None,
+    ) -> dict:
+        """
+        Stream a plain or gzipped .ngql file of any size into NebulaGraph.
 
-        udocker_create_command = f"ps | grep storaged || udocker --debug --allow-root create --name=nebula-storaged {self._container_image_prefix}vesoft/nebula-storaged:v3"
-        if self._debug:
-            fancy_print(
-                "Info: [DEBUG] creating storaged container... with command:"
-                f"\nudocker {udocker_create_command}"
+        Statements may span lines, `:sleep N` directives are honored and
+        partition_num, when given, rewrites the one of CREATE SPACE.
+        Returns the load statistics.
+        """
+        # one session for schema statements, the others load batches
+        with self._load_pool(concurrency + 1) as connection_pool:
+            loader = NgqlLoader(
+                connection_pool,
+                batch_size=batch_size,
+                concurrency=concurrency,
+                profiler=self.profiler,
+                debug=self._debug,
             )
-        self._run_udocker(udocker_create_command)
+            with open_ngql(path) as file:
+                stats = loader.load(parse_ngql(file, partition_num=partition_num))
+        fancy_print(
+            f"Info: loaded {stats['rows']} rows from {path} in "
+            f"{stats['seconds']:.1f}s, {stats['rows_per_second']:.0f} rows/sec",
+            color="green",
+        )
+        return stats
 
-        # fakechroot is used, see #18
-        # TODO: leverage F2 in MUSL/Alpine Linux
-        time.sleep(3)
-        udocker_setup_command = "--debug setup --execmode=F1 nebula-storaged"
-        self._run_udocker(udocker_setup_command)
+    def import_csv(
+        self,
+        space: str,
+        vertices=(),
+        edges=(),
+        batch_size=DEFAULT_IMPORT_BATCH_SIZE,
+        concurrency=DEFAULT_IMPORT_CONCURRENCY,
+        retries=DEFAULT_IMPORT_RETRIES,
+        vid_type="string",
+        delimiter=",",
+    ) -> dict:
+        """
+        Import CSV files into an existing space, vertices is a list of
+        (tag, path) and edges a list of (edge_type, path) pairs.
 
+        See CsvImporter for the CSV layout, returns the stats per file.
+        """
+        results = {}
+        with self._load_pool(concurrency) as connection_pool:
+            importer = CsvImporter(
+                connection_pool,
+                space,
+                batch_size=batch_size,
+                concurrency=concurrency,
+                retries=retries,
+                vid_type=vid_type,
+            )
+            for tag, path in vertices:
+                with self.profiler.phase(f"import vertices {tag}", category="load"):
+                    results[path] = importer.import_vertices(
+                        path, tag, delimiter=delimiter
+                    )
+            for edge_type, path in edges:
+                with self.profiler.phase(
+                    f"import edges {edge_type}", category="load"
+                ):
+                    results[path] = importer.import_edges(
+                        path, edge_type, delimiter=delimiter
+                    )
+        failed = {path: r for path, r in results.items() if r["failed_rows"]}
+        if failed:
+            fancy_dict_print(
+                {
+                    "message": "Some batches failed after retries",
+                    "failed": {
+                        path: r.get("errors", []) for path, r in failed.items()
+                    },
+                }
+            )
+            raise Exception(
+                f"CSV import failed for {sum(r['failed_rows'] for r in failed.values())} rows"
+            )
+        return results
+
+    def _download_basketballplayer_dataset(self):
+        sources = [BASKETBALLPLAYER_DATASET_URL, BASKETBALLPLAYER_DATASET_URL_ALT]
+        if self.dataset_source:
+            sources.insert(0, self.dataset_source)
+        return self._dataset_cache.fetch("basketballplayer.ngql", sources)
+
+    def start_storaged(self, shoot=False):
+        self._prepare()
+        self._create_container("storaged", shoot=shoot)
+        self._setup_container("storaged")
+        for index in range(self.storaged):
+            self._run_storaged(index)
+
+    @staticmethod
+    def _storaged_port(index: int) -> int:
+        return STORAGED_PORT + index * STORAGED_PORT_STEP
+
+    @staticmethod
+    def _storaged_ws_http_port(index: int) -> int:
+        return STORAGED_WS_HTTP_PORT + index * STORAGED_PORT_STEP
+
+    @staticmethod
+    def _storaged_name(index: int) -> str:
+        return f"storaged{index}" if index else "storaged"
+
+    def _dataset_partition_num(self):
+        if self.partition_num is not None:
+            return self.partition_num
+        return 1 if self.storaged == 1 else None
+
+    def _run_storaged(self, index: int = 0):
+        # all instances run in the same storaged container
+        port = self._storaged_port(index)
+        ws_http_port = self._storaged_ws_http_port(index)
+        name = self._storaged_name(index)
         udocker_command = (
-            f"run --rm --user=root -v "
-            f"{self.base_path}/data/storage0:/data/storage -v "
-            f"{self.base_path}/logs/storage0:/logs nebula-storaged "
-            f"--meta_server_addrs={self.host}:9559 --local_ip={self.host} "
-            f"--ws_ip={self.host} --port=9779 --ws_http_port=19779 "
+            f"run --user=root -v "
+            f"{self.base_path}/data/storage{index}:/data/storage -v "
+            f"{self.base_path}/logs/storage{index}:/logs "
+            f"{self._container_name('storaged')} "
+            f"--meta_server_addrs={self.host}:{METAD_PORT} --local_ip={self.host} "
+            f"--ws_ip={self.host} --port={port} "
+            f"--ws_http_port={ws_http_port} "
             f"--data_path=/data/storage --log_dir=/logs --v=0 --minloglevel=0"
-        )
+        ) + self._tuning_flags("storaged", self.storaged)
         if self._debug:
             fancy_print(
-                "Info: [DEBUG] starting storaged... with command:"
+                f"Info: [DEBUG] starting {name}... with command:"
                 f"\nudocker {udocker_command}"
             )
+        with self.profiler.phase(f"run {name}"):
+            self._run_udocker_background(
+                udocker_command,
+                service=name,
+                log_dir=f"{self.base_path}/logs/storage{index}",
+            )
+        self._wait_for_service(name, port, ws_http_port, STORAGED_READY_TIMEOUT)
 
-        self._run_udocker_background(udocker_command)
-        time.sleep(20)
-        if not self.on_colab:
-            # self._run_udocker_ps_filter("storaged")
+    def _phase_timeout(self, phase_timeout: float) -> float:
+        """
+        Cap a phase's own deadline by what is left of the startup_timeout.
+        """
+        self._check_cancelled()
+        if self._startup_deadline is None:
+            return phase_timeout
+        remaining = self._startup_deadline - time.monotonic()
+        if remaining <= 0:
+            raise Exception(
+                f"nebulagraph_lite did not start in {self.startup_timeout} seconds, "
+                "try a larger --startup-timeout"
+            )
+        return min(phase_timeout, remaining)
+
+    def _wait_for_service(
+        self, service: str, port: int, ws_http_port: int, phase_timeout: float
+    ):
+        """
+        Block until the service listens on its RPC port and its /status
+        endpoint reports running, fail as soon as its process exits.
+        """
+        timeout = self._phase_timeout(phase_timeout)
+
+        def _ready():
+            self._check_services(service)
+            if self.readiness_probe is not None:
+                return self.readiness_probe(port, ws_http_port)
+            return not wait_for_ports(
+                [port, ws_http_port], self.host, timeout=0
+            ) and is_service_running(self.host, ws_http_port)
+
+        with self.profiler.phase(f"{service} ready on port {port}"):
+            ready = wait_until(
+                _ready, timeout, interval=self.supervisor.poll_interval
+            )
+        if not ready:
+            self._print_service_logs()
+            raise Exception(
+                f"{service} did not become ready in {timeout:.0f} seconds"
+            )
+        if self._debug:
+            fancy_print(f"Info: [DEBUG] {service} is ready on port {port}")
+
+    def _is_storaged_online(self, session) -> bool:
+        result = session.execute("SHOW HOSTS")
+        if not result.is_succeeded():
+            return False
+        try:
+            online = {
+                (host.as_string(), port.as_int())
+                for host, port, status in zip(
+                    result.column_values("Host"),
+                    result.column_values("Port"),
+                    result.column_values("Status"),
+                )
+                if status.as_string() == "ONLINE"
+            }
+        except Exception:
+            return False
+        return all(
+            (self.host, self._storaged_port(index)) in online
+            for index in range(self.storaged)
+        )
+
+    def cancel(self):
+        """
+        Make a running start() raise StartupCancelled at its next step or
+        readiness check, from any thread. The services it started keep
+        running, stop() them.
+        """
+        self._cancelled.set()
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise StartupCancelled("nebulagraph_lite startup cancelled")
+
+    def _check_services(self, service: str = None):
+        """
+        Raise if the service, or any service, has exited or has logged a
+        fatal line since start() began, or if start() was cancelled.
+        """
+        self._check_cancelled()
+        self.supervisor.check(service)
+        if self._startup_logs is None:
+            return
+        fatal = self._startup_logs.check(service)
+        if fatal:
+            # glog aborts right after a FATAL line, wait for that exit so a
+            # crash is always reported by its exit code, with its log tail
+            wait_until(
+                lambda: self.supervisor.check(service),
+                FATAL_EXIT_TIMEOUT,
+                interval=self.supervisor.poll_interval,
+            )
+            raise Exception(
+                f"{service or 'a service'} failed to start, its logs read:\n"
+                + "\n".join(fatal[-LOG_TAIL_LINES:])
+            )
+
+    def _log_dirs(self, service: str = None) -> dict:
+        """
+        The log directory of every instance, or of the instances of service.
+        """
+        log_dirs = {"metad": os.path.join(self.base_path, "logs", "meta0")}
+        for index in range(self.graphd):
+            log_dirs[self._graphd_name(index)] = os.path.join(
+                self.base_path, "logs", self._graphd_log_dir(index)
+            )
+        for index in range(self.storaged):
+            log_dirs[self._storaged_name(index)] = os.path.join(
+                self.base_path, "logs", f"storage{index}"
+            )
+        if service is None:
+            return log_dirs
+        return {
+            name: log_dir
+            for name, log_dir in log_dirs.items()
+            if name.rstrip("0123456789") == service
+        }
+
+    def _print_service_logs(self):
+        if self._debug:
+            tails = LogFollower(self._log_dirs()).tail(100)
+            fancy_print(
+                "Info: [DEBUG] Last 100 lines of service logs:\n"
+                + "\n".join(
+                    f"[{name}] {line}"
+                    for name, lines in tails.items()
+                    for line in lines
+                )
+            )
+
+    def print_logs(
+        self,
+        service: str = None,
+        lines=DEFAULT_LOG_LINES,
+        follow=False,
+        interval=DEFAULT_FOLLOW_INTERVAL,
+    ):
+        """
+        Print the last lines of the service logs, of all services or of one,
+        with follow keep printing new lines until interrupted.
+        """
+        log_dirs = self._log_dirs(service)
+        if not log_dirs:
+            raise Exception(f"Unknown service {service}")
+        for name, tail in LogFollower(log_dirs).tail(lines).items():
+            for line in tail:
+                print(f"[{name}] {line}")
+        if not follow:
+            return
+        follower = LogFollower(log_dirs, from_end=True)
+        try:
+            while True:
+                for name, line in follower.poll():
+                    print(f"[{name}] {line}", flush=True)
+                time.sleep(interval)
+        except KeyboardInterrupt:
             pass
 
-    def start(self, fresh=False):
+    def start(self, fresh=False, profile=False, trace=False):
+        """
+        Start all NebulaGraph-Lite services and load the basketballplayer dataset.
+
+        With profile, print the wall-clock time of every startup phase, with
+        trace, also write them to {base_path}/startup_trace.json in Chrome
+        trace-event format.
+        """
+        self.profiler.reset()
+        self._startup_deadline = time.monotonic() + self.startup_timeout
+        self._cancelled.clear()
+        # only what this start writes matters
+        self._startup_logs = LogFollower(self._log_dirs(), from_end=True)
+        self.supervisor.restart = False
+        try:
+            self._start(fresh=fresh)
+            self.supervisor.restart = self.restart_on_crash
+            self._write_manifest("running")
+        except BaseException:
+            # what did start can still be found and stopped
+            if self.supervisor.services:
+                self._write_manifest("failed")
+            raise
+        finally:
+            self._startup_deadline = None
+            self._startup_logs = None
+            if profile:
+                self.profiler.print_table()
+            if trace:
+                trace_path = self.profiler.write_chrome_trace(
+                    os.path.join(self.base_path, "startup_trace.json")
+                )
+                fancy_print(f"Info: startup trace written to {trace_path}")
+
+    def _start(self, fresh=False):
         shoot = bool(fresh)
+        self._prepare()
+        if self.on_modelscope and self.modelscope_file is None:
+            # Try download docker image from ModelScope
+            self._check_cancelled()
+            self.modelscope_file = self._try_download_modelscope()
+        self._check_cancelled()
         self.udocker_init()
+        self._check_cancelled()
         # if on_modelscope, we should load the model first
         if self.on_modelscope:
             fancy_print(
                 f"Info: loading nebulagraph_lite model from {self.modelscope_file}...",
                 color="light_green",
             )
-            os.system(f"tar -xzf {self.modelscope_file} -C {self.base_path}")
-
-            try:
-                self._run_udocker(
-                    f"load -i {self.base_path}/nebulagraph_lite_meta.tar"
-                )
-                self._run_udocker(
-                    f"load -i {self.base_path}/nebulagraph_lite_graph.tar"
-                )
-                self._run_udocker(
-                    f"load -i {self.base_path}/nebulagraph_lite_storage.tar"
-                )
-                self._run_udocker(
-                    f"load -i {self.base_path}/nebulagraph_lite_console.tar"
+            if not self.modelscope_file:
+                raise Exception(
+                    "nebulagraph_lite model could not be downloaded from ModelScope"
                 )
-            except Exception as e:
-                if self._debug:
-                    fancy_print(f"Info: [DEBUG] error when load model, {e}")
+            with self.profiler.phase("load modelscope images"):
+                results = BundleLoader(
+                    self._udocker, self._bootstrap, self.base_path, self._debug
+                ).load(self.modelscope_file)
             fancy_print(
-                f"Info: nebulagraph_lite model loaded successfully!",
+                "Info: nebulagraph_lite model loaded successfully! "
+                + ", ".join(
+                    f"{image} {result}" for image, result in results.items()
+                ),
                 color="light_blue",
             )
-        # async pull images
-        if not self.on_modelscope:
-            self.udocker_pull(
-                f"{self._container_image_prefix}vesoft/nebula-metad:v3"
-            )
-            self.udocker_pull_backgroud(
-                f"{self._container_image_prefix}vesoft/nebula-graphd:v3"
+        scheduler = _StartupScheduler(
+            # IPython's system() is not safe to call from several threads
+            max_workers=1 if self.on_colab else STARTUP_WORKERS,
+            debug=self._debug,
+            cancelled=self._cancelled,
+        )
+        for service in ("metad", "graphd", "storaged"):
+            create_deps = []
+            if not self.on_modelscope:
+                scheduler.add(
+                    f"pull {service}",
+                    self.udocker_pull,
+                    f"{self._container_image_prefix}vesoft/nebula-{service}:v3",
+                )
+                create_deps.append(f"pull {service}")
+            # graphd is always recreated, as in start_graphd()
+            scheduler.add(
+                f"create {service}",
+                self._create_container,
+                service,
+                shoot=shoot or service == "graphd",
+                execmode=(
+                    None if service == "graphd" and not self.on_modelscope else "F1"
+                ),
+                deps=create_deps,
             )
-        self.start_metad(shoot=shoot)
-        if not self.on_modelscope:
-            self.udocker_pull_backgroud(
-                f"{self._container_image_prefix}vesoft/nebula-storaged:v3"
+            run_deps = [f"create {service}"]
+            if service != "graphd" or self.on_modelscope:
+                scheduler.add(
+                    f"setup {service}",
+                    self._setup_container,
+                    service,
+                    deps=run_deps,
+                )
+                run_deps = [f"setup {service}"]
+            if service == "metad":
+                scheduler.add("run metad", self._run_metad, deps=run_deps)
+                continue
+            # graphd and storaged need metad listening to register
+            run_deps.append("run metad")
+            # every instance runs in the service's one container
+            instances, name_of = (
+                (self.graphd, self._graphd_name)
+                if service == "graphd"
+                else (self.storaged, self._storaged_name)
             )
-        self.start_graphd()
-        self.start_storaged(shoot=shoot)
-        time.sleep(20)
-        self.activate_storaged()
+            for index in range(instances):
+                scheduler.add(
+                    f"run {name_of(index)}",
+                    getattr(self, f"_run_{service}"),
+                    index,
+                    deps=run_deps,
+                )
         if not self.on_modelscope:
-            self.udocker_pull(
-                f"{self._container_image_prefix}vesoft/nebula-console:v3"
+            scheduler.add(
+                "pull console",
+                self.udocker_pull,
+                f"{self._container_image_prefix}vesoft/nebula-console:v3",
             )
-        time.sleep(20)
+        scheduler.add(
+            "activate storaged",
+            self.activate_storaged,
+            deps=[f"run {self._graphd_name(i)}" for i in range(self.graphd)]
+            + [f"run {self._storaged_name(i)}" for i in range(self.storaged)],
+        )
+        scheduler.run()
+
+        self._check_cancelled()
         fancy_print("Info: loading basketballplayer dataset...", color="green")
         self.load_basketballplayer_dataset()
         fancy_print(BANNER_ASCII)
@@ -677,61 +1984,288 @@ class NebulaGraphLet:
         )
         self.docker_ps()
 
+    def _write_manifest(self, state: str):
+        """
+        Record the service processes start() left running, see RunManifest.
+        """
+        import psutil
+
+        supervised = self.supervisor.services
+        services = {}
+        for name, (port, ws_http_port) in self._service_endpoints().items():
+            service = name.rstrip("0123456789")
+            process = supervised.get(name)
+            pid = process.pid if process is not None else None
+            candidates = [pid] if pid else []
+            if pid:
+                try:
+                    candidates += [
+                        child.pid
+                        for child in psutil.Process(pid).children(recursive=True)
+                    ]
+                except psutil.NoSuchProcess:
+                    pass
+            # udocker runs the service binary as its child
+            service_pid = get_pid_by_port(port, candidates, host=self.host)
+            container = self._container_name(service)
+            services[name] = {
+                "service": service,
+                "host": self.host,
+                "port": port,
+                "ws_http_port": ws_http_port,
+                "pid": pid,
+                "pid_started_at": process_started_at(pid) if pid else None,
+                "service_pid": service_pid,
+                "service_pid_started_at": (
+                    process_started_at(service_pid) if service_pid else None
+                ),
+                "container": container,
+                "container_id": self._container_ids.get(container),
+                "execmode": self._execmodes.get(service),
+                "log_dir": process.log_dir if process is not None else None,
+            }
+        self._manifest.write(
+            {
+                "state": state,
+                "host": self.host,
+                "base_path": self.base_path,
+                "started_at": time.time(),
+                "startup_seconds": round(self.profiler.total(), 3),
+                "phases": {
+                    event["name"]: round(event["duration"], 3)
+                    for event in self.profiler.events
+                },
+                "services": services,
+            }
+        )
+
+    def _manifest_services(self) -> dict:
+        """
+        The service records of the manifest of this host, empty without one.
+        """
+        manifest = self._manifest.load()
+        if not manifest or manifest.get("host") != self.host:
+            return {}
+        return manifest.get("services", {})
+
+    def attach(self, graphd=None, storaged=None):
+        """
+        Count graphd and storaged instances as the manifest of what start()
+        left running does, unless given, for the commands that work on it.
+        """
+        records = self._manifest_services().values()
+        for service, count in (("graphd", graphd), ("storaged", storaged)):
+            if count is None:
+                count = sum(1 for r in records if r.get("service") == service)
+            if count:
+                setattr(self, service, max(1, count))
+        return self
+
+    def status(self) -> dict:
+        """
+        The health of every service start() left running, validated against
+        the live processes and ports in a few milliseconds.
+
+        state is up when all services are, down when none is, degraded
+        otherwise, and stopped when nothing was started.
+        """
+        manifest = self._manifest.load()
+        if not manifest or manifest.get("host") != self.host:
+            return {"state": "stopped", "services": {}}
+        services = {
+            name: RunManifest.service_health(record)
+            for name, record in manifest.get("services", {}).items()
+        }
+        healths = {service["health"] for service in services.values()}
+        if healths == {UP}:
+            state = UP
+        elif healths <= {DOWN}:
+            state = DOWN
+        else:
+            state = "degraded"
+        return {
+            "state": state,
+            "started_at": time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(manifest.get("started_at", 0))
+            ),
+            "startup_seconds": manifest.get("startup_seconds"),
+            "services": services,
+        }
+
+    def print_status(self) -> dict:
+        status = self.status()
+        fancy_dict_print(status)
+        return status
+
     def check_status(self):
-        self._run_udocker_ps_filter("metad")
-        self._run_udocker_ps_filter("graphd")
-        self._run_udocker_ps_filter("storaged")
+        """
+        Raise unless every service start() left running is up.
+        """
+        status = self.status()
+        if status["state"] != UP:
+            raise Exception(f"nebulagraph_lite is {status['state']}: {status}")
 
     def docker_ps(self):
         self._run_udocker("ps")
 
-    def stop(self):
+    def stop(self, grace=None):
         """
-        Stop NebulaGraph-Lite services gracefully.
+        Stop NebulaGraph-Lite services gracefully, graphd, then storaged and
+        finally metad, each is killed when it has not exited after its grace
+        period, see stop_grace.
         """
-        # We should stop graphd first, then storaged and finally metad
-        # We leverage killall to stop all services and sleep 10 seconds per service
-        # stop graphd
-        self._try_shoot_service("graphd")
-        # stop storaged
-        storaged_pid = get_pid_by_port(9779)
-        try:
-            kill_process_by_pid(storaged_pid)
-        except Exception as e:
-            if self._debug:
-                fancy_print(f"Info: [DEBUG] error when kill storaged, {e}")
-        time.sleep(15)
-        # stop metad by send signal to the process
-        metad_pid = get_pid_by_port(9559)
-        try:
-            kill_process_by_pid(metad_pid)
-        except Exception as e:
-            if self._debug:
-                fancy_print(f"Info: [DEBUG] error when kill metad, {e}")
-
-    def shutdown(self):
+        self.close_pool()
+        if self._metrics is not None:
+            self._metrics.stop()
+        self._stop_all_services(grace, self._manifest_services())
+        self.supervisor.release()
+        self._manifest.remove()
+
+    def shutdown(self, grace=None):
         """
-        Shutdown the NebulaGraph-Lite services in quick way.
+        Shutdown the NebulaGraph-Lite services in quick way, their containers
+        are removed as well.
         """
+        self.close_pool()
+        if self._metrics is not None:
+            self._metrics.stop()
+        records = self._manifest_services()
+        self._stop_all_services(grace, records)
+        self.supervisor.release()
+        self._manifest.remove()
         if self.on_colab:
             self._run_udocker(
                 "ps | grep nebula | awk '{print $1}' | xargs -I {} udocker --allow-root rm -f {}"
             )
-            self._try_shoot_all_services()
             return
 
         # in other environments, we cannot assume awk/xargs are installed
-        # let's get the container ids first
+        # let's get the container ids first, the recorded ones need no ps
         try:
-            result = self._run_udocker("ps | grep nebula").stdout.decode()
-            container_ids = [line.split()[0] for line in result.split("\n") if line]
+            recorded = sorted(
+                {r["container_id"] or r["container"] for r in records.values()}
+            )
+            if (
+                recorded
+                and self._udocker_output(f"rm {' '.join(recorded)}") is not None
+            ):
+                return
+            container_ids = [
+                c["id"] for c in self._udocker_containers(*SERVICE_STOP_ORDER)
+            ]
             if container_ids:
                 self._run_udocker(f"rm {' '.join(container_ids)}")
         except Exception as e:
             if self._debug:
                 fancy_print(f"Info: [DEBUG] error when udocker ps, {e}")
 
-        self._try_shoot_all_services()
+    def _service_endpoints(self) -> dict:
+        """
+        The RPC port and ws_http_port of every instance, by name.
+        """
+        endpoints = {"metad": (METAD_PORT, METAD_WS_HTTP_PORT)}
+        for index in range(self.graphd):
+            endpoints[self._graphd_name(index)] = (
+                self._graphd_port(index),
+                self._graphd_ws_http_port(index),
+            )
+        for index in range(self.storaged):
+            endpoints[self._storaged_name(index)] = (
+                self._storaged_port(index),
+                self._storaged_ws_http_port(index),
+            )
+        return endpoints
+
+    def _metrics_targets(self) -> dict:
+        return {
+            name: (self.host, ws_http_port)
+            for name, (_, ws_http_port) in self._service_endpoints().items()
+        }
+
+    def metrics(
+        self,
+        interval=DEFAULT_SCRAPE_INTERVAL,
+        ring_size=DEFAULT_RING_SIZE,
+        serve_port=None,
+    ) -> MetricsCollector:
+        """
+        The collector scraping /stats and /status of all services every
+        interval seconds into a ring buffer of ring_size samples, started on
+        first call. With serve_port, the latest sample is also served in
+        Prometheus text format at http://127.0.0.1:{serve_port}/metrics.
+
+        The collector is rebuilt, on the port it served on, when the ring
+        size or the services changed since.
+        """
+        targets = self._metrics_targets()
+        collector = self._metrics
+        if collector is not None and (
+            collector.ring_size != ring_size or collector.targets != targets
+        ):
+            address = collector.server_address
+            collector.stop()
+            self._metrics = None
+            if serve_port is None and address is not None:
+                serve_port = address[1]
+        if self._metrics is None:
+            self._metrics = MetricsCollector(
+                targets, interval=interval, ring_size=ring_size
+            )
+        self._metrics.interval = interval
+        self._metrics.start()
+        if serve_port is not None and self._metrics.server_address is None:
+            self._metrics.serve(serve_port)
+        return self._metrics
+
+    def print_stats(
+        self,
+        watch=False,
+        interval=DEFAULT_SCRAPE_INTERVAL,
+        filters=(),
+        serve_port=None,
+    ):
+        """
+        Print the stats of all services, once, or every interval seconds
+        with watch until interrupted. filters keeps the metrics whose names
+        contain any of them.
+        """
+
+        def _print(sample):
+            timestamp, values = sample
+            fancy_print(
+                f"Info: stats at {time.strftime('%H:%M:%S', time.localtime(timestamp))}",
+                color="light_green",
+            )
+            fancy_dict_print(
+                {
+                    service: {
+                        metric: value
+                        for metric, value in sorted(stats.items())
+                        if not filters or any(f in metric for f in filters)
+                    }
+                    for service, stats in values.items()
+                }
+            )
+
+        if not watch and serve_port is None:
+            _print(MetricsCollector(self._metrics_targets()).scrape())
+            return
+        collector = self.metrics(interval=interval, serve_port=serve_port)
+        if serve_port is not None:
+            fancy_print(
+                f"Info: serving Prometheus metrics at http://127.0.0.1:{serve_port}/metrics",
+                color="light_blue",
+            )
+        try:
+            while True:
+                time.sleep(interval)
+                sample = collector.latest()
+                if sample is not None and watch:
+                    _print(sample)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            collector.stop()
 
     def print_docker_ps(self):
         result = self.docker_ps()
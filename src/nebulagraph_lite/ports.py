@@ -0,0 +1,132 @@
+import os
+import socket
+import time
+
+PROC_NET_TCP = ("/proc/net/tcp", "/proc/net/tcp6")
+TCP_LISTEN = "0A"
+
+
+def is_port_listening(port: int, host: str = "127.0.0.1", timeout: float = 1.0):
+    """
+    Check whether something listens on a TCP port by connecting to it.
+    """
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def wait_for_ports(
+    ports, host: str = "127.0.0.1", timeout: float = 60, interval=0.5
+):
+    """
+    Wait until all ports listen, with one deadline shared by all of them.
+
+    Returns the ports that are still not listening, empty when all are.
+    """
+    waiting = list(ports)
+    deadline = time.monotonic() + timeout
+    while True:
+        waiting = [
+            p for p in waiting if not is_port_listening(p, host, timeout=interval)
+        ]
+        remaining = deadline - time.monotonic()
+        if not waiting or remaining <= 0:
+            return waiting
+        time.sleep(min(interval, remaining))
+
+
+def _proc_net_address(hex_address: str) -> str:
+    # /proc/net/tcp{,6} print addresses as host-order 32-bit words in hex
+    raw = bytes.fromhex(hex_address)
+    words = b"".join(raw[i : i + 4][::-1] for i in range(0, len(raw), 4))
+    if len(words) == 4:
+        return socket.inet_ntop(socket.AF_INET, words)
+    address = socket.inet_ntop(socket.AF_INET6, words)
+    return address[len("::ffff:") :] if address.startswith("::ffff:") else address
+
+
+def _binds_host(address: str, host: str) -> bool:
+    return address in (host, "0.0.0.0", "::")
+
+
+def listening_socket_inodes(port: int, host: str = None):
+    """
+    Inodes of the sockets listening on port, from /proc/net/tcp{,6}, with
+    host only the ones bound to it or to all addresses.
+
+    Returns None when /proc is not available.
+    """
+    inodes = set()
+    found_proc = False
+    for path in PROC_NET_TCP:
+        try:
+            with open(path, "r") as f:
+                found_proc = True
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    # sl local_address rem_address st ... uid timeout inode
+                    if len(fields) < 10 or fields[3] != TCP_LISTEN:
+                        continue
+                    address, _, hex_port = fields[1].rpartition(":")
+                    if int(hex_port, 16) != port:
+                        continue
+                    if host is None or _binds_host(
+                        _proc_net_address(address), host
+                    ):
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    return inodes if found_proc else None
+
+
+def pid_of_socket_inodes(inodes, candidate_pids=None):
+    """
+    Find the process owning any of the socket inodes via /proc/<pid>/fd,
+    candidate_pids are checked before all others.
+    """
+    targets = {f"socket:[{inode}]" for inode in inodes if inode != "0"}
+    if not targets:
+        return None
+    pids = [str(pid) for pid in candidate_pids or ()]
+    pids += [
+        pid for pid in os.listdir("/proc") if pid.isdigit() and pid not in pids
+    ]
+    for pid in pids:
+        fd_dir = f"/proc/{pid}/fd"
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                if os.readlink(f"{fd_dir}/{fd}") in targets:
+                    return int(pid)
+            except OSError:
+                continue
+    return None
+
+
+def get_pid_by_port(port: int, candidate_pids=None, host: str = None):
+    """
+    PID of the process listening on port, or None, with host only one
+    listening on that address.
+
+    Only the port's own entries of /proc/net/tcp{,6} are looked at, instead
+    of listing every socket on the host, psutil is the fallback without /proc.
+    """
+    inodes = listening_socket_inodes(port, host)
+    if inodes is None:
+        import psutil
+
+        for conn in psutil.net_connections():
+            if (
+                conn.laddr.port == port
+                and conn.status == "LISTEN"
+                and (host is None or _binds_host(conn.laddr.ip, host))
+            ):
+                return conn.pid
+        return None
+    return pid_of_socket_inodes(inodes, candidate_pids)
@@ -0,0 +1,118 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+from nebulagraph_lite.utils import fancy_print
+
+
+class PhaseProfiler:
+    """
+    Record the wall-clock time of named phases, from any thread.
+
+    The phases can be printed as a table sorted by duration, or written as a
+    Chrome trace-event file, which chrome://tracing and Perfetto can open.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._origin = time.perf_counter()
+        self._origin_epoch = time.time()
+
+    def reset(self):
+        with self._lock:
+            self._events = []
+            self._origin = time.perf_counter()
+            self._origin_epoch = time.time()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, category: str = "startup"):
+        """
+        Time the block as one phase, it gets a dict of counters to fill in
+        that are kept with the phase.
+        """
+        started = time.perf_counter()
+        error = None
+        counters = {}
+        try:
+            yield counters
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            event = {
+                "name": name,
+                "category": category,
+                "start": started - self._origin,
+                "duration": time.perf_counter() - started,
+                "thread": threading.get_ident(),
+            }
+            if counters:
+                event["counters"] = dict(counters)
+            if error is not None:
+                event["error"] = str(error)
+            with self._lock:
+                self._events.append(event)
+
+    @property
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def total(self) -> float:
+        events = self.events
+        if not events:
+            return 0.0
+        return max(e["start"] + e["duration"] for e in events) - min(
+            e["start"] for e in events
+        )
+
+    def print_table(self):
+        events = sorted(self.events, key=lambda e: e["duration"], reverse=True)
+        if not events:
+            return
+        width = max([len("total wall-clock")] + [len(e["name"]) for e in events])
+        lines = [f"{'phase':<{width}}  {'start(s)':>9}  {'duration(s)':>11}"]
+        for e in events:
+            line = (
+                f"{e['name']:<{width}}  {e['start']:>9.2f}  {e['duration']:>11.2f}"
+            )
+            if "error" in e:
+                line += "  (failed)"
+            lines.append(line)
+        lines.append(
+            f"{'total wall-clock':<{width}}  {'':>9}  {self.total():>11.2f}"
+        )
+        fancy_print("\n".join(lines), color="light_blue")
+
+    def write_chrome_trace(self, path: str) -> str:
+        pid = os.getpid()
+        trace_events = []
+        for e in self.events:
+            trace_event = {
+                "name": e["name"],
+                "cat": e["category"],
+                "ph": "X",
+                "ts": round(e["start"] * 1e6),
+                "dur": round(e["duration"] * 1e6),
+                "pid": pid,
+                "tid": e["thread"],
+            }
+            args = dict(e.get("counters", {}))
+            if "error" in e:
+                args["error"] = e["error"]
+            if args:
+                trace_event["args"] = args
+            trace_events.append(trace_event)
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "traceEvents": trace_events,
+                    "displayTimeUnit": "ms",
+                    "otherData": {"started_at": self._origin_epoch},
+                },
+                f,
+            )
+        return path
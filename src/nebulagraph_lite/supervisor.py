@@ -0,0 +1,212 @@
+import os
+import subprocess
+import threading
+import time
+
+from collections import deque
+
+from nebulagraph_lite.utils import fancy_print
+
+DEFAULT_POLL_INTERVAL = 0.2
+DEFAULT_RESTART_BACKOFF = 1.0
+DEFAULT_MAX_RESTART_BACKOFF = 60.0
+DEFAULT_MAX_RESTARTS = 5
+LOG_TAIL_LINES = 20
+# udocker's own stdout and stderr, next to the service's glog files
+OUTPUT_FILE = "udocker.out"
+
+
+class ServiceDied(Exception):
+    pass
+
+
+def tail(path: str, lines: int = LOG_TAIL_LINES) -> list:
+    try:
+        with open(path, "r", errors="replace") as f:
+            return [line.rstrip("\n") for line in deque(f, maxlen=lines)]
+    except OSError:
+        return []
+
+
+class ServiceProcess:
+    def __init__(self, name: str, argv: list, log_dir: str = None, env=None):
+        self.name = name
+        self.argv = argv
+        self.log_dir = log_dir
+        self.env = env
+        self.process = None
+        self.started_at = None
+        self.exit_code = None
+        self.restarts = 0
+        self.next_restart = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def launch(self):
+        output = subprocess.DEVNULL
+        if self.log_dir is not None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            output = open(os.path.join(self.log_dir, OUTPUT_FILE), "ab")
+        try:
+            # a session of its own, so it outlives us as the shell `&` did
+            self.process = subprocess.Popen(
+                self.argv,
+                stdin=subprocess.DEVNULL,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                env=self.env,
+                start_new_session=True,
+            )
+        finally:
+            if output is not subprocess.DEVNULL:
+                output.close()
+        self.started_at = time.time()
+        self.exit_code = None
+
+    def log_tail(self, lines: int = LOG_TAIL_LINES) -> dict:
+        """
+        The last lines of udocker's output and of the newest glog file.
+        """
+        if self.log_dir is None or not os.path.isdir(self.log_dir):
+            return {}
+        tails = {OUTPUT_FILE: tail(os.path.join(self.log_dir, OUTPUT_FILE), lines)}
+        glogs = [
+            entry
+            for entry in os.scandir(self.log_dir)
+            if entry.is_file() and entry.name != OUTPUT_FILE
+        ]
+        if glogs:
+            newest = max(glogs, key=lambda entry: entry.stat().st_mtime)
+            tails[newest.name] = tail(newest.path, lines)
+        return tails
+
+
+class Supervisor:
+    """
+    Own the service processes, without shell backgrounding, and watch them
+    from a thread.
+
+    Until restart is enabled a service that exits is recorded as failed,
+    check() raises ServiceDied for it, so startup waits can abort at once.
+    With restart, a crashed service is started again after a backoff that
+    doubles with every restart, up to max_restarts times.
+    """
+
+    def __init__(
+        self,
+        restart=False,
+        max_restarts: int = DEFAULT_MAX_RESTARTS,
+        backoff: float = DEFAULT_RESTART_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_RESTART_BACKOFF,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        debug=False,
+    ):
+        self.restart = restart
+        self.max_restarts = max_restarts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._debug = debug
+        self._services = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    @property
+    def services(self) -> dict:
+        with self._lock:
+            return dict(self._services)
+
+    def start(self, name: str, argv: list, log_dir: str = None, env=None):
+        service = ServiceProcess(name, argv, log_dir, env)
+        service.launch()
+        with self._lock:
+            self._services[name] = service
+            self._failed.pop(name, None)
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(
+                    target=self._watch, name="nebulagraph-supervisor", daemon=True
+                )
+                self._watcher.start()
+        if self._debug:
+            fancy_print(f"Info: [DEBUG] {name} started with pid {service.pid}")
+        return service
+
+    def release(self, name: str = None):
+        """
+        Stop watching a service, or all of them, before stopping it on purpose.
+        """
+        with self._lock:
+            names = [name] if name is not None else list(self._services)
+            for service_name in names:
+                self._services.pop(service_name, None)
+                self._failed.pop(service_name, None)
+
+    def check(self, name: str = None):
+        """
+        Raise ServiceDied if the service, or any service, has exited.
+        """
+        self._poll()
+        with self._lock:
+            failed = [
+                service
+                for service_name, service in self._failed.items()
+                if name is None or service_name == name
+            ]
+        if failed:
+            service = failed[0]
+            raise ServiceDied(
+                f"{service.name} exited with code {service.exit_code}"
+                + "".join(
+                    f"\n--- {log_name} ---\n" + "\n".join(lines)
+                    for log_name, lines in service.log_tail().items()
+                    if lines
+                )
+            )
+
+    def _backoff(self, restarts: int) -> float:
+        return min(self.max_backoff, self.backoff * (2**restarts))
+
+    def _poll(self):
+        now = time.monotonic()
+        with self._lock:
+            for service in list(self._services.values()):
+                if service.next_restart is not None:
+                    if now >= service.next_restart:
+                        service.next_restart = None
+                        service.restarts += 1
+                        try:
+                            service.launch()
+                        except OSError as e:
+                            fancy_print(
+                                f"Error: failed to restart {service.name}, {e}"
+                            )
+                            self._failed[service.name] = service
+                            del self._services[service.name]
+                    continue
+                exit_code = service.process.poll()
+                if exit_code is None:
+                    continue
+                service.exit_code = exit_code
+                if self.restart and service.restarts < self.max_restarts:
+                    delay = self._backoff(service.restarts)
+                    service.next_restart = now + delay
+                    fancy_print(
+                        f"Warning: {service.name} exited with code {exit_code}, "
+                        f"restarting in {delay:.1f}s",
+                        color="yellow",
+                    )
+                    continue
+                self._failed[service.name] = service
+                del self._services[service.name]
+
+    def _watch(self):
+        while True:
+            self._poll()
+            with self._lock:
+                if not self._services:
+                    self._watcher = None
+                    return
+            time.sleep(self.poll_interval)
@@ -0,0 +1,184 @@
+import json
+import math
+import os
+import shlex
+
+LOW_MEM = "low-mem"
+BALANCED = "balanced"
+THROUGHPUT = "throughput"
+TUNING_PROFILES = (LOW_MEM, BALANCED, THROUGHPUT)
+
+# read from <base_path> when no other override file is given
+DEFAULT_TUNING_FILE = "tuning.json"
+
+MB = 1 << 20
+
+# per profile: share of the CPUs for the worker threads of one process, share
+# of the memory for all storaged block caches together, block cache bounds
+# in MB, RocksDB write buffer in MB and count, memory tracker limit ratio
+PROFILE_SETTINGS = {
+    LOW_MEM: {
+        "cpu_share": 0.25,
+        "max_threads": 2,
+        "block_cache_share": 0.05,
+        "block_cache_mb": (8, 128),
+        "write_buffer_mb": 8,
+        "write_buffers": 2,
+        "memory_ratio": 0.6,
+    },
+    BALANCED: {
+        "cpu_share": 0.5,
+        "max_threads": 16,
+        "block_cache_share": 0.15,
+        "block_cache_mb": (32, 4096),
+        "write_buffer_mb": 32,
+        "write_buffers": 3,
+        "memory_ratio": 0.8,
+    },
+    THROUGHPUT: {
+        "cpu_share": 1.0,
+        "max_threads": 64,
+        "block_cache_share": 0.3,
+        "block_cache_mb": (64, 16384),
+        "write_buffer_mb": 64,
+        "write_buffers": 4,
+        "memory_ratio": 0.9,
+    },
+}
+
+
+def _read_first_line(path: str):
+    try:
+        with open(path, "r") as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def memory_limit() -> int:
+    """
+    Bytes of memory available to this process, the cgroup (v2 or v1) limit
+    when there's one below the physical memory.
+    """
+    limit = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    for path in (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+    ):
+        value = _read_first_line(path)
+        if value and value.isdigit():
+            # cgroup v1 reports a huge number when unlimited
+            limit = min(limit, int(value))
+    return limit
+
+
+def cpu_limit() -> int:
+    """
+    CPUs available to this process, from the affinity mask and the cgroup
+    (v2 or v1) CPU quota.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota, period = None, None
+    value = _read_first_line("/sys/fs/cgroup/cpu.max")
+    if value:
+        fields = value.split()
+        if len(fields) == 2 and fields[0] != "max":
+            quota, period = int(fields[0]), int(fields[1])
+    else:
+        quota_value = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        period_value = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if quota_value and period_value and int(quota_value) > 0:
+            quota, period = int(quota_value), int(period_value)
+    if quota and period:
+        cpus = min(cpus, max(1, math.ceil(quota / period)))
+    return max(1, cpus)
+
+
+def load_overrides(path: str) -> dict:
+    """
+    Read an override file, a JSON object of flags per service, e.g.
+    {"storaged": {"rocksdb_block_cache": 256}, "graphd": {...}}, where null
+    drops a flag of the profile.
+    """
+    with open(path, "r") as f:
+        overrides = json.load(f)
+    if not isinstance(overrides, dict):
+        raise Exception(f"tuning file {path} must hold a JSON object of services")
+    return overrides
+
+
+def service_flags(
+    profile: str,
+    service: str,
+    instances: int = 1,
+    memory: int = None,
+    cpus: int = None,
+    overrides: dict = None,
+) -> dict:
+    """
+    The launch flags of one service instance under a profile, derived from
+    the memory and CPUs of the host, shared by instances of the service.
+
+    profile None applies only the overrides.
+    """
+    flags = {}
+    if profile is not None:
+        if profile not in PROFILE_SETTINGS:
+            raise ValueError(
+                f"unknown tuning profile `{profile}`, expected one of {TUNING_PROFILES}"
+            )
+        settings = PROFILE_SETTINGS[profile]
+        memory = memory if memory is not None else memory_limit()
+        cpus = cpus if cpus is not None else cpu_limit()
+        threads = max(
+            1,
+            min(
+                settings["max_threads"],
+                int(cpus * settings["cpu_share"] / max(1, instances)),
+            ),
+        )
+        flags["num_worker_threads"] = threads
+        if service in ("graphd", "storaged"):
+            flags["num_netio_threads"] = threads
+            flags["memory_tracker_limit_ratio"] = settings["memory_ratio"]
+            flags["system_memory_high_watermark_ratio"] = settings["memory_ratio"]
+        if service == "storaged":
+            low, high = settings["block_cache_mb"]
+            block_cache = memory * settings["block_cache_share"] / max(1, instances)
+            flags["num_io_threads"] = threads
+            flags["rocksdb_block_cache"] = int(
+                min(high, max(low, block_cache / MB))
+            )
+            flags["rocksdb_column_family_options"] = json.dumps(
+                {
+                    "write_buffer_size": str(settings["write_buffer_mb"] * MB),
+                    "max_write_buffer_number": str(settings["write_buffers"]),
+                },
+                separators=(",", ":"),
+            )
+    for name, value in ((overrides or {}).get(service) or {}).items():
+        if value is None:
+            flags.pop(name, None)
+        else:
+            flags[name] = value
+    return flags
+
+
+def format_flags(flags: dict) -> str:
+    """
+    Render flags as shell-quoted --name=value arguments.
+    """
+    return " ".join(
+        shlex.quote(
+            f"--{name}="
+            + (
+                json.dumps(value, separators=(",", ":"))
+                if isinstance(value, (dict, list))
+                else str(value).lower() if isinstance(value, bool) else str(value)
+            )
+        )
+        for name, value in flags.items()
+    )
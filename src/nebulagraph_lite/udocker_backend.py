@@ -0,0 +1,220 @@
+import ast
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import threading
+
+# Read-only udocker commands that run inside this interpreter. The others
+# write the repository, e.g. create and rm extract or delete image layers,
+# and keep a process of their own so that they can run in parallel
+IN_PROCESS_COMMANDS = {"ps", "images", "inspect", "version"}
+# udocker's process-wide message state, which a command's --debug changes
+MSG_STATE = ("level", "previous", "chlderr", "chldout", "chldnul")
+
+
+def _command_of(args) -> str:
+    return next((arg for arg in args if not arg.startswith("-")), "")
+
+
+def _lines_after(output: str, header: str):
+    # udocker may print install messages before the header
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith(header):
+            return lines[i + 1 :]
+    return []
+
+
+def parse_ps(output: str):
+    """
+    Parse the output of `udocker ps` into dicts of id, names and image.
+    """
+    containers = []
+    for line in _lines_after(output, "CONTAINER ID"):
+        if not line.strip():
+            continue
+        # "%-36.36s %c %c %-18.100s %-20.100s", names printed as a list
+        rest = line[41:]
+        names = []
+        if rest.startswith("["):
+            end = rest.index("]") + 1
+            names = ast.literal_eval(rest[:end])
+            rest = rest[end:]
+        containers.append(
+            {"id": line[:36].strip(), "names": names, "image": rest.strip()}
+        )
+    return containers
+
+
+def parse_images(output: str):
+    """
+    Parse the output of `udocker images` into repository:tag names.
+    """
+    return [
+        line.split()[0]
+        for line in _lines_after(output, "REPOSITORY")
+        if line.strip() and not line.startswith(" ")
+    ]
+
+
+class SubprocessUdocker:
+    """
+    Run udocker commands as processes of the udocker executable, with an
+    argument list instead of a shell.
+    """
+
+    def __init__(self, executable: str, allow_root=False):
+        self.executable = executable
+        self.allow_root = allow_root
+
+    def argv(self, args) -> list:
+        return (
+            [self.executable]
+            + (["--allow-root"] if self.allow_root else [])
+            + list(args)
+        )
+
+    def run(self, args, env: dict = None) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            self.argv(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env={**os.environ, **env} if env else None,
+        )
+
+    def containers(self):
+        result = self.run(["ps"])
+        if result.returncode != 0:
+            raise Exception(f"udocker ps failed: {result.stderr.decode()}")
+        return parse_ps(result.stdout.decode())
+
+    def images(self):
+        result = self.run(["images"])
+        if result.returncode != 0:
+            raise Exception(f"udocker images failed: {result.stderr.decode()}")
+        return parse_images(result.stdout.decode())
+
+
+class _ThreadStream:
+    """
+    Capture what one thread writes to a stream, other threads write through.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._owner = threading.get_ident()
+        self.captured = io.StringIO()
+
+    def write(self, text):
+        if threading.get_ident() == self._owner:
+            return self.captured.write(text)
+        return self._stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class InProcessUdocker(SubprocessUdocker):
+    """
+    Run the read-only udocker commands through udocker's Python API in this
+    interpreter, saving an interpreter startup per command, and list
+    containers and images from the local repository directly.
+
+    udocker keeps its configuration and repository in process-wide state,
+    so in-process commands are serialized and that state is restored after
+    every one of them.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, executable: str, allow_root=False):
+        super().__init__(executable, allow_root)
+        from udocker.config import Config
+        from udocker.msg import Msg
+        from udocker.umain import UMain
+
+        self._umain_class = UMain
+        self._config = Config
+        self._msg = Msg
+
+    def _umain(self, args):
+        return self._umain_class(self.argv(args))
+
+    @contextlib.contextmanager
+    def _serialized(self):
+        """
+        Hold the lock of the in-process commands, restoring udocker's
+        configuration and message state when released.
+        """
+        with self._lock:
+            conf = dict(self._config.conf)
+            msg_state = {attr: getattr(self._msg, attr) for attr in MSG_STATE}
+            try:
+                yield
+            finally:
+                self._config.conf.clear()
+                self._config.conf.update(conf)
+                for attr, value in msg_state.items():
+                    setattr(self._msg, attr, value)
+
+    def run(self, args, env: dict = None) -> subprocess.CompletedProcess:
+        args = list(args)
+        if env or _command_of(args) not in IN_PROCESS_COMMANDS:
+            return super().run(args, env=env)
+        with self._serialized():
+            stdout, stderr = sys.stdout, sys.stderr
+            sys.stdout, sys.stderr = _ThreadStream(stdout), _ThreadStream(stderr)
+            captured_stdout, captured_stderr = sys.stdout, sys.stderr
+            try:
+                returncode = self._umain(args).execute()
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                captured_stderr.write(f"{e}\n")
+                returncode = 1
+            finally:
+                sys.stdout, sys.stderr = stdout, stderr
+        return subprocess.CompletedProcess(
+            self.argv(args),
+            returncode or 0,
+            captured_stdout.captured.getvalue().encode(),
+            captured_stderr.captured.getvalue().encode(),
+        )
+
+    def _local_repository(self):
+        umain = self._umain(["ps"])
+        try:
+            umain._prepare_exec()
+        except SystemExit:
+            raise Exception("udocker repository is not accessible")
+        return umain.local
+
+    def containers(self):
+        with self._serialized():
+            local = self._local_repository()
+            return [
+                {
+                    "id": container_id,
+                    "names": local.get_container_name(container_id) or [],
+                    "image": image,
+                }
+                for container_id, image, _ in local.get_containers_list(False)
+            ]
+
+    def images(self):
+        with self._serialized():
+            local = self._local_repository()
+            return [f"{repo}:{tag}" for repo, tag in local.get_imagerepos()]
+
+
+def udocker_backend(executable: str, allow_root=False) -> SubprocessUdocker:
+    """
+    The in-process backend when udocker can be imported here, otherwise the
+    subprocess one.
+    """
+    try:
+        return InProcessUdocker(executable, allow_root)
+    except ImportError:
+        return SubprocessUdocker(executable, allow_root)
@@ -1,10 +1,11 @@
+import json
 import random
 import time
 import functools
-import psutil
 
 from typing import List, Type
 
+from nebulagraph_lite import ports
 
 # Thanks to https://www.learnui.design/tools/data-color-picker.html
 COLORS_hex = {
@@ -61,6 +62,7 @@ def retry(
     tries: int = 4,
     delay: int = 1,
     backoff: int = 2,
+    cancelled=None,
 ) -> None:
     """
     A decorator for retrying a function with an exponential backoff.
@@ -70,20 +72,30 @@ def retry(
     tries: Maximum number of attempts. Default is 4.
     delay: Initial delay between retries in seconds. Default is 1 second.
     backoff: Backoff multiplier. Default is 2.
+    cancelled: A function of the call's arguments returning a threading.Event,
+        once it's set the backoff ends and the last error is raised. Default
+        is None.
     """
 
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            nonlocal tries, delay
-            while tries > 1:
+            # per call copies, the wrapper may run in several threads at once
+            _tries, _delay = tries, delay
+            event = cancelled(*args, **kwargs) if cancelled is not None else None
+            while _tries > 1:
                 try:
                     return func(*args, **kwargs)
                 except exceptions as e:
-                    print(f"Retrying in {delay} seconds...", e)
-                    time.sleep(delay)
-                    tries -= 1
-                    delay *= backoff
+                    if event is not None and event.is_set():
+                        raise
+                    print(f"Retrying in {_delay} seconds...", e)
+                    if event is None:
+                        time.sleep(_delay)
+                    elif event.wait(_delay):
+                        raise
+                    _tries -= 1
+                    _delay *= backoff
             return func(*args, **kwargs)  # Last attempt without catching exceptions
 
         return wrapper
@@ -138,13 +150,12 @@ def fancy_dict_print(d: dict, color: str = None, indent: int = 0) -> None:
 
 
 def get_pid_by_port(port):
-    for conn in psutil.net_connections():
-        if conn.laddr.port == port and conn.status == "LISTEN":
-            return conn.pid
-    return None
+    return ports.get_pid_by_port(port)
 
 
 def kill_process_by_pid(pid):
+    import psutil
+
     try:
         process = psutil.Process(pid)
         process.terminate()
@@ -153,9 +164,98 @@ def kill_process_by_pid(pid):
         print(f"No process with PID {pid} exists.")
 
 
-@retry((Exception,), tries=3, delay=5, backoff=3)
+# seconds to wait for SIGKILLed processes to be gone
+KILL_WAIT = 5
+
+
+def terminate_processes(processes, grace: float) -> tuple:
+    """
+    SIGTERM the psutil processes, wait up to grace seconds for them to exit,
+    returning as soon as they all did, and SIGKILL the ones left.
+
+    Returns the processes that had to be killed and the ones that survived
+    as this process may not signal them, e.g. run by another user.
+    """
+    import psutil
+
+    alive, denied = [], []
+    for process in processes:
+        try:
+            process.terminate()
+            alive.append(process)
+        except psutil.NoSuchProcess:
+            continue
+        except psutil.AccessDenied:
+            denied.append(process)
+    _, alive = psutil.wait_procs(alive, timeout=grace)
+    killed = []
+    for process in alive:
+        try:
+            process.kill()
+            killed.append(process)
+        except psutil.NoSuchProcess:
+            continue
+        except psutil.AccessDenied:
+            denied.append(process)
+    psutil.wait_procs(killed, timeout=KILL_WAIT)
+    return killed, denied
+
+
 def process_listening_on_port(port):
-    for conn in psutil.net_connections():
-        if conn.laddr.port == port and conn.status == "LISTEN":
+    return ports.is_port_listening(port)
+
+
+# status probes target local services, they must never go through a proxy
+@functools.lru_cache(maxsize=None)
+def _no_proxy_opener():
+    import urllib.request
+
+    return urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def http_get(url: str, timeout: float = 1.0) -> bytes:
+    """
+    GET url bypassing any proxy, the services only listen locally.
+    """
+    with _no_proxy_opener().open(url, timeout=timeout) as response:
+        return response.read()
+
+
+def is_service_running(host: str, ws_http_port: int, timeout: float = 1.0) -> bool:
+    """
+    Check the /status endpoint every NebulaGraph service exposes on its
+    ws_http_port, it reports {"status": "running"} once the service is up.
+    """
+    url = f"http://{host}:{ws_http_port}/status"
+    try:
+        status = json.loads(http_get(url, timeout=timeout).decode())
+    except (OSError, ValueError):
+        return False
+    return isinstance(status, dict) and status.get("status") == "running"
+
+
+def wait_until(condition, timeout: float, interval: float = 0.5) -> bool:
+    """
+    Poll condition() until it returns True or timeout seconds have passed.
+
+    Returns whether the condition was met in time.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if condition():
             return True
-    return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(interval, remaining))
+
+
+def percentile(values, q: float) -> float:
+    """
+    Nearest-rank percentile of values, q in [0, 100], 0.0 if there are none.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
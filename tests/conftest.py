@@ -0,0 +1,134 @@
+import json
+import os
+import stat
+import sys
+
+import psutil
+import pytest
+
+from nebulagraph_lite import nebulagraph
+from nebulagraph_lite.ports import is_port_listening
+from nebulagraph_lite.udocker_backend import SubprocessUdocker
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# the ports of one metad, graphd and storaged
+SERVICE_PORTS = (9559, 19559, 9669, 19669, 9779, 19779)
+# seconds every fake udocker command takes, on top of starting Python
+DEFAULT_FAKE_LATENCY = 0.05
+
+DATASET = """\
+CREATE SPACE IF NOT EXISTS basketballplayer(partition_num=10, replica_factor=1, vid_type=fixed_string(32));
+USE basketballplayer;
+CREATE TAG IF NOT EXISTS player(name string, age int);
+CREATE EDGE IF NOT EXISTS follow(degree int);
+INSERT VERTEX player(name, age) VALUES "player100":("Tim Duncan", 42), "player101":("Tony Parker", 36);
+INSERT EDGE follow(degree) VALUES "player101"->"player100":(95);
+"""
+
+
+class FakeUdocker:
+    """
+    The fake udocker of a test, see fake_udocker.py, with the commands it
+    received.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.log_path = os.path.join(directory, "commands.jsonl")
+        self.state_dir = os.path.join(directory, "state")
+        self.executable = os.path.join(directory, "bin", "udocker")
+        os.makedirs(os.path.dirname(self.executable), exist_ok=True)
+        with open(self.executable, "w") as f:
+            f.write(
+                "#!/bin/sh\n"
+                f'exec "{sys.executable}" "{TESTS_DIR}/fake_udocker.py" "$@"\n'
+            )
+        os.chmod(self.executable, os.stat(self.executable).st_mode | stat.S_IXUSR)
+
+    def commands(self) -> list:
+        try:
+            with open(self.log_path, "r") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except OSError:
+            return []
+
+    def count(self, command: str = None) -> int:
+        return sum(
+            1 for c in self.commands() if command is None or c["command"] == command
+        )
+
+    def clear(self):
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def kill_services(self):
+        """
+        Kill the fake services still running, as a crash would.
+        """
+        processes = []
+        for record in self.commands():
+            if record["command"] != "run":
+                continue
+            try:
+                processes.append(psutil.Process(record["pid"]))
+            except psutil.NoSuchProcess:
+                continue
+        for process in processes:
+            try:
+                process.kill()
+            except psutil.NoSuchProcess:
+                pass
+        psutil.wait_procs(processes, timeout=5)
+
+
+@pytest.fixture
+def fake_udocker(tmp_path, monkeypatch):
+    busy = [port for port in SERVICE_PORTS if is_port_listening(port)]
+    if busy:
+        pytest.skip(f"ports {busy} are in use, is NebulaGraph running?")
+    fake = FakeUdocker(str(tmp_path / "udocker"))
+    monkeypatch.setenv("FAKE_UDOCKER_LOG", fake.log_path)
+    monkeypatch.setenv("FAKE_UDOCKER_STATE", fake.state_dir)
+    monkeypatch.setenv("FAKE_UDOCKER_LATENCY", str(DEFAULT_FAKE_LATENCY))
+    monkeypatch.setenv("UDOCKER_DIR", os.path.join(fake.directory, "home"))
+    monkeypatch.setenv(
+        "PATH", os.path.dirname(fake.executable) + os.pathsep + os.environ["PATH"]
+    )
+    monkeypatch.setattr(
+        nebulagraph,
+        "udocker_backend",
+        lambda executable, allow_root=False: SubprocessUdocker(
+            fake.executable, allow_root
+        ),
+    )
+    yield fake
+    fake.kill_services()
+
+
+@pytest.fixture
+def dataset_path(tmp_path) -> str:
+    path = tmp_path / "basketballplayer.ngql"
+    path.write_text(DATASET)
+    return str(path)
+
+
+@pytest.fixture
+def make_nebulagraph_let(fake_udocker, dataset_path, tmp_path):
+    """
+    Create NebulaGraphLet instances on the fake udocker, sharing a base path.
+    """
+    instances = []
+
+    def _make(**kwargs):
+        kwargs.setdefault("base_path", str(tmp_path / "lite"))
+        kwargs.setdefault("dataset_source", dataset_path)
+        kwargs.setdefault("startup_timeout", 60)
+        n = nebulagraph.NebulaGraphLet(**kwargs)
+        instances.append(n)
+        return n
+
+    yield _make
+    for n in instances:
+        n.close_pool()
+        n.supervisor.release()
@@ -0,0 +1,262 @@
+"""
+Stand-ins of metad, graphd and storaged for the startup tests.
+
+Every fake listens on its RPC port and answers /status and /stats on its
+ws_http_port like the real services. The fake graphd speaks the graph
+service thrift protocol nebula3-python uses: any statement succeeds, and
+SHOW HOSTS reports the hosts added by ADD HOSTS ONLINE once their storaged
+listens, as storaged turns ONLINE on its first heartbeat.
+"""
+
+import ctypes
+import json
+import os
+import re
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nebula3.common import ttypes as common
+from nebula3.fbthrift.protocol.THeaderProtocol import THeaderProtocolFactory
+from nebula3.fbthrift.transport import TSocket, TTransport
+from nebula3.graph import GraphService
+from nebula3.graph import ttypes as graph
+
+PR_SET_NAME = 15
+ADD_HOSTS_PATTERN = re.compile(r'"([^"]+)"\s*:\s*(\d+)')
+
+
+def set_process_name(name: str):
+    """
+    Name the process like the real binary, so that killall finds it.
+    """
+    try:
+        libc = ctypes.CDLL(None)
+        libc.prctl(PR_SET_NAME, name.encode()[:15], 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
+
+
+def is_listening(host: str, port: int) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+class _StatusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/status"):
+            body = json.dumps({"status": "running", "git_info_sha": "fake"})
+        elif self.path.startswith("/stats"):
+            uptime = time.monotonic() - self.server.started
+            body = (
+                f"num_queries.sum.60={self.server.queries}\nuptime={uptime:.1f}\n"
+            )
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_status(host: str, ws_http_port: int) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, ws_http_port), _StatusHandler)
+    server.started = time.monotonic()
+    server.queries = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _AcceptServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _IdleHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # metad and storaged clients are not emulated, hold the connection
+        try:
+            while self.request.recv(4096):
+                pass
+        except OSError:
+            pass
+
+
+class FakeGraphService(GraphService.Iface):
+    def __init__(self, state_dir: str, status_server=None):
+        self._state_file = os.path.join(state_dir, "hosts.json")
+        self._status_server = status_server
+        self._lock = threading.Lock()
+        self._sessions = 0
+
+    def _hosts(self) -> list:
+        try:
+            with open(self._state_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _add_hosts(self, hosts):
+        with self._lock:
+            known = self._hosts()
+            known += [h for h in hosts if h not in known]
+            tmp_path = f"{self._state_file}.{os.getpid()}"
+            with open(tmp_path, "w") as f:
+                json.dump(known, f)
+            os.replace(tmp_path, self._state_file)
+
+    def verifyClientVersion(self, req):
+        return graph.VerifyClientVersionResp(error_code=common.ErrorCode.SUCCEEDED)
+
+    def authenticate(self, username, password):
+        with self._lock:
+            self._sessions += 1
+            session_id = self._sessions
+        return graph.AuthResponse(
+            error_code=common.ErrorCode.SUCCEEDED,
+            session_id=session_id,
+            time_zone_offset_seconds=0,
+            time_zone_name=b"UTC",
+        )
+
+    def signout(self, sessionId):
+        pass
+
+    def _show_hosts(self) -> common.DataSet:
+        rows = [
+            common.Row(
+                values=[
+                    common.Value(sVal=host.encode()),
+                    common.Value(iVal=port),
+                    common.Value(
+                        sVal=b"ONLINE" if is_listening(host, port) else b"OFFLINE"
+                    ),
+                ]
+            )
+            for host, port in self._hosts()
+        ]
+        return common.DataSet(column_names=[b"Host", b"Port", b"Status"], rows=rows)
+
+    def executeWithParameter(self, sessionId, stmt, parameterMap):
+        statement = stmt.decode().strip()
+        if self._status_server is not None:
+            self._status_server.queries += 1
+        data = None
+        if statement.upper().startswith("ADD HOSTS"):
+            self._add_hosts(
+                [
+                    [host, int(port)]
+                    for host, port in ADD_HOSTS_PATTERN.findall(statement)
+                ]
+            )
+        elif statement.upper().startswith("SHOW HOSTS"):
+            data = self._show_hosts()
+        return graph.ExecutionResponse(
+            error_code=common.ErrorCode.SUCCEEDED,
+            latency_in_us=100,
+            data=data,
+        )
+
+    def execute(self, sessionId, stmt):
+        return self.executeWithParameter(sessionId, stmt, {})
+
+    def executeJsonWithParameter(self, sessionId, stmt, parameterMap):
+        self.executeWithParameter(sessionId, stmt, parameterMap)
+        return json.dumps(
+            {"errors": [{"code": 0}], "results": [{"columns": [], "data": []}]}
+        ).encode()
+
+    def executeJson(self, sessionId, stmt):
+        return self.executeJsonWithParameter(sessionId, stmt, {})
+
+
+def serve_graph(host: str, port: int, handler: FakeGraphService):
+    processor = GraphService.Processor(handler)
+    protocol_factory = THeaderProtocolFactory()
+
+    class _ThriftHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            client = TSocket.TSocket()
+            client.setHandle(self.request)
+            protocol = protocol_factory.getProtocol(client)
+            try:
+                while True:
+                    processor.process(protocol, protocol, None)
+            except (TTransport.TTransportException, OSError):
+                pass
+
+    server = _AcceptServer((host, port), _ThriftHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _flag(args, name: str, default=None):
+    prefix = f"--{name}="
+    for arg in args:
+        if arg.startswith(prefix):
+            return arg[len(prefix) :]
+    return default
+
+
+def _glog_time() -> str:
+    now = time.time()
+    return time.strftime("%Y%m%d %H:%M:%S", time.localtime(now)) + (
+        f".{int(now % 1 * 1e6):06d}"
+    )
+
+
+def run_service(service: str, args, state_dir: str, volumes: dict = None):
+    """
+    Serve as service with its command line flags until SIGTERM, volumes maps
+    container paths to host ones.
+
+    FAKE_CRASH naming the service makes it exit with code 1 instead,
+    FAKE_FATAL_LOG makes it log a glog FATAL line to its /logs and hang,
+    FAKE_IGNORE_SIGTERM makes it run until killed. FAKE_SERVICE_DELAY seconds
+    pass before it listens.
+    """
+    set_process_name(f"nebula-{service}")
+    if service in os.environ.get("FAKE_CRASH", "").split(","):
+        print(f"F{_glog_time()} fake {service} crashed on purpose", file=sys.stderr)
+        sys.exit(1)
+    if service in os.environ.get("FAKE_FATAL_LOG", "").split(","):
+        # logs a fatal line and hangs, as a service stuck on a failed check
+        log_path = os.path.join(
+            (volumes or {}).get("/logs", state_dir),
+            f"nebula-{service}.fake.log.INFO.{os.getpid()}",
+        )
+        with open(log_path, "a") as f:
+            f.write(f"F{_glog_time()} Check failed: fake {service} is stuck\n")
+        threading.Event().wait()
+    time.sleep(float(os.environ.get("FAKE_SERVICE_DELAY", "0")))
+
+    host = _flag(args, "local_ip", "127.0.0.1")
+    port = int(_flag(args, "port"))
+    status_server = serve_status(host, int(_flag(args, "ws_http_port")))
+    if service == "graphd":
+        serve_graph(host, port, FakeGraphService(state_dir, status_server))
+    else:
+        server = _AcceptServer((host, port), _IdleHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stopped = threading.Event()
+    if service in os.environ.get("FAKE_IGNORE_SIGTERM", "").split(","):
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    else:
+        signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    while not stopped.wait(0.1):
+        pass
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+A udocker stand-in for the startup tests, no network nor containers.
+
+Every invocation is appended to $FAKE_UDOCKER_LOG as a JSON line of its
+argv, command and wall-clock span. $FAKE_UDOCKER_LATENCY seconds are spent
+in every command, $FAKE_UDOCKER_LATENCIES ({"pull": 0.5, ...}) sets them
+per command. Images and containers are kept in $FAKE_UDOCKER_STATE, `run`
+of a nebula-{service} container becomes the fake service, see
+fake_services.run_service.
+"""
+
+import json
+import os
+import sys
+import tarfile
+import time
+import uuid
+
+from urllib.parse import quote, unquote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+GLOBAL_OPTIONS = {"--allow-root", "--debug", "--quiet", "-q", "-D"}
+# options of udocker run taking a separate value
+RUN_VALUE_OPTIONS = {"-v", "--volume", "-e", "--env", "-w", "--workdir"}
+PS_HEADER = "CONTAINER ID                         P M NAMES              IMAGE"
+
+
+def _state_dir() -> str:
+    path = os.environ.get("FAKE_UDOCKER_STATE") or os.path.expanduser(
+        "~/.fake_udocker"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# a file per image and per container, as udocker's repository, so that
+# parallel commands don't overwrite each other
+def _load(kind: str) -> dict:
+    directory = os.path.join(_state_dir(), kind)
+    entries = {}
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else ():
+        if name.endswith(".tmp"):
+            continue
+        try:
+            with open(os.path.join(directory, name), "r") as f:
+                entries[unquote(name)] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return entries
+
+
+def _save(kind: str, key: str, content: dict):
+    directory = os.path.join(_state_dir(), kind)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, quote(key, safe=""))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(content, f)
+    os.replace(tmp_path, path)
+
+
+def _delete(kind: str, key: str):
+    try:
+        os.remove(os.path.join(_state_dir(), kind, quote(key, safe="")))
+    except OSError:
+        pass
+
+
+def _log(record: dict):
+    path = os.environ.get("FAKE_UDOCKER_LOG")
+    if not path:
+        return
+    # one write per record, appends of a line are not interleaved
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, (json.dumps(record) + "\n").encode())
+    finally:
+        os.close(fd)
+
+
+def _latency(command: str) -> float:
+    latencies = json.loads(os.environ.get("FAKE_UDOCKER_LATENCIES") or "{}")
+    return float(latencies.get(command, os.environ.get("FAKE_UDOCKER_LATENCY", 0)))
+
+
+def _split(argv):
+    rest = [arg for arg in argv if arg not in GLOBAL_OPTIONS]
+    if not rest:
+        return "", []
+    return rest[0], rest[1:]
+
+
+def _positional(args):
+    return [arg for arg in args if not arg.startswith("-")]
+
+
+def _container_root(container_id: str) -> str:
+    return os.path.join(_state_dir(), "roots", container_id, "ROOT")
+
+
+def _find_container(containers: dict, name_or_id: str):
+    for container_id, container in containers.items():
+        if name_or_id == container_id or name_or_id in container["names"]:
+            return container_id
+    return None
+
+
+def cmd_pull(args):
+    for image in _positional(args):
+        _save(
+            "images", image, {"digest": uuid.uuid5(uuid.NAMESPACE_URL, image).hex}
+        )
+    return 0
+
+
+def cmd_load(args):
+    # a docker save tar from -i or stdin, its manifest.json names the images
+    path = args[args.index("-i") + 1] if "-i" in args else None
+    try:
+        with (
+            tarfile.open(path, "r:*")
+            if path
+            else tarfile.open(fileobj=sys.stdin.buffer, mode="r|*")
+        ) as image_tar:
+            manifest = None
+            for member in image_tar:
+                if member.name == "manifest.json":
+                    manifest = json.load(image_tar.extractfile(member))
+    except (OSError, tarfile.TarError, ValueError) as e:
+        print(f"Error: load failed: {e}", file=sys.stderr)
+        return 1
+    if not manifest:
+        print("Error: load failed: no manifest.json", file=sys.stderr)
+        return 1
+    for entry in manifest:
+        for image in entry.get("RepoTags", []):
+            _save("images", image, {"digest": entry.get("Config", image)})
+            print(image)
+    return 0
+
+
+def cmd_images(args):
+    print("REPOSITORY")
+    for image in sorted(_load("images")):
+        print(f"{image}    .")
+    return 0
+
+
+def cmd_inspect(args):
+    targets = _positional(args)
+    if not targets:
+        return 1
+    if "-p" in args:
+        container_id = _find_container(_load("containers"), targets[0])
+        if container_id is None:
+            return 1
+        print(_container_root(container_id))
+        return 0
+    image = _load("images").get(targets[0])
+    if image is None:
+        print(f"Error: image not found: {targets[0]}", file=sys.stderr)
+        return 1
+    print(json.dumps({"id": image["digest"], "config": {}}))
+    return 0
+
+
+def cmd_create(args):
+    name = next(
+        (arg.split("=", 1)[1] for arg in args if arg.startswith("--name=")), None
+    )
+    images = _positional(args)
+    if not images or images[0] not in _load("images"):
+        print("Error: image not found", file=sys.stderr)
+        return 1
+    containers = _load("containers")
+    if name is not None and _find_container(containers, name) is not None:
+        print(f"Error: container name already exists: {name}", file=sys.stderr)
+        return 1
+    container_id = str(uuid.uuid4())
+    os.makedirs(_container_root(container_id), exist_ok=True)
+    _save(
+        "containers",
+        container_id,
+        {"names": [name] if name else [], "image": images[0]},
+    )
+    print(container_id)
+    return 0
+
+
+def cmd_setup(args):
+    containers = _load("containers")
+    targets = _positional(args)
+    if not targets or _find_container(containers, targets[-1]) is None:
+        print("Error: container not found", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_ps(args):
+    print(PS_HEADER)
+    for container_id, container in _load("containers").items():
+        print(
+            "%-36.36s %c %c %-18.100s %-20.100s"
+            % (container_id, ".", "W", str(container["names"]), container["image"])
+        )
+    return 0
+
+
+def cmd_rm(args):
+    containers = _load("containers")
+    for target in _positional(args):
+        container_id = _find_container(containers, target)
+        if container_id is not None:
+            _delete("containers", container_id)
+    return 0
+
+
+def cmd_run(args):
+    i, container, volumes = 0, None, {}
+    while i < len(args):
+        if args[i] in RUN_VALUE_OPTIONS:
+            if args[i] in ("-v", "--volume") and i + 1 < len(args):
+                host_path, _, container_path = args[i + 1].partition(":")
+                volumes[container_path or host_path] = host_path
+            i += 2
+            continue
+        if args[i].startswith("-"):
+            i += 1
+            continue
+        container = args[i]
+        break
+    if container is None or _find_container(_load("containers"), container) is None:
+        print(f"Error: container not found: {container}", file=sys.stderr)
+        return 1
+    import fake_services
+
+    # nebula-{service} or nebula-{namespace}-{service}
+    service = container.rsplit("-", 1)[-1]
+    fake_services.run_service(service, args[i + 1 :], _state_dir(), volumes)
+    return 0
+
+
+def cmd_version(args):
+    print("version: 1.3.13")
+    print("tarball: fake")
+    return 0
+
+
+def cmd_install(args):
+    udocker_dir = os.environ.get("UDOCKER_DIR")
+    if udocker_dir:
+        os.makedirs(os.path.join(udocker_dir, "bin"), exist_ok=True)
+    return 0
+
+
+COMMANDS = {
+    "create": cmd_create,
+    "images": cmd_images,
+    "inspect": cmd_inspect,
+    "install": cmd_install,
+    "load": cmd_load,
+    "ps": cmd_ps,
+    "pull": cmd_pull,
+    "rm": cmd_rm,
+    "run": cmd_run,
+    "setup": cmd_setup,
+    "version": cmd_version,
+}
+
+
+def main(argv) -> int:
+    command, args = _split(argv)
+    started = time.time()
+    record = {
+        "argv": argv,
+        "command": command,
+        "pid": os.getpid(),
+        "start": started,
+    }
+    if command == "run":
+        # runs until stopped, it's recorded when it starts
+        _log(record)
+    time.sleep(_latency(command))
+    handler = COMMANDS.get(command)
+    if handler is None:
+        print(f"Error: invalid command: {command}", file=sys.stderr)
+        code = 1
+    else:
+        code = handler(args)
+    if command != "run":
+        record.update(end=time.time(), code=code)
+        _log(record)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
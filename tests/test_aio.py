@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from nebulagraph_lite.aio import AsyncNebulaGraphLet
+from nebulagraph_lite.ports import is_port_listening
+
+from .conftest import SERVICE_PORTS
+
+CANCEL_BUDGET = 5.0
+
+
+@pytest.fixture
+def make_async_nebulagraph_let(make_nebulagraph_let):
+    def _make(**kwargs):
+        return AsyncNebulaGraphLet(make_nebulagraph_let(**kwargs))
+
+    return _make
+
+
+def test_start_does_not_block_the_loop(make_async_nebulagraph_let, fake_udocker):
+    n = make_async_nebulagraph_let()
+
+    async def _main():
+        ticks = 0
+
+        async def _tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(_tick())
+        assert not await n.is_ready()
+        await n.start()
+        ticker.cancel()
+        assert await n.is_ready()
+        assert (await n.execute("SHOW HOSTS")).is_succeeded()
+        return ticks
+
+    assert asyncio.run(_main()) > 10
+
+
+def test_cancelled_start_stops_services(
+    make_async_nebulagraph_let, fake_udocker, monkeypatch
+):
+    # the services never come up in time, start() is still waiting for them
+    monkeypatch.setenv("FAKE_SERVICE_DELAY", "30")
+    n = make_async_nebulagraph_let(stop_grace={"storaged": 1, "metad": 1})
+
+    async def _main():
+        task = asyncio.ensure_future(n.start())
+        while not fake_udocker.count("run"):
+            await asyncio.sleep(0.1)
+        started = time.monotonic()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return time.monotonic() - started
+
+    assert asyncio.run(_main()) < CANCEL_BUDGET
+    assert not any(is_port_listening(port) for port in SERVICE_PORTS)
+
+
+def test_instances_start_concurrently(
+    make_async_nebulagraph_let, fake_udocker, tmp_path
+):
+    first, second = (
+        make_async_nebulagraph_let(host=host, base_path=str(tmp_path / name))
+        for host, name in (("127.0.0.1", "first"), ("127.0.0.2", "second"))
+    )
+    probed = []
+    for n in (first, second):
+        is_service_ready = n._is_service_ready
+
+        async def _is_service_ready(port, ws_http_port, _probe=is_service_ready):
+            probed.append(port)
+            return await _probe(port, ws_http_port)
+
+        n._is_service_ready = _is_service_ready
+
+    async def _main():
+        await asyncio.gather(first.start(), second.start())
+        # the startup waited for the services with the async probes
+        assert probed
+        assert await first.is_ready() and await second.is_ready()
+        await asyncio.gather(first.stop(), second.stop())
+
+    asyncio.run(_main())
+    containers = [c["names"] for c in first.lite._udocker.containers()]
+    assert len(containers) == 6
+    assert not any(is_port_listening(port) for port in SERVICE_PORTS)
+    assert not any(is_port_listening(port, "127.0.0.2") for port in SERVICE_PORTS)
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from nebulagraph_lite.bench import (
+    Benchmark,
+    compare,
+    latency_summary,
+    load_workload,
+)
+
+
+def _result(query, concurrency, p95_ms, qps):
+    return {
+        "query": query,
+        "concurrency": concurrency,
+        "p95_ms": p95_ms,
+        "qps": qps,
+    }
+
+
+def test_latency_summary():
+    # 1ms to 100ms
+    summary = latency_summary([i / 1000 for i in range(100, 0, -1)])
+    assert summary["p50_ms"] == pytest.approx(50)
+    assert summary["p95_ms"] == pytest.approx(95)
+    assert summary["p99_ms"] == pytest.approx(99)
+    assert summary["max_ms"] == pytest.approx(100)
+    assert summary["mean_ms"] == pytest.approx(50.5)
+    assert set(latency_summary([]).values()) == {0.0}
+
+
+def test_compare():
+    baseline = {
+        "results": [
+            _result("go", 1, 10.0, 100.0),
+            _result("go", 4, 20.0, 300.0),
+            _result("match", 1, 0.0, 0.0),
+        ]
+    }
+    report = {
+        "results": [
+            # within the 10% threshold
+            _result("go", 1, 10.9, 91.0),
+            _result("go", 4, 25.0, 200.0),
+            # no baseline to compare with
+            _result("go", 16, 99.0, 1.0),
+            _result("match", 1, 5.0, 10.0),
+        ]
+    }
+    regressions = compare(report, baseline, threshold=0.1)
+
+    assert [(r["query"], r["concurrency"], r["metric"]) for r in regressions] == [
+        ("go", 4, "p95_ms"),
+        ("go", 4, "qps"),
+    ]
+    assert regressions[0]["baseline"] == 20.0
+    assert regressions[0]["current"] == 25.0
+    assert compare(report, baseline, threshold=0.5) == []
+
+
+def test_load_workload(tmp_path):
+    path = tmp_path / "workload.json"
+    path.write_text(json.dumps({"queries": [{"statement": "SHOW HOSTS"}]}))
+    workload = load_workload(str(path))
+    assert workload["queries"][0]["name"] == "query-0"
+    assert workload["name"] == str(path)
+
+    path.write_text(json.dumps({"queries": [{"name": "empty"}]}))
+    with pytest.raises(Exception, match="has no statement"):
+        load_workload(str(path))
+
+
+class _Result:
+    def __init__(self, error=None):
+        self._error = error
+
+    def is_succeeded(self):
+        return self._error is None
+
+    def error_msg(self):
+        return self._error
+
+
+class _Session:
+    def __init__(self):
+        self.calls = 0
+
+    def execute(self, statement):
+        self.calls += 1
+        if statement.startswith("USE"):
+            return _Result()
+        # a connection that drops on every third query
+        if self.calls % 3 == 0:
+            raise IOError("connection dropped")
+        return _Result()
+
+    def release(self):
+        pass
+
+
+class _Pool:
+    def get_session(self, user, password):
+        return _Session()
+
+
+def test_run_counts_exceptions_as_failures():
+    workload = {"space": "s", "queries": [{"name": "q", "statement": "GO"}]}
+    report = Benchmark(
+        _Pool(), workload, concurrency=(1, 2), iterations=30, warmup=3
+    ).run()
+
+    assert [r["concurrency"] for r in report["results"]] == [1, 2]
+    for result in report["results"]:
+        assert result["failed"] == 10
+        assert result["error"] == "connection dropped"
+        assert result["qps"] > 0
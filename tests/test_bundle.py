@@ -0,0 +1,97 @@
+import io
+import json
+import os
+import tarfile
+import time
+
+from urllib.parse import quote
+
+import pytest
+
+from nebulagraph_lite.bundle import BUNDLE_IMAGES, BundleLoader
+
+LOAD_LATENCY = 0.5
+
+
+def _add(tar, name: str, content: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mtime = 1700000000
+    tar.addfile(info, io.BytesIO(content))
+
+
+def _image_tar(image: str) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        _add(tar, "config.json", b"{}")
+        _add(
+            tar,
+            "manifest.json",
+            json.dumps([{"Config": "config.json", "RepoTags": [image]}]).encode(),
+        )
+    return buffer.getvalue()
+
+
+def _bundle(tmp_path, broken=()) -> str:
+    path = tmp_path / "nebulagraph_lite.tgz"
+    with tarfile.open(path, "w:gz") as bundle:
+        _add(bundle, "README.txt", b"images of nebulagraph_lite\n")
+        for member, image in BUNDLE_IMAGES.items():
+            _add(
+                bundle,
+                member,
+                b"not a tar" if image in broken else _image_tar(image),
+            )
+    return str(path)
+
+
+@pytest.fixture
+def loader(make_nebulagraph_let, fake_udocker, monkeypatch):
+    monkeypatch.setenv("FAKE_UDOCKER_LATENCIES", json.dumps({"load": LOAD_LATENCY}))
+    n = make_nebulagraph_let()
+    return BundleLoader(n._udocker, n._bootstrap, n.base_path)
+
+
+def test_loads_in_parallel_then_skips(loader, fake_udocker, tmp_path):
+    bundle = _bundle(tmp_path)
+    started = time.monotonic()
+    results = loader.load(bundle)
+
+    # one load at a time would take 4 latencies, on top of starting the
+    # fake udocker for every command
+    assert time.monotonic() - started < 3 * LOAD_LATENCY
+    assert results == {image: "loaded" for image in BUNDLE_IMAGES.values()}
+    assert fake_udocker.count("load") == 4
+    assert set(BUNDLE_IMAGES.values()) <= set(loader.udocker.images())
+    # the other members are extracted, as before
+    assert (tmp_path / "lite" / "README.txt").exists()
+
+    assert loader.load(bundle) == {
+        image: "skipped" for image in BUNDLE_IMAGES.values()
+    }
+    assert fake_udocker.count("load") == 4
+
+
+def test_reports_the_failing_image(loader, tmp_path):
+    with pytest.raises(Exception, match="failed to load vesoft/nebula-graphd:v3 "):
+        loader.load(_bundle(tmp_path, broken=["vesoft/nebula-graphd:v3"]))
+
+    # the others are loaded and skipped next time
+    results = loader.load(_bundle(tmp_path))
+    assert results["vesoft/nebula-graphd:v3"] == "loaded"
+    assert results["vesoft/nebula-metad:v3"] == "skipped"
+
+
+def test_reloads_a_replaced_image(loader, fake_udocker, tmp_path):
+    bundle = _bundle(tmp_path)
+    loader.load(bundle)
+
+    # another image under the tag, e.g. pulled since
+    path = os.path.join(
+        fake_udocker.state_dir, "images", quote("vesoft/nebula-graphd:v3", safe="")
+    )
+    with open(path, "w") as f:
+        json.dump({"digest": "pulled.json"}, f)
+    results = loader.load(bundle)
+    assert results["vesoft/nebula-graphd:v3"] == "loaded"
+    assert results["vesoft/nebula-metad:v3"] == "skipped"
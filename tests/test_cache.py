@@ -0,0 +1,26 @@
+import json
+import platform
+
+from nebulagraph_lite.cache import ContainerCache
+
+
+def test_image_digest_is_the_image_id():
+    image_json = json.dumps({"id": "0123abcd", "config": {"Env": []}})
+    assert ContainerCache.image_digest(image_json.encode()) == "sha256:0123abcd"
+    # however inspect formats it
+    reformatted = json.dumps(json.loads(image_json), indent=4)
+    assert ContainerCache.image_digest(reformatted.encode()) == "sha256:0123abcd"
+
+
+def test_image_digest_without_an_id():
+    compact = ContainerCache.image_digest(b'{"config":{"a":1,"b":2}}')
+    spaced = ContainerCache.image_digest(b'{\n  "config": {"b": 2, "a": 1}\n}')
+    assert compact == spaced
+    assert compact.startswith("sha256:")
+    assert ContainerCache.image_digest(b"Error: image not found") is None
+
+
+def test_fingerprint_without_libc(monkeypatch):
+    monkeypatch.setattr(platform, "libc_ver", lambda: ("", ""))
+    fingerprint = ContainerCache.fingerprint("sha256:0123abcd", "F1", "1.3.17")
+    assert fingerprint["libc"] == "unknown"
@@ -0,0 +1,96 @@
+"""
+Import-time and latency budgets of the CLI control path, scripts call
+`nebulagraph version`, `status` or `stop` in loops.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from nebulagraph_lite import nebulagraph
+from nebulagraph_lite.cache import BootstrapState
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+
+IMPORT_BUDGET = 0.5
+VERSION_BUDGET = 0.5
+STOP_BUDGET = 1.0
+STATUS_BUDGET = 1.0
+
+# imported by the features that need them only
+DEFERRED_MODULES = ("nebula3", "psutil", "udocker", "IPython", "modelscope")
+
+
+def _python(*args, env=None, returncode=0):
+    started = time.monotonic()
+    result = subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": SRC_DIR, **(env or {})},
+    )
+    assert result.returncode == returncode, result.stderr
+    return result.stdout, time.monotonic() - started
+
+
+def test_import_defers_heavy_modules():
+    stdout, seconds = _python(
+        "-c",
+        "import sys, nebulagraph_lite.cli; "
+        f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])",
+    )
+    assert stdout.strip() == "[]"
+    assert seconds < IMPORT_BUDGET
+
+
+def test_version_budget():
+    stdout, seconds = _python("-m", "nebulagraph_lite.cli", "version")
+    assert stdout.strip()
+    assert seconds < VERSION_BUDGET
+
+
+def test_stop_budget(fake_udocker, tmp_path):
+    base_path = tmp_path / "lite"
+    _, seconds = _python("-m", "nebulagraph_lite.cli", "-b", str(base_path), "stop")
+    assert seconds < STOP_BUDGET
+    # stop needs neither the data folders nor udocker
+    assert not base_path.exists()
+    assert fake_udocker.count() == 0
+
+
+def test_status_budget(fake_udocker, tmp_path):
+    base_path = tmp_path / "lite"
+    # nothing was started, status exits non-zero
+    stdout, seconds = _python(
+        "-m", "nebulagraph_lite.cli", "-b", str(base_path), "status", returncode=1
+    )
+    assert "stopped" in stdout
+    assert seconds < STATUS_BUDGET
+    assert fake_udocker.count() == 0
+
+
+def test_construction_is_lazy(tmp_path, monkeypatch):
+    def _no_udocker(*args, **kwargs):
+        raise AssertionError("udocker located on construction")
+
+    monkeypatch.setattr(nebulagraph, "udocker_backend", _no_udocker)
+    n = nebulagraph.NebulaGraphLet(base_path=str(tmp_path / "lite"))
+
+    assert not (tmp_path / "lite").exists()
+    assert n.modelscope_file is None
+
+
+def test_bootstrap_state_is_keyed(tmp_path, monkeypatch):
+    state = BootstrapState(str(tmp_path / "bootstrap.json"))
+    state.put("udocker_path", "/opt/bin")
+    state.put("udocker_install", True, {"mtime": 1.5})
+
+    reloaded = BootstrapState(state.path)
+    assert reloaded.get("udocker_path") == "/opt/bin"
+    assert reloaded.get("udocker_install", {"mtime": 1.5})
+    # udocker changed since
+    assert reloaded.get("udocker_install", {"mtime": 2.5}) is None
+
+    monkeypatch.setattr(sys, "executable", "/another/python")
+    assert BootstrapState(state.path).get("udocker_path") is None
@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+import pytest
+
+from nebulagraph_lite.dataset import DatasetCache
+
+NAME = "basketballplayer.ngql"
+
+
+def _source(tmp_path, directory: str, content: str) -> str:
+    path = tmp_path / directory / NAME
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(content)
+    return str(path)
+
+
+def _blobs(cache) -> list:
+    return os.listdir(os.path.join(cache.directory, "sha256"))
+
+
+def test_reuses_the_cached_content(tmp_path):
+    cache = DatasetCache(str(tmp_path / "data_set"))
+    source = _source(tmp_path, "upstream", "SHOW SPACES;\n")
+    path = cache.fetch(NAME, [source])
+
+    os.remove(source)
+    assert cache.fetch(NAME, [source]) == path
+    assert open(path).read() == "SHOW SPACES;\n"
+
+
+def test_upstream_changes_once_the_cache_is_gone(tmp_path):
+    cache = DatasetCache(str(tmp_path / "data_set"))
+    source = _source(tmp_path, "upstream", "SHOW SPACES;\n")
+    cache.fetch(NAME, [source])
+
+    # the digest of the first fetch is no pin
+    _source(tmp_path, "upstream", "SHOW HOSTS;\n")
+    for blob in _blobs(cache):
+        os.remove(os.path.join(cache.directory, "sha256", blob))
+    assert open(cache.fetch(NAME, [source])).read() == "SHOW HOSTS;\n"
+
+
+def test_another_source_is_fetched(tmp_path):
+    cache = DatasetCache(str(tmp_path / "data_set"))
+    cache.fetch(NAME, [_source(tmp_path, "upstream", "SHOW SPACES;\n")])
+
+    local = _source(tmp_path, "local", "SHOW HOSTS;\n")
+    assert open(cache.fetch(NAME, [local])).read() == "SHOW HOSTS;\n"
+    assert len(_blobs(cache)) == 2
+
+
+def test_pinned_digest(tmp_path):
+    cache = DatasetCache(str(tmp_path / "data_set"))
+    source = _source(tmp_path, "upstream", "SHOW SPACES;\n")
+    pinned = hashlib.sha256(b"SHOW HOSTS;\n").hexdigest()
+
+    with pytest.raises(Exception, match="Failed to fetch dataset"):
+        cache.fetch(NAME, [source], sha256=pinned)
+    _source(tmp_path, "upstream", "SHOW HOSTS;\n")
+    assert (
+        open(cache.fetch(NAME, [source], sha256=pinned)).read() == "SHOW HOSTS;\n"
+    )
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from nebulagraph_lite.importer import (
+    CsvImporter,
+    parse_header,
+    read_chunks,
+    value_formatter,
+)
+
+
+class _Result:
+    def is_succeeded(self):
+        return True
+
+
+class _Session:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return _Result()
+
+    def release(self):
+        pass
+
+
+class _Pool:
+    def __init__(self):
+        self.statements = []
+        self._lock = threading.Lock()
+
+    def get_session(self, user, password):
+        return _Session(self.statements)
+
+
+def _importer(pool, **kwargs):
+    return CsvImporter(pool, "basketballplayer", progress=False, **kwargs)
+
+
+def test_value_formatters():
+    assert parse_header(["id", "name:string", "age:int"]) == (
+        ["id", "name", "age"],
+        ["string", "string", "int"],
+    )
+    assert value_formatter("string")('say "hi"\n') == '"say \\"hi\\"\\n"'
+    assert value_formatter("int")(" 42 ") == "42"
+    assert value_formatter("bool")("TRUE") == "true"
+    assert value_formatter("double")("") == "NULL"
+    assert value_formatter("date")("2024-01-01") == 'date("2024-01-01")'
+    assert value_formatter("timestamp")("1700000000") == "1700000000"
+
+
+def test_import_vertices_and_edges(tmp_path):
+    players = tmp_path / "player.csv"
+    players.write_text('id,name:string,age:int\np1,"Duncan, Tim",42\np2,Tony,\n')
+    follows = tmp_path / "follow.csv"
+    follows.write_text("src,dst,rank,degree:int\np2,p1,0,95\n")
+    pool = _Pool()
+
+    vertices = _importer(pool).import_vertices(str(players), "player")
+    edges = _importer(pool).import_edges(str(follows), "follow", rank_field="rank")
+    assert (vertices["rows"], edges["rows"]) == (2, 1)
+    inserts = [s for s in pool.statements if s.startswith("INSERT")]
+    assert inserts == [
+        "INSERT VERTEX `player`(`name`, `age`) VALUES "
+        '"p1":("Duncan, Tim", 42), "p2":("Tony", NULL);',
+        'INSERT EDGE `follow`(`degree`) VALUES "p2"->"p1"@0:(95);',
+    ]
+
+
+def test_rows_are_chunked(tmp_path):
+    path = tmp_path / "player.csv"
+    path.write_text("id\n" + "".join(f"p{i}\n" for i in range(5)))
+    chunks = list(read_chunks(str(path), 2))
+    assert chunks[0] == ["id"]
+    assert [len(chunk) for chunk in chunks[1:]] == [2, 2, 1]
+
+
+@pytest.mark.parametrize("row", ["player2,Tony", "player2,Tony,36,extra"])
+def test_rows_must_match_the_header(tmp_path, row):
+    path = tmp_path / "player.csv"
+    path.write_text(f"id,name:string,age:int\nplayer1,Tim,42\n{row}\n")
+    with pytest.raises(
+        ValueError, match=r"player\.csv:3: \d cells, the header has 3"
+    ):
+        _importer(_Pool()).import_vertices(str(path), "player")
@@ -0,0 +1,141 @@
+from nebulagraph_lite.loader import (
+    NgqlLoader,
+    batch_statements,
+    count_rows,
+    parse_ngql,
+)
+from nebulagraph_lite.profiler import PhaseProfiler
+
+
+def _inserts(*rows):
+    return [
+        ("statement", f'INSERT VERTEX player(name) VALUES "{vid}":("{name}");')
+        for vid, name in rows
+    ]
+
+
+def test_count_rows():
+    assert count_rows('"p1":("Tim", 42)') == 1
+    assert count_rows('"p1":("Duncan, Tim", 42), "p2":("Tony", 36)') == 2
+    assert count_rows('"p1"->"p2":(95), "p2"->"p1":(\'a, \\\'b\')') == 2
+
+
+def test_batches_consecutive_inserts():
+    items = (
+        [("statement", "USE basketballplayer;")]
+        + _inserts(("p1", "Tim"), ("p2", "Tony"), ("p3", "Manu"))
+        + [("sleep", 1)]
+        + _inserts(("p4", "Kobe"))
+    )
+    batched = list(batch_statements(items, batch_size=2))
+
+    assert [kind for kind, _ in batched] == [
+        "statement",
+        "batch",
+        "batch",
+        "sleep",
+        "batch",
+    ]
+    assert batched[1][1].rows == 2
+    assert batched[1][1].statement == (
+        'INSERT VERTEX player(name) VALUES "p1":("Tim"), "p2":("Tony");'
+    )
+    assert batched[2][1].rows == 1
+    assert batched[4][1].rows == 1
+
+
+def test_batches_break_on_another_schema():
+    items = _inserts(("p1", "Tim")) + [
+        ("statement", 'INSERT EDGE follow(degree) VALUES "p1"->"p2":(95);'),
+        ("statement", 'INSERT   EDGE follow(degree)  VALUES "p2"->"p1":(90);'),
+    ]
+    batched = [item for _, item in batch_statements(items)]
+
+    assert [batch.key for batch in batched] == [
+        ("VERTEX", "player(name)"),
+        ("EDGE", "follow(degree)"),
+    ]
+    # however the statements were spaced
+    assert batched[1].rows == 2
+
+
+def test_parse_statements_and_directives():
+    lines = [
+        "# the schema\n",
+        "CREATE SPACE s(partition_num=10, vid_type=INT64); USE s;\n",
+        ":sleep 2\n",
+        "CREATE TAG player(\n",
+        "  name string,\n",
+        "  age int\n",
+        ");\n",
+        'INSERT VERTEX player(name, age) VALUES 1:("semi; colon", 42);\n',
+    ]
+    assert list(parse_ngql(lines, partition_num=3)) == [
+        ("statement", "CREATE SPACE s(partition_num=3, vid_type=INT64);"),
+        ("statement", "USE s;"),
+        ("sleep", 2),
+        ("statement", "CREATE TAG player(\n  name string,\n  age int\n);"),
+        (
+            "statement",
+            'INSERT VERTEX player(name, age) VALUES 1:("semi; colon", 42);',
+        ),
+    ]
+
+
+def test_parse_lines_without_semicolons():
+    # one statement per line, as files without `;` were always loaded
+    lines = ["SHOW SPACES\n", "SHOW HOSTS\n", ":sleep 1\n", "USE s\n"]
+    assert list(parse_ngql(lines)) == [
+        ("statement", "SHOW SPACES"),
+        ("statement", "SHOW HOSTS"),
+        ("sleep", 1),
+        ("statement", "USE s"),
+    ]
+
+
+def test_parse_continued_lines_without_semicolons():
+    lines = [
+        "MATCH (v:player)\n",
+        "  RETURN v\n",
+        'INSERT VERTEX player(name) VALUES 1:("Tim"),\n',
+        '2:("Tony")\n',
+        "SHOW HOSTS",
+    ]
+    assert list(parse_ngql(lines)) == [
+        ("statement", "MATCH (v:player)\n  RETURN v"),
+        ("statement", 'INSERT VERTEX player(name) VALUES 1:("Tim"),\n2:("Tony")'),
+        ("statement", "SHOW HOSTS"),
+    ]
+
+
+class _Result:
+    def is_succeeded(self):
+        return True
+
+
+class _Session:
+    def execute(self, statement):
+        return _Result()
+
+    def release(self):
+        pass
+
+
+class _Pool:
+    def get_session(self, user, password):
+        return _Session()
+
+
+def test_load_records_one_profiler_phase():
+    profiler = PhaseProfiler()
+    loader = NgqlLoader(_Pool(), batch_size=1, concurrency=2, profiler=profiler)
+    items = [("statement", "USE s;")] + _inserts(
+        *[(f"p{i}", "Tim") for i in range(200)]
+    )
+    stats = loader.load(items)
+
+    assert stats["batches"] == stats["rows"] == 200
+    [event] = profiler.events
+    assert event["name"] == "load"
+    assert event["counters"]["rows"] == 200
+    assert event["counters"]["statements"] == 1
@@ -0,0 +1,56 @@
+import os
+
+from nebulagraph_lite.logs import LogFollower
+
+
+def _append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def test_follows_incrementally(tmp_path):
+    log = tmp_path / "nebula-graphd.host.root.log.INFO.1"
+    _append(log, "I0101 00:00:00.000000 first\nI0101 00:00:00.000000 sec")
+    follower = LogFollower({"graphd": str(tmp_path)})
+
+    assert follower.poll() == [("graphd", "I0101 00:00:00.000000 first")]
+    _append(log, "ond\n")
+    assert follower.poll() == [("graphd", "I0101 00:00:00.000000 second")]
+    assert follower.poll() == []
+
+
+def test_from_end_rotation_and_truncation(tmp_path):
+    old = tmp_path / "nebula-metad.host.root.log.INFO.1"
+    _append(old, "old line\n")
+    follower = LogFollower({"metad": str(tmp_path)}, from_end=True)
+    assert follower.poll() == []
+
+    # glog rotates to a new file, re-pointing its symlink
+    new = tmp_path / "nebula-metad.host.root.log.INFO.2"
+    _append(new, "rotated line\n")
+    os.symlink(new.name, tmp_path / "nebula-metad.INFO")
+    assert follower.poll() == [("metad", "rotated line")]
+
+    new.write_text("after truncation\n")
+    assert follower.poll() == [("metad", "after truncation")]
+
+
+def test_fatal_lines(tmp_path):
+    _append(tmp_path / "nebula-storaged.host.root.log.INFO.1", "I0101 fine\n")
+    # glog repeats severe lines in the .ERROR and .FATAL files
+    _append(
+        tmp_path / "nebula-storaged.host.root.log.FATAL.1",
+        "F20240101 00:00:00.000000 1 Main.cpp:1] Check failed: false\n",
+    )
+    _append(
+        tmp_path / "nebula-storaged.host.root.log.INFO.1",
+        "F20240101 00:00:00.000000 1 Main.cpp:1] Check failed: false\n",
+    )
+    follower = LogFollower({"storaged": str(tmp_path)})
+
+    assert follower.check("storaged") == [
+        "F20240101 00:00:00.000000 1 Main.cpp:1] Check failed: false"
+    ]
+    assert follower.tail(1) == {
+        "storaged": ["F20240101 00:00:00.000000 1 Main.cpp:1] Check failed: false"]
+    }
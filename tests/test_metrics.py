@@ -0,0 +1,101 @@
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from nebulagraph_lite import nebulagraph
+from nebulagraph_lite.metrics import MetricsCollector, parse_stats, scrape
+
+
+@pytest.fixture
+def service():
+    """
+    A /status and /stats endpoint, replies maps a path to its body.
+    """
+    replies = {}
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = replies.get(self.path, "").encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1], replies
+    server.shutdown()
+    server.server_close()
+
+
+def test_parse_stats():
+    text = "num_queries.rate.60=12\nslow_queries.p99.600=3.5\nbad=n/a\nnoise\n"
+    assert parse_stats(text) == {
+        "num_queries.rate.60": 12.0,
+        "slow_queries.p99.600": 3.5,
+    }
+
+
+def test_scrape(service):
+    port, replies = service
+    replies["/stats"] = "num_queries.sum.60=7\n"
+    replies["/status"] = '{"status": "running"}'
+    assert scrape("127.0.0.1", port) == {"num_queries.sum.60": 7.0, "up": 1.0}
+
+    # a reply that is JSON, but no object
+    for status in ('["running"]', '"running"', "1"):
+        replies["/status"] = status
+        assert scrape("127.0.0.1", port)["up"] == 0.0
+    replies["/status"] = "<html>"
+    assert scrape("127.0.0.1", port) == {"up": 0.0}
+
+
+def test_prometheus_text():
+    collector = MetricsCollector({})
+    assert collector.prometheus_text() == ""
+    collector.samples.append(
+        (
+            1700000000.0,
+            {
+                "graphd": {"num_queries.rate.60": 2.0, "up": 1.0},
+                "storaged": {"up": 0.0},
+            },
+        )
+    )
+    assert collector.prometheus_text().splitlines() == [
+        "# TYPE nebula_num_queries_rate_60 gauge",
+        'nebula_num_queries_rate_60{service="graphd"} 2 1700000000000',
+        "# TYPE nebula_up gauge",
+        'nebula_up{service="graphd"} 1 1700000000000',
+        'nebula_up{service="storaged"} 0 1700000000000',
+    ]
+
+
+def test_prometheus_text_keeps_every_digit():
+    collector = MetricsCollector({})
+    collector.samples.append(
+        (1.0, {"graphd": {"num_queries.sum": 1234567.0, "latency": 0.1 + 0.2}})
+    )
+    text = collector.prometheus_text()
+    assert 'nebula_num_queries_sum{service="graphd"} 1234567 1000' in text
+    assert 'nebula_latency{service="graphd"} 0.30000000000000004 1000' in text
+
+
+def test_metrics_rebuilds_on_a_new_ring_size(tmp_path):
+    n = nebulagraph.NebulaGraphLet(base_path=str(tmp_path / "lite"))
+    collector = n.metrics(interval=60, ring_size=10, serve_port=0)
+    try:
+        port = collector.server_address[1]
+        assert n.metrics(interval=60, ring_size=10) is collector
+
+        rebuilt = n.metrics(interval=60, ring_size=20)
+        assert rebuilt is not collector and rebuilt.ring_size == 20
+        assert rebuilt.server_address[1] == port
+        assert collector.server_address is None
+    finally:
+        n._metrics.stop()
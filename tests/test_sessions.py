@@ -0,0 +1,75 @@
+import pytest
+
+from nebulagraph_lite import nebulagraph
+
+
+class _Result:
+    def __init__(self, error_code=0):
+        self._error_code = error_code
+
+    def is_succeeded(self):
+        return self._error_code == 0
+
+    def error_code(self):
+        return self._error_code
+
+    def error_msg(self):
+        return f"error {self._error_code}"
+
+
+class _Session:
+    def __init__(self, password):
+        self.password = password
+        self.released = False
+        self.error_code = 0
+
+    def execute(self, statement):
+        return _Result(self.error_code)
+
+    def release(self):
+        self.released = True
+
+
+class _Pool:
+    def __init__(self):
+        self.sessions = []
+
+    def get_session(self, user, password):
+        self.sessions.append(_Session(password))
+        return self.sessions[-1]
+
+
+@pytest.fixture
+def lite(tmp_path):
+    n = nebulagraph.NebulaGraphLet(base_path=str(tmp_path / "lite"))
+    n._connection_pool = _Pool()
+    return n
+
+
+def test_sessions_are_reused_per_password(lite):
+    with lite.session() as session:
+        pass
+    with lite.session(password="wrong") as other:
+        assert other._session is not session._session
+    with lite.session() as again:
+        assert again._session is session._session
+    assert len(lite._connection_pool.sessions) == 2
+
+
+def test_broken_sessions_are_not_reused(lite):
+    lite.execute("SHOW HOSTS")
+    [session] = lite._connection_pool.sessions
+
+    # a session expired on the server
+    session.error_code = -1002
+    with lite.session() as pooled:
+        assert not pooled.execute("SHOW HOSTS").is_succeeded()
+    assert session.released
+
+    lite.execute("SHOW HOSTS")
+    session = lite._connection_pool.sessions[-1]
+    session.error_code = -1005
+    with pytest.raises(Exception, match="error -1005"):
+        lite.execute("SHOW SPACES")
+    assert session.released
+    assert lite._idle_sessions == []
@@ -0,0 +1,175 @@
+"""
+Wall-clock budgets and udocker command counts of start(), stop() and
+shutdown(), on the fake udocker and fake services of conftest.py.
+
+A budget that no longer holds is a startup regression, lower the budgets
+along with every speedup, so that it stays proven.
+"""
+
+import time
+
+import pytest
+
+from nebulagraph_lite.ports import is_port_listening
+
+from .conftest import SERVICE_PORTS
+
+COLD_START_BUDGET = 8.0
+WARM_START_BUDGET = 6.0
+CRASH_DETECTION_BUDGET = 5.0
+STOP_BUDGET = 3.0
+SHUTDOWN_BUDGET = 3.0
+STATUS_BUDGET = 0.5
+
+# udocker commands of a first start: install, 4 pulls, 3 creates, 2 setups,
+# 3 runs and the inspect, version and ps calls around them
+COLD_START_MAX_COMMANDS = 24
+# the prepared containers are reused, only inspected, and udocker is
+# neither installed nor asked for its version again
+WARM_START_MAX_COMMANDS = 14
+
+
+def _timed(func, *args, **kwargs):
+    started = time.monotonic()
+    func(*args, **kwargs)
+    return time.monotonic() - started
+
+
+def test_cold_start(make_nebulagraph_let, fake_udocker):
+    n = make_nebulagraph_let()
+    seconds = _timed(n.start)
+
+    assert seconds < COLD_START_BUDGET, n.profiler.print_table()
+    assert fake_udocker.count("install") == 1
+    assert fake_udocker.count("pull") == 4
+    assert fake_udocker.count("create") == 3
+    assert fake_udocker.count("setup") == 2
+    assert fake_udocker.count("run") == 3
+    assert fake_udocker.count() <= COLD_START_MAX_COMMANDS
+    assert all(is_port_listening(port) for port in SERVICE_PORTS)
+    assert n.execute("SHOW HOSTS").is_succeeded()
+
+
+def test_warm_start_reuses_containers(make_nebulagraph_let, fake_udocker):
+    make_nebulagraph_let().start()
+    fake_udocker.kill_services()
+    fake_udocker.clear()
+
+    n = make_nebulagraph_let()
+    seconds = _timed(n.start)
+
+    assert seconds < WARM_START_BUDGET, n.profiler.print_table()
+    assert fake_udocker.count("create") == 0
+    assert fake_udocker.count("setup") == 0
+    assert fake_udocker.count("run") == 3
+    # installed and versioned by the first start, see BootstrapState
+    assert fake_udocker.count("install") == 0
+    assert fake_udocker.count("version") == 0
+    assert fake_udocker.count() <= WARM_START_MAX_COMMANDS
+
+
+def test_multiple_instances(make_nebulagraph_let, fake_udocker):
+    n = make_nebulagraph_let(graphd=2, storaged=2)
+    n.start()
+
+    assert fake_udocker.count("run") == 5
+    assert fake_udocker.count("create") == 3
+    assert all(is_port_listening(port) for port in (9669, 9670, 9779, 9789))
+    # sessions balanced over both frontends, measured as a bench
+    results = n.measure_throughput("SHOW HOSTS", concurrency=(1, 2), queries=20)
+    assert [(r["concurrency"], r["failed"]) for r in results] == [(1, 0), (2, 0)]
+    assert all(r["qps"] > 0 and r["p95_ms"] > 0 for r in results)
+    # logs, stats and bench size themselves from the manifest
+    attached = make_nebulagraph_let().attach()
+    assert (attached.graphd, attached.storaged) == (2, 2)
+    assert make_nebulagraph_let().attach(graphd=1).graphd == 1
+
+
+def test_crash_fails_start_fast(make_nebulagraph_let, fake_udocker, monkeypatch):
+    monkeypatch.setenv("FAKE_CRASH", "storaged")
+    n = make_nebulagraph_let()
+    started = time.monotonic()
+    with pytest.raises(Exception, match="storaged exited with code 1") as crash:
+        n.start()
+    # the fatal line it logged is in the log tail
+    assert "fake storaged crashed on purpose" in str(crash.value)
+
+    assert time.monotonic() - started < CRASH_DETECTION_BUDGET
+    assert fake_udocker.count("run") == 3
+
+
+def test_fatal_log_fails_start_fast(
+    make_nebulagraph_let, fake_udocker, monkeypatch
+):
+    monkeypatch.setenv("FAKE_FATAL_LOG", "graphd")
+    n = make_nebulagraph_let()
+    started = time.monotonic()
+    with pytest.raises(Exception, match="Check failed: fake graphd is stuck"):
+        n.start()
+
+    assert time.monotonic() - started < CRASH_DETECTION_BUDGET
+
+
+def test_stop(make_nebulagraph_let, fake_udocker):
+    make_nebulagraph_let().start()
+    n = make_nebulagraph_let()
+    seconds = _timed(n.stop)
+
+    assert seconds < STOP_BUDGET
+    # stopped means exited, not just signaled
+    assert not any(is_port_listening(port) for port in SERVICE_PORTS)
+
+
+def test_shutdown(make_nebulagraph_let, fake_udocker):
+    make_nebulagraph_let().start()
+    fake_udocker.clear()
+    n = make_nebulagraph_let()
+    seconds = _timed(n.shutdown)
+
+    assert seconds < SHUTDOWN_BUDGET
+    assert fake_udocker.count("rm") >= 1
+    # stopped means exited, not just signaled
+    assert not any(is_port_listening(port) for port in SERVICE_PORTS)
+
+
+def test_stop_kills_after_grace(make_nebulagraph_let, fake_udocker, monkeypatch):
+    monkeypatch.setenv("FAKE_IGNORE_SIGTERM", "storaged")
+    make_nebulagraph_let().start()
+    n = make_nebulagraph_let(stop_grace={"storaged": 0.5})
+    seconds = _timed(n.stop)
+
+    assert seconds < STOP_BUDGET
+    assert not any(is_port_listening(port) for port in SERVICE_PORTS)
+
+
+def test_status_and_stop_from_manifest(
+    make_nebulagraph_let, fake_udocker, monkeypatch
+):
+    make_nebulagraph_let(graphd=2).start()
+    n = make_nebulagraph_let()
+    started = time.monotonic()
+    status = n.status()
+
+    assert time.monotonic() - started < STATUS_BUDGET
+    assert status["state"] == "up"
+    assert set(status["services"]) == {"metad", "graphd", "graphd1", "storaged"}
+
+    # the recorded processes are enough, no process nor socket scan
+    def _scan(service):
+        raise AssertionError(f"{service} processes scanned")
+
+    monkeypatch.setattr(n, "_service_processes", _scan)
+    seconds = _timed(n.stop)
+
+    assert seconds < STOP_BUDGET
+    assert not any(is_port_listening(port) for port in (*SERVICE_PORTS, 9670))
+    assert n.status()["state"] == "stopped"
+
+
+def test_status_reports_crashed_services(make_nebulagraph_let, fake_udocker):
+    make_nebulagraph_let().start()
+    fake_udocker.kill_services()
+
+    status = make_nebulagraph_let().status()
+    assert status["state"] == "down"
+    assert {s["health"] for s in status["services"].values()} == {"down"}
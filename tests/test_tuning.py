@@ -0,0 +1,67 @@
+import json
+import shlex
+
+import pytest
+
+from nebulagraph_lite import nebulagraph
+from nebulagraph_lite.tuning import LOW_MEM, THROUGHPUT, format_flags, service_flags
+
+GB = 1 << 30
+
+
+def test_low_mem_storaged():
+    flags = service_flags(LOW_MEM, "storaged", instances=2, memory=2 * GB, cpus=4)
+
+    assert flags["num_worker_threads"] == 1
+    # 5% of 2GB over 2 instances is 51MB
+    assert flags["rocksdb_block_cache"] == 51
+    assert json.loads(flags["rocksdb_column_family_options"]) == {
+        "write_buffer_size": "8388608",
+        "max_write_buffer_number": "2",
+    }
+    assert flags["memory_tracker_limit_ratio"] == 0.6
+
+
+def test_bounds_and_overrides():
+    flags = service_flags(
+        THROUGHPUT,
+        "storaged",
+        memory=256 * GB,
+        cpus=256,
+        overrides={
+            "storaged": {"rocksdb_block_cache": 512, "num_io_threads": None}
+        },
+    )
+    assert flags["num_worker_threads"] == 64
+    assert flags["rocksdb_block_cache"] == 512
+    assert "num_io_threads" not in flags
+    assert "rocksdb_block_cache" not in service_flags(THROUGHPUT, "metad")
+    assert service_flags(None, "graphd", overrides={"graphd": {"v": 1}}) == {"v": 1}
+    with pytest.raises(ValueError, match="unknown tuning profile"):
+        service_flags("turbo", "graphd")
+
+
+def test_format_flags_round_trips_through_a_shell():
+    flags = {"enable_authorize": True, "options": {"a": "1 2"}, "v": 0}
+    assert shlex.split(format_flags(flags)) == [
+        "--enable_authorize=true",
+        '--options={"a":"1 2"}',
+        "--v=0",
+    ]
+
+
+def test_colab_command_keeps_json_flags(tmp_path):
+    n = nebulagraph.NebulaGraphLet(
+        base_path=str(tmp_path / "lite"), tuning_profile=LOW_MEM
+    )
+    command = "run nebula-storaged" + n._tuning_flags("storaged", 1)
+    argv = n._colab_udocker_argv(command)
+
+    assert argv[:4] == ["su", "-", "user", "-c"]
+    # as the shell of su parses it
+    flag = next(
+        arg
+        for arg in shlex.split(argv[4])
+        if arg.startswith("--rocksdb_column_family_options=")
+    )
+    assert json.loads(flag.split("=", 1)[1])["max_write_buffer_number"] == "2"
@@ -0,0 +1,95 @@
+import subprocess
+
+import pytest
+
+from nebulagraph_lite import udocker_backend
+from nebulagraph_lite.udocker_backend import parse_images, parse_ps
+
+CONTAINER_ID = "4c7bb1e0-9f8e-3a6b-8d3c-2f54a4b1e6c1"
+
+
+def _ps_line(names, image, protected="."):
+    # as udocker's do_ps prints it
+    return "%-36.36s %c %c %-18.100s %-20.100s" % (
+        CONTAINER_ID,
+        protected,
+        "R",
+        str(names),
+        image,
+    )
+
+
+def test_parse_ps():
+    output = "\n".join(
+        [
+            "Info: creating repo: /root/.udocker",
+            "CONTAINER ID                         P M NAMES              IMAGE",
+            _ps_line(["nebula-metad"], "vesoft/nebula-metad:v3"),
+            _ps_line([], "vesoft/nebula-console:v3", protected="P"),
+            "",
+        ]
+    )
+    assert parse_ps(output) == [
+        {
+            "id": CONTAINER_ID,
+            "names": ["nebula-metad"],
+            "image": "vesoft/nebula-metad:v3",
+        },
+        {"id": CONTAINER_ID, "names": [], "image": "vesoft/nebula-console:v3"},
+    ]
+    assert parse_ps("Error: no repository\n") == []
+
+
+def test_parse_images():
+    output = "REPOSITORY\nvesoft/nebula-metad:v3    .\n  layer\nvesoft/nebula-graphd:v3\n"
+    assert parse_images(output) == [
+        "vesoft/nebula-metad:v3",
+        "vesoft/nebula-graphd:v3",
+    ]
+
+
+@pytest.fixture
+def in_process(tmp_path, monkeypatch):
+    pytest.importorskip("udocker")
+    from udocker.config import Config
+
+    udocker_dir = tmp_path / "udocker"
+    # the tools count as installed, nothing is downloaded
+    (udocker_dir / "lib").mkdir(parents=True)
+    (udocker_dir / "lib" / "VERSION").write_text(Config.conf["tarball_release"])
+    monkeypatch.setenv("UDOCKER_DIR", str(udocker_dir))
+    subprocesses = []
+
+    def _run(argv, **kwargs):
+        subprocesses.append(argv)
+        return subprocess.CompletedProcess(argv, 0, b"", b"")
+
+    monkeypatch.setattr(udocker_backend.subprocess, "run", _run)
+    backend = udocker_backend.InProcessUdocker("udocker", allow_root=True)
+    backend.subprocesses = subprocesses
+    return backend
+
+
+def test_read_only_commands_run_in_process(in_process):
+    result = in_process.run(["ps"])
+    assert result.returncode == 0
+    assert parse_ps(result.stdout.decode()) == []
+    assert in_process.containers() == []
+    assert in_process.images() == []
+    assert in_process.subprocesses == []
+
+
+def test_writing_commands_run_as_processes(in_process):
+    in_process.run(["create", "--name=nebula-metad", "vesoft/nebula-metad:v3"])
+    in_process.run(["rm", "-f", "nebula-metad"])
+    assert [argv[2] for argv in in_process.subprocesses] == ["create", "rm"]
+
+
+def test_debug_does_not_outlive_its_command(in_process):
+    from udocker.config import Config
+    from udocker.msg import Msg
+
+    level, chlderr, conf = Msg.level, Msg.chlderr, dict(Config.conf)
+    in_process.run(["--debug", "ps"])
+    assert (Msg.level, Msg.chlderr) == (level, chlderr)
+    assert Config.conf == conf
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+import pytest
+
+from nebulagraph_lite.utils import retry, terminate_processes
+
+
+def test_retry_backoff_ends_on_cancel():
+    cancelled = threading.Event()
+    calls = []
+
+    @retry((ValueError,), tries=3, delay=30, cancelled=lambda: cancelled)
+    def _fail():
+        calls.append(time.monotonic())
+        raise ValueError("udocker failed")
+
+    threading.Timer(0.2, cancelled.set).start()
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="udocker failed"):
+        _fail()
+    assert time.monotonic() - started < 5
+    assert len(calls) == 1
+
+
+class _DeniedProcess:
+    pid = 1
+
+    def terminate(self):
+        raise psutil.AccessDenied(self.pid)
+
+
+def test_terminate_processes_returns_the_denied_ones():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    denied = _DeniedProcess()
+
+    killed, survivors = terminate_processes(
+        [denied, psutil.Process(child.pid)], grace=5
+    )
+    assert killed == []
+    assert survivors == [denied]
+    assert child.wait(timeout=5) is not None